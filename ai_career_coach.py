@@ -1,13 +1,24 @@
 import streamlit as st
-from langchain_xai import ChatXAI
-from langchain_community.document_loaders import PyPDFLoader
-from langchain_core.messages import SystemMessage, HumanMessage, AIMessage
 import os
-import tempfile
+from pdf_extract import extract_resume_pages
+from compaction import clean_resume
+from chat_memory import COACH, USER, ConversationMemory
+from coach_index import CoachRetriever
+from stream_render import StreamRenderer
+from llm_gateway import get_chat_model, user_config
+from telemetry import span, start_metrics_server
+from model_router import DEEP, ModelRouter
 
 # Set up the Streamlit app
 st.title("Resume-Based Career Coach Chatbot")
 
+@st.cache_resource
+def start_metrics():
+    # One Prometheus /metrics endpoint per server process
+    return start_metrics_server()
+
+start_metrics()
+
 XAI_API_KEY = "APY KEY"
 os.environ["XAI_API_KEY"] = XAI_API_KEY
 
@@ -18,14 +29,28 @@ if not api_key:
     st.error("XAI_API_KEY not found. Please set it in your environment.")
     st.stop()
 
-chat = ChatXAI(
-    model="grok-4",
-    api_key=api_key
-)
+# Shared, process-wide client instead of a new one on every rerun
+chat = get_chat_model(api_key, model="grok-4")
+# Answers are counted under model_router's Grok-4 tier (the coach has no local checks or fast tier)
+router = ModelRouter({DEEP: lambda: (chat, None)})
+
+# Resume excerpts relevant to each question are appended per turn (see CoachRetriever)
+SYSTEM_PROMPT = """
+    You are a professional career coach and resume mentor.
 
-# Initialize session state for chat history and resume context
-if "chat_history" not in st.session_state:
-    st.session_state.chat_history = []
+    You help with:
+    - Career Guidance
+    - Resume Improvements
+    - Interview Preparation
+    - Job Search Strategy
+    - Skill Gap Analysis
+
+    Ground your advice in the candidate's resume excerpts below.
+    """
+
+# Initialize session state for chat memory and resume context
+if "chat_memory" not in st.session_state:
+    st.session_state.chat_memory = None
 if "resume_context" not in st.session_state:
     st.session_state.resume_context = None
 
@@ -33,19 +58,15 @@ if "resume_context" not in st.session_state:
 uploaded_file = st.file_uploader("Upload your resume (PDF)", type="pdf")
 
 if uploaded_file:
-    # Save uploaded file to temp path for loading
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as temp_file:
-        temp_file.write(uploaded_file.read())
-        temp_path = temp_file.name
-
-    # Load the PDF
-    loader = PyPDFLoader(temp_path)
-    documents = loader.load()
-    context = "\n\n".join(doc.page_content for doc in documents)
-    st.session_state.resume_context = context
-
-    # Clean up temp file
-    os.unlink(temp_path)
+    # Extraction is cached by file content, so reruns don't re-parse the PDF
+    with span("coach", "extract"):
+        resume_text = clean_resume(extract_resume_pages(uploaded_file))
+    if resume_text != st.session_state.resume_context:
+        # Index once per upload; a new resume starts a new chat
+        st.session_state.resume_context = resume_text
+        with span("coach", "index"):
+            st.session_state.coach_index = CoachRetriever(resume_text)
+        st.session_state.chat_memory = ConversationMemory(chat, SYSTEM_PROMPT, config=user_config("coach"))
 
     st.success("Resume uploaded and processed!")
 
@@ -54,22 +75,9 @@ if not st.session_state.resume_context:
     st.info("Please upload a resume to start the chatbot.")
     st.stop()
 
-# Create system message with resume context
-system_message = SystemMessage(
-    content=f"""
-    You are a professional career coach and resume mentor.
-
-    You help with:
-    - Career Guidance
-    - Resume Improvements
-    - Interview Preparation
-    - Job Search Strategy
-    - Skill Gap Analysis
-
-    Candidate Resume:
-    {st.session_state.resume_context}
-    """
-)
+# Recent turns go out verbatim, older ones as a rolling summary
+memory = st.session_state.chat_memory
+index = st.session_state.coach_index
 
 # Split the screen into two columns: left for resume, right for chat
 left_col, right_col = st.columns(2)
@@ -80,42 +88,38 @@ with left_col:
     with st.expander("View Resume Content", expanded=True):
         st.text_area("Resume Text", st.session_state.resume_context, height=600, disabled=True)
 
-# Right column: Chatbot interface
-with right_col:
+# Right column: Chatbot interface. A fragment, so sending a message reruns only the chat
+# instead of the whole page (resume panel included).
+@st.fragment
+def chat_panel():
     st.subheader("Chat with Career Coach")
+    st.caption(f"🔎 Each question sends the {index.k} most relevant of {len(index.resume)} resume passages")
 
     # Display chat history
-    for message in st.session_state.chat_history:
-        if isinstance(message, HumanMessage):
-            with st.chat_message("user"):
-                st.markdown(message.content)
-        elif isinstance(message, AIMessage):
-            with st.chat_message("assistant"):
-                st.markdown(message.content)
+    for role, text in memory.transcript:
+        with st.chat_message(role):
+            st.markdown(text)
 
     # User input
     user_input = st.chat_input("Ask a question about your career or resume...")
 
     if user_input:
-        # Append user message
-        st.session_state.chat_history.append(HumanMessage(content=user_input))
+        # Show and append the user message; the new turn is drawn in place, no rerun needed
+        with st.chat_message(USER):
+            st.markdown(user_input)
+        memory.add(USER, user_input)
 
-        # Prepare messages
-        messages = [system_message] + st.session_state.chat_history
+        # Prepare messages (bounded by RESUME_GENIE_CHAT_BUDGET tokens)
+        with span("coach", "prompt", prompt="SYSTEM_PROMPT"):
+            messages = memory.messages(context=index.context(user_input))
 
-        # Stream the response
+        # Stream the response (buffered, redrawn every ~80 ms with a cursor)
         with st.chat_message("assistant"):
-            response_placeholder = st.empty()
-            response_text = ""
-            for chunk in chat.stream(messages):
-                response_text += chunk.content
-                response_placeholder.markdown(response_text + "▌")  # Cursor for streaming effect
-
-            # Finalize without cursor
-            response_placeholder.markdown(response_text)
+            response_text = StreamRenderer().consume(router.chat_model("coach").stream(messages, user_config("coach")))
 
         # Append AI message to history
-        st.session_state.chat_history.append(AIMessage(content=response_text))
+        memory.add(COACH, response_text)
+
 
-        # Rerun to update the UI (optional, but ensures smooth flow)
-        st.rerun()
\ No newline at end of file
+with right_col:
+    chat_panel()
@@ -0,0 +1,160 @@
+# api_client.py - Dashboard side of api_service: same result types as the in-process tools
+import base64
+import json
+import os
+import threading
+
+import httpx
+
+from chat_memory import COACH, USER
+from keyword_matcher import KeywordMatch
+from local_scorer import LocalMatch, RequirementCoverage
+from model_router import Routed
+from structured_output import CheckerResult, ScorerResult
+
+# When set, the dashboard sends every tool run to this api_service instead of running it in-process
+API_URL = os.getenv("RESUME_GENIE_API_URL", "").rstrip("/")
+API_TIMEOUT = float(os.getenv("RESUME_GENIE_API_TIMEOUT", "180"))
+
+
+class ServiceError(Exception):
+    pass
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """One pooled HTTP client per dashboard process."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = httpx.Client(base_url=API_URL, timeout=httpx.Timeout(API_TIMEOUT, connect=10.0))
+        return _client
+
+
+def _encode(data):
+    return base64.b64encode(data).decode("ascii")
+
+
+def _error(response):
+    try:
+        return response.json()["error"]
+    except (ValueError, KeyError, TypeError):
+        return f"service returned HTTP {response.status_code}"
+
+
+def _post(path, payload, user=None):
+    try:
+        response = get_client().post(path, json=payload, headers={"x-resume-genie-user": user or ""})
+    except httpx.HTTPError as e:
+        raise ServiceError(f"Could not reach the Resume Genie service: {e}") from e
+    if response.status_code >= 400:
+        raise ServiceError(_error(response))
+    return response.json()
+
+
+class EventStream:
+    """Iterates the ``token`` texts of an SSE response; ``meta`` and ``done`` hold the other events."""
+
+    def __init__(self, path, payload, user=None):
+        self.path = path
+        self.payload = payload
+        self.user = user
+        self.meta = {}
+        self.done = {}
+
+    def __iter__(self):
+        try:
+            with get_client().stream("POST", self.path, json=self.payload,
+                                     headers={"x-resume-genie-user": self.user or ""}) as response:
+                if response.status_code >= 400:
+                    response.read()
+                    raise ServiceError(_error(response))
+                event = "message"
+                for line in response.iter_lines():
+                    if line.startswith("event:"):
+                        event = line[6:].strip()
+                    elif line.startswith("data:"):
+                        data = json.loads(line[5:])
+                        if event == "token":
+                            yield data["text"]
+                        elif event == "meta":
+                            self.meta = data
+                        elif event == "done":
+                            self.done = data
+                        elif event == "error":
+                            raise ServiceError(data["error"])
+                    elif not line:
+                        event = "message"
+        except httpx.HTTPError as e:
+            raise ServiceError(f"Could not reach the Resume Genie service: {e}") from e
+
+
+# ───────────────────────────────────────────────
+# TOOLS
+# ───────────────────────────────────────────────
+def extract_text(pdf_bytes, user=None):
+    return _post("/v1/extract", {"resume_pdf": _encode(pdf_bytes)}, user)["text"]
+
+
+def decode_score(body):
+    """(LocalMatch, KeywordMatch, compaction summary or None, ScorerResult | markdown | None)
+    from a score result (service response or ``job_queue`` result)."""
+    local = body["local"]
+    local = LocalMatch(score=local["score"], match_percent=local["match_percent"],
+                       coverage=[RequirementCoverage(**c) for c in local["coverage"]])
+    analysis = body.get("analysis")
+    if isinstance(analysis, dict):
+        analysis = ScorerResult(**analysis)
+    return local, KeywordMatch(**body["keywords"]), body.get("compaction"), analysis
+
+
+def decode_check(item):
+    if isinstance(item.get("result"), dict):
+        item["result"] = CheckerResult(**item["result"])
+    if isinstance(item.get("route"), dict):
+        item["route"] = Routed(None, **item["route"])
+    return item
+
+
+def score(pdf_bytes, job_description, deep=False, user=None):
+    return decode_score(_post("/v1/score", {"resume_pdf": _encode(pdf_bytes), "job_description": job_description,
+                                            "deep": deep}, user))
+
+
+def check(files, deep=False, user=None):
+    """One dict per ``(name, pdf_bytes)``: ``name`` plus ``error`` or ``result`` (CheckerResult or markdown)
+    and the ``route`` (model_router tier) that answered; ``deep`` skips the fast tier."""
+    body = _post("/v1/check", {"resumes": [{"name": name, "resume_pdf": _encode(data)} for name, data in files],
+                               "deep": deep}, user)
+    return [decode_check(item) for item in body["results"]]
+
+
+def stream_cover_letter(pdf_bytes, job_description, user=None):
+    return EventStream("/v1/cover-letter", {"resume_pdf": _encode(pdf_bytes), "job_description": job_description}, user)
+
+
+class RemoteConversation:
+    """Coach chat state kept by the client so any service replica can answer the next turn."""
+
+    def __init__(self, resume_text):
+        self.resume_text = resume_text
+        self.transcript = []
+        self.summary = ""
+        self.summarized = 0
+
+    def ask(self, question, user=None):
+        """Stream the coach's answer; the turn is recorded once the stream has been consumed."""
+        stream = EventStream("/v1/coach/chat", {
+            "resume_text": self.resume_text, "question": question, "history": self.transcript,
+            "summary": self.summary, "summarized": self.summarized,
+        }, user)
+        parts = []
+        for text in stream:
+            parts.append(text)
+            yield text
+        self.transcript += [(USER, question), (COACH, "".join(parts))]
+        self.summary = stream.done.get("summary", self.summary)
+        self.summarized = stream.done.get("summarized", self.summarized)
@@ -0,0 +1,324 @@
+# api_service.py - Stateless ASGI service for the four tools (JSON + SSE), run under uvicorn
+import argparse
+import base64
+import binascii
+import functools
+import json
+import os
+from dataclasses import asdict
+
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.routing import Route
+
+from chat_memory import COACH, USER, ConversationMemory
+from coach_index import CoachRetriever
+from compaction import clean_resume, compact_resume
+from jd_sections import score_sections
+from model_router import DEEP, DEEP_MODEL, FAST, FAST_MODEL, ModelRouter, NotAResume
+from pdf_extract import PDFExtractionError, extract_pdf_pages, extract_pdf_pages_many
+from prompts import (COACH_SYSTEM_PROMPT, COVER_LETTER_PROMPT, RESUME_CHECKER_JSON_PROMPT, RESUME_CHECKER_PROMPT,
+                     build_scorer_prompt)
+from resume_dedup import find_duplicates
+from structured_output import STRUCTURED, CheckerResult, ScorerResult
+from telemetry import render_metrics, span
+
+CHECKER_CONCURRENCY = int(os.getenv("RESUME_GENIE_CHECKER_CONCURRENCY", "8"))
+MAX_CHECK_FILES = 50
+# Coach indexes are rebuilt from the request; this only saves re-embedding the same resume
+COACH_INDEX_CACHE = 64
+
+
+class RequestError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+# ───────────────────────────────────────────────
+# MODELS
+# ───────────────────────────────────────────────
+def default_models(model=DEEP_MODEL):
+    """(chat model, structured-output model) shared by every request in the worker."""
+    from llm_gateway import default_models as models
+
+    try:
+        return models(model)
+    except RuntimeError as e:
+        raise RequestError(f"{e} on the server", status=503) from None
+
+
+def fast_models():
+    return default_models(FAST_MODEL)
+
+
+# ───────────────────────────────────────────────
+# REQUEST HELPERS
+# ───────────────────────────────────────────────
+async def _body(request):
+    try:
+        body = await request.json()
+    except ValueError:
+        raise RequestError("request body must be JSON") from None
+    if not isinstance(body, dict):
+        raise RequestError("request body must be a JSON object")
+    return body
+
+
+def _field(body, name):
+    value = body.get(name)
+    if not isinstance(value, str) or not value.strip():
+        raise RequestError(f"{name!r} is required")
+    return value
+
+
+def _pdf_bytes(encoded):
+    try:
+        return base64.b64decode(encoded, validate=True)
+    except (binascii.Error, TypeError, ValueError):
+        raise RequestError("'resume_pdf' must be base64-encoded PDF bytes") from None
+
+
+def _resume_files(body):
+    resumes = body.get("resumes")
+    if not isinstance(resumes, list) or not resumes:
+        raise RequestError("'resumes' must be a non-empty list of {name, resume_pdf}")
+    if len(resumes) > MAX_CHECK_FILES:
+        raise RequestError(f"at most {MAX_CHECK_FILES} resumes per request")
+    for i, r in enumerate(resumes):
+        if not isinstance(r, dict) or not isinstance(r.get("name", ""), str):
+            raise RequestError(f"'resumes'[{i}] must be an object {{name, resume_pdf}}")
+    return resumes
+
+
+def _history(body):
+    """``history``, ``summary`` and ``summarized`` for ``ConversationMemory.restore``."""
+    history = body.get("history") or []
+    if not isinstance(history, list) or not all(
+            isinstance(m, list) and len(m) == 2 and m[0] in (USER, COACH) and isinstance(m[1], str) for m in history):
+        raise RequestError(f"'history' must be a list of [role, text] pairs with role {USER!r} or {COACH!r}")
+    summary, summarized = body.get("summary") or "", body.get("summarized") or 0
+    if not isinstance(summary, str):
+        raise RequestError("'summary' must be a string")
+    if not isinstance(summarized, int) or isinstance(summarized, bool) or not 0 <= summarized <= len(history):
+        raise RequestError("'summarized' must be a count of 'history' messages")
+    return [tuple(m) for m in history], summary, summarized
+
+
+async def _resume_pages(body, tool):
+    """Resume pages from ``resume_pdf`` (base64) or plain ``resume_text``."""
+    if body.get("resume_pdf"):
+        data = _pdf_bytes(body["resume_pdf"])
+        with span(tool, "extract"):
+            try:
+                return await run_in_threadpool(extract_pdf_pages, data)
+            except PDFExtractionError as e:
+                raise RequestError(str(e), status=422) from None
+    return [_field(body, "resume_text")]
+
+
+def _config(request, tool, **extra):
+    # Per-user gateway limits follow the caller (the dashboard forwards its session id)
+    user = request.headers.get("x-resume-genie-user") or (request.client.host if request.client else None)
+    return {"metadata": {"user": user, "tool": tool}, **extra}
+
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def _sse_stream(meta, chunks, on_done=None):
+    """SSE body: one ``meta`` event, a ``token`` event per chunk, then ``done`` (or ``error``)."""
+    yield _sse("meta", meta)
+    parts = []
+    try:
+        async for chunk in chunks:
+            if isinstance(chunk.content, str) and chunk.content:
+                parts.append(chunk.content)
+                yield _sse("token", {"text": chunk.content})
+        done = {"chars": sum(map(len, parts))}
+        if on_done is not None:
+            done.update(await on_done("".join(parts)))
+        yield _sse("done", done)
+    except Exception as e:
+        yield _sse("error", {"error": str(e)})
+
+
+# ───────────────────────────────────────────────
+# ENDPOINTS
+# ───────────────────────────────────────────────
+async def extract(request):
+    pages = await _resume_pages(await _body(request), "extract")
+    return JSONResponse({"pages": pages, "text": clean_resume(pages)})
+
+
+async def score(request):
+    body = await _body(request)
+    job_description = _field(body, "job_description")
+    pages = await _resume_pages(body, "scorer")
+    with span("scorer", "local_score"):
+        # Per-section results are cached in the worker, so a client re-scoring an edited JD pays for the edit only
+        match = await run_in_threadpool(score_sections, "\n\n".join(pages), job_description)
+    local, keywords = match.local, match.keywords
+    response = {"local": asdict(local), "keywords": asdict(keywords)}
+    if body.get("deep"):
+        with span("scorer", "prompt"):
+            compacted = await run_in_threadpool(compact_resume, pages, "scorer", job_description)
+            prompt = build_scorer_prompt(job_description, compacted.text, keywords, structured=STRUCTURED)
+        response["compaction"] = compacted.summary
+        try:
+            routed = await request.app.state.router.ainvoke("scorer", prompt, ScorerResult if STRUCTURED else None,
+                                                            compacted.text, _config(request, "scorer"), deep=True)
+        except NotAResume as e:
+            raise RequestError(str(e), status=422) from None
+        if STRUCTURED:
+            routed.result.keywords_matched, routed.result.keywords_missing = keywords.matched, keywords.missing
+            response["analysis"] = routed.result.as_dict()
+        else:
+            response["analysis"] = routed.result
+        response["route"] = routed.as_dict()
+    return JSONResponse(response)
+
+
+async def check(request):
+    body = await _body(request)
+    resumes = _resume_files(body)
+    datas = [_pdf_bytes(r.get("resume_pdf", "")) for r in resumes]
+    with span("checker", "extract", files=len(datas)):
+        extracted = await run_in_threadpool(extract_pdf_pages_many, datas)
+
+    results = [{"name": r.get("name", f"resume {i + 1}")} for i, r in enumerate(resumes)]
+    duplicates = find_duplicates([None if isinstance(p, Exception) else "\n\n".join(p) for p in extracted])
+    inputs, positions = [], []
+    for i, pages in enumerate(extracted):
+        if isinstance(pages, Exception):
+            results[i]["error"] = str(pages)
+            continue
+        if i in duplicates:
+            # Near-duplicates get their original's evaluation instead of an LLM call of their own
+            results[i].update(duplicate_of=results[duplicates[i].canonical]["name"],
+                              duplicate_similarity=round(duplicates[i].similarity, 3))
+            continue
+        with span("checker", "prompt"):
+            compacted = await run_in_threadpool(compact_resume, pages, "checker")
+        results[i]["compaction"] = compacted.summary
+        inputs.append({"context": compacted.text})
+        positions.append(i)
+
+    router = request.app.state.router
+    if STRUCTURED:
+        chain = router.runnable("checker", RESUME_CHECKER_JSON_PROMPT, CheckerResult, deep=bool(body.get("deep")))
+    else:
+        chain = router.runnable("checker", RESUME_CHECKER_PROMPT, deep=bool(body.get("deep")))
+    config = _config(request, "checker", max_concurrency=CHECKER_CONCURRENCY)
+    responses = await chain.abatch(inputs, config, return_exceptions=True)
+    for i, response in zip(positions, responses):
+        if isinstance(response, NotAResume):
+            results[i]["error"] = str(response)
+        elif isinstance(response, Exception):
+            results[i]["error"] = f"Evaluation failed: {response}"
+        else:
+            results[i]["result"] = response.result.as_dict() if STRUCTURED else response.result
+            results[i]["route"] = response.as_dict()
+    for i, duplicate in duplicates.items():
+        canonical = results[duplicate.canonical]
+        results[i].update({key: canonical[key] for key in ("compaction", "result", "route", "error") if key in canonical})
+    return JSONResponse({"structured": STRUCTURED, "results": results})
+
+
+async def cover_letter(request):
+    body = await _body(request)
+    job_description = _field(body, "job_description")
+    pages = await _resume_pages(body, "cover_letter")
+    with span("cover_letter", "prompt"):
+        compacted = await run_in_threadpool(compact_resume, pages, "cover_letter", job_description)
+    try:
+        llm = request.app.state.router.chat_model("cover_letter", compacted.text)
+    except NotAResume as e:
+        raise RequestError(str(e), status=422) from None
+    chunks = (COVER_LETTER_PROMPT | llm).astream(
+        {"job_description": job_description, "resume_text": compacted.text}, _config(request, "cover_letter"))
+    return StreamingResponse(_sse_stream({"compaction": compacted.summary}, chunks), media_type="text/event-stream")
+
+
+@functools.lru_cache(maxsize=COACH_INDEX_CACHE)
+def _coach_index(resume_text):
+    return CoachRetriever(resume_text)
+
+
+async def coach_chat(request):
+    """One coach turn. The client keeps the conversation: ``history`` as [role, text] pairs,
+    plus the rolling ``summary`` and how many history messages it covers (``summarized``)."""
+    body = await _body(request)
+    resume_text, question = _field(body, "resume_text"), _field(body, "question")
+    history, summary, summarized = _history(body)
+    llm, _ = request.app.state.models()
+    config = _config(request, "coach")
+
+    with span("coach", "index"):
+        index = await run_in_threadpool(_coach_index, resume_text)
+    memory = ConversationMemory.restore(llm, COACH_SYSTEM_PROMPT, history, summary, summarized, config=config)
+    memory.add(USER, question)
+    with span("coach", "prompt"):
+        messages = await run_in_threadpool(lambda: memory.messages(context=index.context(question)))
+
+    async def on_done(answer):
+        # Older turns are folded while the answer streams; hand the new state back to the client
+        memory.add(COACH, answer)
+        await run_in_threadpool(memory.wait)
+        return {"summary": memory.summary, "summarized": memory.summarized}
+
+    meta = {"passages": len(index.resume), "k": index.k}
+    chunks = request.app.state.router.chat_model("coach").astream(messages, config)
+    return StreamingResponse(_sse_stream(meta, chunks, on_done), media_type="text/event-stream")
+
+
+async def healthz(request):
+    return JSONResponse({"status": "ok", "structured": STRUCTURED})
+
+
+async def metrics(request):
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+
+async def _request_error(request, exc):
+    return JSONResponse({"error": str(exc)}, status_code=exc.status)
+
+
+def create_app(models=default_models, fast_models=fast_models):
+    """The ASGI app; ``models()`` returns Grok-4's (chat model, structured-output model) and ``fast_models()``
+    the fast tier's (None: no fast tier), e.g. fakes in benchmarks."""
+    app = Starlette(
+        routes=[
+            Route("/v1/extract", extract, methods=["POST"]),
+            Route("/v1/score", score, methods=["POST"]),
+            Route("/v1/check", check, methods=["POST"]),
+            Route("/v1/cover-letter", cover_letter, methods=["POST"]),
+            Route("/v1/coach/chat", coach_chat, methods=["POST"]),
+            Route("/healthz", healthz),
+            Route("/metrics", metrics),
+        ],
+        exception_handlers={RequestError: _request_error},
+    )
+    app.state.models = models
+    app.state.router = ModelRouter({DEEP: models, **({FAST: fast_models} if fast_models else {})})
+    return app
+
+
+app = create_app()
+
+
+def main(argv=None):
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Serve the Resume Genie tools over HTTP (JSON + SSE).")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="worker processes")
+    args = parser.parse_args(argv)
+    uvicorn.run("api_service:app", host=args.host, port=args.port, workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()
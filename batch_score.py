@@ -0,0 +1,321 @@
+# batch_score.py - Rank a folder (or ZIP) of resume PDFs against one job description
+import argparse
+import asyncio
+import csv
+import glob
+import json
+import os
+import re
+import sys
+import time
+import zipfile
+
+from compaction import compact_resume
+from disk_cache import sha256_hex
+from keyword_matcher import match_keywords
+from local_scorer import load_embedder, prepare_job, score_match
+from pdf_extract import extract_pdf_pages, extract_pdf_pages_many
+from prompts import build_scorer_prompt
+from resume_dedup import Deduplicator, decode_signature, encode_signature
+from structured_output import STRUCTURED, STRUCTURED_MAX_TOKENS, ScorerResult, ainvoke_structured
+
+FIELDS = [
+    "rank", "file", "duplicate_of", "duplicate_similarity", "prefilter_score", "local_score", "match_percent", "keyword_match_percent",
+    "llm_score", "llm_match_percent", "prompt_tokens_saved", "missing_keywords", "error", "analysis",
+]
+
+# Local results a near-duplicate resume takes over from its canonical copy
+_LOCAL_FIELDS = ("local_score", "match_percent", "keyword_match_percent", "missing_keywords", "prefilter_score")
+
+_SCORE_RE = re.compile(r"\bScore\**\s*:\s*\**\s*(\d{1,3})\s*/\s*100", re.IGNORECASE)
+_MATCH_RE = re.compile(r"Overall Match\**\s*:\s*\**\s*(\d{1,3})\s*%", re.IGNORECASE)
+
+
+def _first_int(pattern, text):
+    match = pattern.search(text or "")
+    return int(match.group(1)) if match else None
+
+
+# ───────────────────────────────────────────────
+# INPUTS / CHECKPOINT / OUTPUT
+# ───────────────────────────────────────────────
+class ResumeSource:
+    """PDFs from a directory tree or a ZIP archive, read one at a time."""
+
+    def __init__(self, path):
+        self.path = path
+        self._zip = zipfile.ZipFile(path) if zipfile.is_zipfile(path) else None
+        if self._zip is not None:
+            self.names = sorted(n for n in self._zip.namelist() if n.lower().endswith(".pdf"))
+        else:
+            pattern = os.path.join(path, "**", "*.pdf")
+            self.names = sorted(os.path.relpath(p, path) for p in glob.glob(pattern, recursive=True))
+
+    def read(self, name):
+        if self._zip is not None:
+            return self._zip.read(name)
+        with open(os.path.join(self.path, name), "rb") as f:
+            return f.read()
+
+    def close(self):
+        if self._zip is not None:
+            self._zip.close()
+
+
+class Checkpoint:
+    """Append-only JSONL log of finished work, replayed on restart."""
+
+    def __init__(self, path, jd_hash):
+        self.path = path
+        self.local = {}
+        self.llm = {}
+        self.written = set()
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # torn last line from a crash
+                    stage = record.get("stage")
+                    if stage == "meta" and record["jd_sha256"] != jd_hash:
+                        sys.exit(f"{path} was written for a different job description; "
+                                 "delete it or pass another --checkpoint")
+                    elif stage == "local":
+                        self.local[record["file"]] = record
+                    elif stage == "llm":
+                        self.llm[record["file"]] = record
+                    elif stage == "written":
+                        self.written.add(record["file"])
+        self._f = open(path, "a", encoding="utf-8")
+        if not os.path.getsize(path):
+            self.add({"stage": "meta", "jd_sha256": jd_hash})
+
+    def add(self, record):
+        self._f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._f.flush()
+
+    def close(self):
+        self._f.close()
+
+
+class ResultWriter:
+    def __init__(self, path):
+        self.jsonl = path.lower().endswith((".jsonl", ".json"))
+        new = not os.path.exists(path) or not os.path.getsize(path)
+        self._f = open(path, "a", encoding="utf-8", newline="")
+        if not self.jsonl:
+            self._csv = csv.DictWriter(self._f, fieldnames=FIELDS)
+            if new:
+                self._csv.writeheader()
+
+    def write(self, row):
+        if self.jsonl:
+            self._f.write(json.dumps(row, ensure_ascii=False) + "\n")
+        else:
+            self._csv.writerow(row)
+        self._f.flush()
+
+    def close(self):
+        self._f.close()
+
+
+class Progress:
+    def __init__(self, label, total):
+        self.label, self.total, self.done = label, total, 0
+        self.started = time.perf_counter()
+
+    def step(self, n=1):
+        self.done += n
+        rate = self.done / max(time.perf_counter() - self.started, 1e-6)
+        print(f"\r{self.label}: {self.done}/{self.total} ({rate:.1f}/s)", end="", file=sys.stderr, flush=True)
+        if self.done >= self.total:
+            print(file=sys.stderr)
+
+
+# ───────────────────────────────────────────────
+# PIPELINE
+# ───────────────────────────────────────────────
+def local_stage(source, job_description, checkpoint, batch_size, dedup=None):
+    """Extract (in parallel) and score every resume locally; skips work already checkpointed.
+
+    With a ``Deduplicator``, a resume that near-duplicates an earlier one is
+    marked ``duplicate_of`` it and takes over its local scores unscored.
+    """
+    todo = [name for name in source.names if name not in checkpoint.local]
+    progress = Progress("Extract + local score", len(source.names))
+    progress.step(len(source.names) - len(todo))
+    job = prepare_job(job_description, load_embedder())
+    if dedup is not None:
+        # Rebuild the index from the canonical resumes of an interrupted run
+        for record in checkpoint.local.values():
+            if record.get("minhash") and not record.get("duplicate_of"):
+                dedup.index.add(record["file"], decode_signature(record["minhash"]))
+
+    for start in range(0, len(todo), batch_size):
+        names = todo[start:start + batch_size]
+        datas = [source.read(name) for name in names]
+        for name, data, pages in zip(names, datas, extract_pdf_pages_many(datas)):
+            record = {"stage": "local", "file": name, "sha256": sha256_hex(data)}
+            if isinstance(pages, Exception):
+                record.update(error=str(pages), prefilter_score=-1)
+            else:
+                text = "\n\n".join(pages)
+                duplicate = None
+                if dedup is not None:
+                    signature = dedup.hasher.signature(text)
+                    duplicate = dedup.add(name, signature=signature)
+                if duplicate is not None:
+                    canonical = checkpoint.local[duplicate.canonical]
+                    record.update({key: canonical.get(key) for key in _LOCAL_FIELDS},
+                                  duplicate_of=duplicate.canonical,
+                                  duplicate_similarity=round(duplicate.similarity, 3))
+                    checkpoint.local[name] = record
+                    checkpoint.add(record)
+                    continue
+                if dedup is not None:
+                    record["minhash"] = encode_signature(signature)
+                local = score_match(text, job)
+                keywords = match_keywords(text, job_description)
+                record.update(
+                    local_score=local.score,
+                    match_percent=local.match_percent,
+                    keyword_match_percent=keywords.match_percent,
+                    missing_keywords=keywords.missing,
+                    # Embedding similarity dominates; exact keywords break ties
+                    prefilter_score=round(0.7 * local.score + 0.3 * keywords.match_percent, 1),
+                )
+            checkpoint.local[name] = record
+            checkpoint.add(record)
+        progress.step(len(names))
+
+
+async def llm_stage(source, job_description, ranked, checkpoint, writer, llm, concurrency):
+    """Send the shortlisted resumes to Grok-4 and write each row the moment it finishes."""
+    limit = asyncio.Semaphore(concurrency)
+    todo = [r for r in ranked if r["file"] not in checkpoint.written]
+    progress = Progress("Grok-4 analysis", len(ranked))
+    progress.step(len(ranked) - len(todo))
+
+    async def analyse(record):
+        if record["file"] in checkpoint.llm:
+            return record, checkpoint.llm[record["file"]]
+        async with limit:
+            try:
+                pages = extract_pdf_pages(source.read(record["file"]))  # served from the text cache
+                compacted = compact_resume(pages, "scorer", job_description)
+                prompt = build_scorer_prompt(job_description, compacted.text, structured=STRUCTURED)
+                config = {"metadata": {"user": "batch", "tool": "batch"}}
+                result = {"stage": "llm", "file": record["file"], "tokens_saved": compacted.tokens_saved}
+                if STRUCTURED:
+                    parsed = await ainvoke_structured(llm, prompt, ScorerResult, config)
+                    result.update(analysis=json.dumps(parsed.as_dict(), ensure_ascii=False),
+                                  llm_score=parsed.score, llm_match_percent=parsed.match_percent)
+                else:
+                    result["analysis"] = (await llm.ainvoke(prompt, config)).content
+            except Exception as e:
+                result = {"stage": "llm", "file": record["file"], "error": f"LLM error: {e}"}
+        checkpoint.add(result)
+        checkpoint.llm[record["file"]] = result
+        return record, result
+
+    for next_done in asyncio.as_completed([analyse(r) for r in todo]):
+        record, result = await next_done
+        writer.write(_row(record, result))
+        checkpoint.add({"stage": "written", "file": record["file"]})
+        progress.step()
+
+
+def _row(record, result=None):
+    result = result or {}
+    analysis = result.get("analysis")
+    return {
+        "rank": record["rank"],
+        "file": record["file"],
+        "duplicate_of": record.get("duplicate_of"),
+        "duplicate_similarity": record.get("duplicate_similarity"),
+        "prefilter_score": record.get("prefilter_score"),
+        "local_score": record.get("local_score"),
+        "match_percent": record.get("match_percent"),
+        "keyword_match_percent": record.get("keyword_match_percent"),
+        # Structured answers carry the numbers; markdown ones are scraped
+        "llm_score": result.get("llm_score", _first_int(_SCORE_RE, analysis)),
+        "llm_match_percent": result.get("llm_match_percent", _first_int(_MATCH_RE, analysis)),
+        "prompt_tokens_saved": result.get("tokens_saved"),
+        "missing_keywords": "; ".join(record.get("missing_keywords") or []),
+        "error": result.get("error") or record.get("error"),
+        "analysis": analysis,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Rank many resume PDFs against one job description.",
+        epilog="Example: python batch_score.py resumes/ --jd job.txt --out ranked.csv --top-k 50",
+    )
+    parser.add_argument("resumes", help="directory of PDFs (searched recursively) or a .zip of PDFs")
+    parser.add_argument("--jd", required=True, help="text file with the job description")
+    parser.add_argument("--out", required=True, help="results file (.csv or .jsonl)")
+    parser.add_argument("--top-k", type=int, default=50, help="resumes sent to Grok-4 after local prefiltering")
+    parser.add_argument("--concurrency", type=int, default=8, help="Grok-4 calls in flight")
+    parser.add_argument("--batch-size", type=int, default=32, help="PDFs extracted per pool round")
+    parser.add_argument("--checkpoint", help="progress log used to resume after a crash (default: OUT.checkpoint)")
+    parser.add_argument("--no-llm", action="store_true", help="local scoring only")
+    parser.add_argument("--dedup", choices=("flag", "collapse", "off"), default="flag",
+                        help="near-duplicate resumes: flag them and reuse their original's scores (default), "
+                             "leave them out of the results, or score every copy")
+    args = parser.parse_args(argv)
+
+    with open(args.jd, encoding="utf-8") as f:
+        job_description = f.read().strip()
+    api_key = os.getenv("XAI_API_KEY")
+    if not args.no_llm and not api_key:
+        sys.exit("XAI_API_KEY is not set (or pass --no-llm)")
+
+    source = ResumeSource(args.resumes)
+    checkpoint = Checkpoint(args.checkpoint or args.out + ".checkpoint", sha256_hex(job_description))
+    writer = ResultWriter(args.out)
+    try:
+        local_stage(source, job_description, checkpoint, args.batch_size,
+                    None if args.dedup == "off" else Deduplicator())
+
+        records = list(checkpoint.local.values())
+        duplicates = sum(bool(r.get("duplicate_of")) for r in records)
+        if args.dedup == "collapse":
+            records = [r for r in records if not r.get("duplicate_of")]
+        ranked = sorted(records, key=lambda r: (-r["prefilter_score"], r["file"]))
+        for rank, record in enumerate(ranked, 1):
+            record["rank"] = rank
+        top_k = 0 if args.no_llm else args.top_k
+        # Duplicates never take a shortlist slot: they reuse their original's analysis
+        canonical = [r for r in ranked if not r.get("duplicate_of")]
+        shortlist = [r for r in canonical[:top_k] if not r.get("error")]
+
+        if shortlist:
+            from llm_gateway import get_chat_model
+
+            llm = get_chat_model(api_key, "grok-4", temperature=0.2,
+                                 max_tokens=STRUCTURED_MAX_TOKENS if STRUCTURED else 2000)
+            asyncio.run(llm_stage(source, job_description, shortlist, checkpoint, writer, llm, args.concurrency))
+
+        shortlisted = {r["file"] for r in shortlist}
+        for record in ranked:
+            if record["file"] not in shortlisted and record["file"] not in checkpoint.written:
+                original = record.get("duplicate_of")
+                writer.write(_row(record, checkpoint.llm.get(original) if original in shortlisted else None))
+                checkpoint.add({"stage": "written", "file": record["file"]})
+    finally:
+        writer.close()
+        checkpoint.close()
+        source.close()
+
+    print(f"Ranked {len(ranked)} resumes → {args.out}", file=sys.stderr)
+    if duplicates:
+        action = "left out" if args.dedup == "collapse" else "flagged"
+        print(f"{duplicates} near-duplicate resumes {action}", file=sys.stderr)
+    for record in ranked[:10]:
+        print(f"{record['rank']:>4}  {record.get('prefilter_score', '-'):>6}  {record['file']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+# benchmarks/corpus.py - Synthetic resume PDFs (1-50 pages) and job descriptions for benchmarks
+import random
+
+FIRST = ["Jane", "Arjun", "Maria", "Wei", "Olu", "Sofia", "Liam", "Priya", "Diego", "Hana"]
+LAST = ["Doe", "Sharma", "Garcia", "Chen", "Adeyemi", "Rossi", "Murphy", "Iyer", "Lopez", "Sato"]
+COMPANIES = ["Acme Corp", "Globex", "Initech", "Umbrella Labs", "Stark Industries", "Wayne Tech", "Hooli"]
+TITLES = ["Software Engineer", "Senior Backend Engineer", "Data Engineer", "ML Engineer", "Tech Lead"]
+SKILLS = ["Python", "Django", "FastAPI", "AWS", "Docker", "Kubernetes", "PostgreSQL", "Redis", "Kafka",
+          "React", "TypeScript", "Terraform", "Spark", "Airflow", "PyTorch", "CI/CD", "GraphQL", "Go"]
+VERBS = ["Built", "Designed", "Led", "Migrated", "Optimised", "Automated", "Shipped", "Scaled", "Owned"]
+OBJECTS = ["a payments API", "the data pipeline", "an internal ML platform", "search ranking",
+           "the CI/CD system", "a real-time analytics service", "customer onboarding flows"]
+OUTCOMES = ["cutting latency by {n}%", "saving ${n}k a year", "serving {n}M requests a day",
+            "reducing incidents by {n}%", "for {n} enterprise customers"]
+
+LINES_PER_PAGE = 58
+
+
+def resume_lines(rng, pages):
+    """Text lines for a resume of ``pages`` pages: header, summary, skills, then experience."""
+    name = f"{rng.choice(FIRST)} {rng.choice(LAST)}"
+    lines = [name, f"{name.split()[0].lower()}@example.com | +1 555 0100 | linkedin.com/in/{name.replace(' ', '').lower()}",
+             "", "SUMMARY",
+             f"{rng.choice(TITLES)} with {rng.randint(3, 15)} years building backend and data systems.", "",
+             "SKILLS", ", ".join(rng.sample(SKILLS, 10)), "", "EXPERIENCE"]
+    body_lines = pages * (LINES_PER_PAGE - 2)  # two lines per page go to header/footer
+    while len(lines) < body_lines - 6:
+        lines += ["", f"{rng.choice(TITLES)} - {rng.choice(COMPANIES)} ({rng.randint(2008, 2023)} - present)"]
+        for _ in range(rng.randint(3, 6)):
+            outcome = rng.choice(OUTCOMES).format(n=rng.randint(5, 90))
+            lines.append(f"- {rng.choice(VERBS)} {rng.choice(OBJECTS)} with {rng.choice(SKILLS)}, {outcome}")
+    lines += ["", "EDUCATION", f"BSc Computer Science, University {rng.randint(1, 99)}",
+              "", "References available upon request"]
+    return name, lines[:body_lines]
+
+
+def make_pdf(page_texts):
+    """Minimal uncompressed PDF with one Helvetica text block per page (no dependencies)."""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>"]
+    kids = " ".join(f"{4 + 2 * i} 0 R" for i in range(len(page_texts)))
+    objects.append(f"<< /Type /Pages /Kids [{kids}] /Count {len(page_texts)} >>".encode())
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    for i, text in enumerate(page_texts):
+        escaped = (line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") for line in text.split("\n"))
+        stream = ("BT /F1 10 Tf 50 770 Td 13 TL " + " ".join(f"({line}) Tj T*" for line in escaped) + " ET").encode("latin-1", "replace")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * i} 0 R >>".encode())
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+def resume_pdf(pages, seed=0):
+    """A ``pages``-page resume PDF; each page repeats a name header and a 'Page i of n' footer."""
+    rng = random.Random(f"{pages}:{seed}")
+    name, lines = resume_lines(rng, pages)
+    per_page = LINES_PER_PAGE - 2
+    page_texts = []
+    for i in range(pages):
+        body = lines[i * per_page:(i + 1) * per_page]
+        page_texts.append("\n".join([f"{name} - Resume", *body, f"Page {i + 1} of {pages}"]))
+    return make_pdf(page_texts)
+
+
+def job_description(seed=0):
+    rng = random.Random(f"jd:{seed}")
+    skills = rng.sample(SKILLS, 8)
+    return "\n".join([
+        f"{rng.choice(TITLES)} at {rng.choice(COMPANIES)}",
+        "Responsibilities:",
+        f"- Design and operate backend services in {skills[0]} and {skills[1]}.",
+        f"- Own data pipelines built on {skills[2]} and {skills[3]}.",
+        "- Mentor engineers and lead technical design reviews.",
+        "Requirements:",
+        f"- 5+ years of experience with {skills[4]}, {skills[5]} and cloud infrastructure.",
+        f"- Production experience with {skills[6]} and {skills[7]}.",
+        "- Strong communication skills and ownership of outcomes.",
+    ])
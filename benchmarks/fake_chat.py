@@ -0,0 +1,64 @@
+# benchmarks/fake_chat.py - Deterministic in-process stand-in for ChatXAI with simulated latency
+import asyncio
+import threading
+import time
+
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.runnables import Runnable
+
+from fake_llm_server import fake_answer
+from llm_cache import to_messages
+
+
+class FakeChatXAI(Runnable):
+    """Answers like ``ChatXAI`` without a network: same prompt, same answer.
+
+    ``latency`` is the time to first token and ``tokens_per_second`` paces the
+    rest (one word per token). Structured-mode prompts get schema-shaped JSON,
+    with made-up skills when ``grounded`` is off.
+    """
+
+    def __init__(self, model_name="grok-4", temperature=None, max_tokens=None,
+                 latency=0.05, tokens_per_second=2000.0, answer_words=120, grounded=True):
+        self.model_name = model_name
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.answer_words = answer_words
+        self.grounded = grounded
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _reply(self, model_input):
+        with self._lock:
+            self.calls += 1
+        messages = [{"role": m.type, "content": m.content} for m in to_messages(model_input)]
+        return fake_answer(messages, self.answer_words, self.grounded)
+
+    def _words(self, reply):
+        return reply.split(" ")
+
+    def invoke(self, input, config=None, **kwargs):
+        reply = self._reply(input)
+        time.sleep(self.latency + len(self._words(reply)) / self.tokens_per_second)
+        return AIMessage(content=reply)
+
+    async def ainvoke(self, input, config=None, **kwargs):
+        reply = self._reply(input)
+        await asyncio.sleep(self.latency + len(self._words(reply)) / self.tokens_per_second)
+        return AIMessage(content=reply)
+
+    def stream(self, input, config=None, **kwargs):
+        words = self._words(self._reply(input))
+        time.sleep(self.latency)
+        for i, word in enumerate(words):
+            time.sleep(1 / self.tokens_per_second)
+            yield AIMessageChunk(content=word if i == len(words) - 1 else word + " ")
+
+    async def astream(self, input, config=None, **kwargs):
+        words = self._words(self._reply(input))
+        await asyncio.sleep(self.latency)
+        for i, word in enumerate(words):
+            await asyncio.sleep(1 / self.tokens_per_second)
+            yield AIMessageChunk(content=word if i == len(words) - 1 else word + " ")
@@ -0,0 +1,284 @@
+# benchmarks/run.py - Time PDF extraction, prompt formatting and each dashboard tool flow; compare runs
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# Offline and isolated: hashing embeddings, no response cache, a throwaway PDF cache
+os.environ.setdefault("RESUME_GENIE_EMBED_MODEL", "hashing")
+os.environ["RESUME_GENIE_LLM_CACHE"] = "0"
+os.environ.setdefault("RESUME_GENIE_CACHE_DIR", tempfile.mkdtemp(prefix="resume-genie-bench-"))
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.corpus import job_description, resume_pdf  # noqa: E402
+from benchmarks.fake_chat import FakeChatXAI  # noqa: E402
+
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+PAGE_COUNTS = (1, 5, 20, 50)
+CHECKER_BATCH = 5
+COACH_TURNS = 6
+# A case regresses when its median exceeds baseline * (1 + tolerance) + slack
+DEFAULT_TOLERANCE = 0.25
+SLACK_MS = 2.0
+
+
+class _NullContainer:
+    """Stands in for ``st.empty()`` so flows render without a Streamlit session."""
+
+    def markdown(self, *args, **kwargs):
+        pass
+
+    def empty(self):
+        pass
+
+
+def _upload(data):
+    # extract_resume_text only needs getvalue(), like Streamlit's UploadedFile
+    return io.BytesIO(data)
+
+
+# ───────────────────────────────────────────────
+# CASES
+# ───────────────────────────────────────────────
+def extraction_cases(seed_counter):
+    from pdf_extract import extract_resume_text
+
+    cases = {}
+    for pages in PAGE_COUNTS:
+        def cold(pages=pages):
+            # A fresh seed per run gives new bytes, so the extraction cache never hits
+            data = resume_pdf(pages, seed=next(seed_counter))
+            return lambda: extract_resume_text(_upload(data))
+
+        warm_data = resume_pdf(pages)
+        extract_resume_text(_upload(warm_data))
+        cases[f"extract/cold/{pages}p"] = cold
+        cases[f"extract/warm/{pages}p"] = lambda data=warm_data: (lambda: extract_resume_text(_upload(data)))
+    return cases
+
+
+def prompt_cases():
+    from compaction import compact_resume
+    from keyword_matcher import match_keywords
+    from pdf_extract import extract_resume_pages
+    from prompts import COVER_LETTER_PROMPT, RESUME_CHECKER_JSON_PROMPT, RESUME_CHECKER_PROMPT, build_scorer_prompt
+
+    jd = job_description()
+    pages = extract_resume_pages(_upload(resume_pdf(2)))
+    context = "\n\n".join(pages)
+    keywords = match_keywords(context, jd)
+    cover = compact_resume(pages, "cover_letter", jd).text
+    checker = compact_resume(pages, "checker").text
+    scorer = compact_resume(pages, "scorer", jd).text
+
+    def once(fn):
+        return lambda: fn
+
+    return {
+        "prompt/cover_letter": once(lambda: COVER_LETTER_PROMPT.format(job_description=jd, resume_text=cover)),
+        "prompt/scorer/markdown": once(lambda: build_scorer_prompt(jd, scorer, keywords)),
+        "prompt/scorer/json": once(lambda: build_scorer_prompt(jd, scorer, keywords, structured=True)),
+        "prompt/checker/markdown": once(lambda: RESUME_CHECKER_PROMPT.format(context=checker)),
+        "prompt/checker/json": once(lambda: RESUME_CHECKER_JSON_PROMPT.format(context=checker)),
+    }
+
+
+def flow_cases(llm, seed_counter):
+    """Each dashboard tool from upload to rendered answer, with the same modules the UI calls."""
+    from chat_memory import COACH, USER, ConversationMemory
+    from coach_index import CoachRetriever
+    from compaction import clean_resume, compact_resume
+    from jd_sections import score_sections
+    from keyword_matcher import match_keywords
+    from local_scorer import score_match
+    from pdf_extract import extract_pdf_pages_many, extract_resume_pages
+    from prompts import COVER_LETTER_PROMPT, RESUME_CHECKER_JSON_PROMPT, build_scorer_prompt
+    from stream_render import StreamRenderer
+    from structured_output import CheckerResult, ScorerResult, invoke_structured, structured
+
+    jd = job_description()
+
+    def cover_letter():
+        data = resume_pdf(2, seed=next(seed_counter))
+
+        def run():
+            compacted = compact_resume(extract_resume_pages(_upload(data)), "cover_letter", jd)
+            chain = COVER_LETTER_PROMPT | llm
+            renderer = StreamRenderer(_NullContainer())
+            return renderer.consume(chain.stream({"job_description": jd, "resume_text": compacted.text}))
+        return run
+
+    def matcher():
+        data = resume_pdf(2, seed=next(seed_counter))
+
+        def run():
+            pages = extract_resume_pages(_upload(data))
+            context = "\n\n".join(pages)
+            score_match(context, jd)
+            keywords = match_keywords(context, jd)
+            compacted = compact_resume(pages, "scorer", jd)
+            prompt = build_scorer_prompt(jd, compacted.text, keywords, structured=True)
+            return invoke_structured(llm, prompt, ScorerResult)
+        return run
+
+    def matcher_edit():
+        # Local re-score after a one-line JD edit; the other sections come from the section cache
+        resume = "\n\n".join(extract_resume_pages(_upload(resume_pdf(2, seed=next(seed_counter)))))
+        score_sections(resume, jd)
+        edited = f"{jd}\n- Experience with platform item {next(seed_counter)} at scale."
+        return lambda: score_sections(resume, edited)
+
+    def checker():
+        datas = [resume_pdf(2, seed=next(seed_counter)) for _ in range(CHECKER_BATCH)]
+
+        def run():
+            inputs = [{"context": compact_resume(pages, "checker").text} for pages in extract_pdf_pages_many(datas)]
+            chain = RESUME_CHECKER_JSON_PROMPT | structured(llm, CheckerResult)
+            return list(chain.batch_as_completed(inputs, {"max_concurrency": 8}))
+        return run
+
+    def checker_cascade():
+        # Same batch through model_router: a fake fast tier (a quarter of the latency) answers what it can
+        from model_router import DEEP, FAST, ModelRouter
+
+        fast = FakeChatXAI("grok-3-mini", latency=llm.latency / 4, tokens_per_second=llm.tokens_per_second)
+        router = ModelRouter({FAST: lambda: (None, fast), DEEP: lambda: (llm, llm)})
+        datas = [resume_pdf(2, seed=next(seed_counter)) for _ in range(CHECKER_BATCH)]
+
+        def run():
+            inputs = [{"context": compact_resume(pages, "checker").text} for pages in extract_pdf_pages_many(datas)]
+            chain = router.runnable("checker", RESUME_CHECKER_JSON_PROMPT, CheckerResult)
+            return list(chain.batch_as_completed(inputs, {"max_concurrency": 8}))
+        return run
+
+    def coach():
+        data = resume_pdf(3, seed=next(seed_counter))
+
+        def run():
+            resume = clean_resume(extract_resume_pages(_upload(data)))
+            index = CoachRetriever(resume)
+            memory = ConversationMemory(llm, "You are a career coach. Ground your advice in these resume excerpts:")
+            for turn in range(COACH_TURNS):
+                question = f"How should I present my experience with item {turn} for a senior role?"
+                memory.add(USER, question)
+                messages = memory.messages(context=index.context(question))
+                memory.add(COACH, StreamRenderer(_NullContainer()).consume(llm.stream(messages)))
+            return memory
+        return run
+
+    return {
+        "flow/cover_letter": cover_letter,
+        "flow/matcher": matcher,
+        "flow/matcher/jd_edit": matcher_edit,
+        f"flow/checker/{CHECKER_BATCH}": checker,
+        f"flow/checker/{CHECKER_BATCH}/cascade": checker_cascade,
+        f"flow/coach/{COACH_TURNS}turns": coach,
+    }
+
+
+# ───────────────────────────────────────────────
+# TIMING
+# ───────────────────────────────────────────────
+def measure(setup, repeat):
+    """Milliseconds for ``repeat`` runs; ``setup()`` builds each run's callable outside the timer."""
+    setup()()  # warm-up: imports, pools, embedder
+    samples = []
+    for _ in range(repeat):
+        run = setup()
+        started = time.perf_counter()
+        run()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return {
+        "min_ms": round(samples[0], 3),
+        "median_ms": round(statistics.median(samples), 3),
+        "p95_ms": round(samples[min(len(samples) - 1, int(0.95 * len(samples)))], 3),
+        "runs": repeat,
+    }
+
+
+def _git_sha():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(results, baseline, tolerance, slack_ms=SLACK_MS):
+    """Cases whose median got slower than the baseline allows, as (name, before, after) tuples."""
+    regressions = []
+    for name, current in results.items():
+        before = baseline.get(name)
+        if before and current["median_ms"] > before["median_ms"] * (1 + tolerance) + slack_ms:
+            regressions.append((name, before["median_ms"], current["median_ms"]))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Benchmark extraction, prompt formatting and the dashboard tool flows against a fake Grok-4.",
+        epilog="Example: python -m benchmarks.run --baseline benchmarks/results/abc1234.json",
+    )
+    parser.add_argument("--repeat", type=int, default=10, help="timed runs per case")
+    parser.add_argument("--filter", default="", help="only run cases whose name contains this")
+    parser.add_argument("--latency", type=float, default=0.02, help="fake model time to first token (s)")
+    parser.add_argument("--tokens-per-second", type=float, default=4000.0, help="fake model streaming rate")
+    parser.add_argument("--out", help="results file (default: benchmarks/results/<git sha>.json)")
+    parser.add_argument("--baseline", help="earlier results file; exit 1 if any case regressed")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="allowed relative slowdown of a case's median (default 0.25)")
+    args = parser.parse_args(argv)
+
+    seeds = iter(range(1, 10**9))
+    llm = FakeChatXAI(latency=args.latency, tokens_per_second=args.tokens_per_second)
+    cases = {**extraction_cases(seeds), **prompt_cases(), **flow_cases(llm, seeds)}
+
+    results = {}
+    for name, setup in cases.items():
+        if args.filter in name:
+            results[name] = measure(setup, args.repeat)
+            r = results[name]
+            print(f"{name:<28} median {r['median_ms']:>9.2f} ms   p95 {r['p95_ms']:>9.2f} ms   min {r['min_ms']:>9.2f} ms")
+
+    sha = _git_sha()
+    report = {
+        "meta": {
+            "git_sha": sha,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "repeat": args.repeat,
+            "fake_llm": {"latency": args.latency, "tokens_per_second": args.tokens_per_second},
+        },
+        "results": results,
+    }
+    out = args.out or os.path.join(RESULTS_DIR, f"{sha}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {out}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.tolerance)
+        for name, before, after in regressions:
+            print(f"REGRESSION {name}: {before:.2f} ms -> {after:.2f} ms ({after / before - 1:+.0%})")
+        if regressions:
+            return 1
+        print(f"No regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+# chat_memory.py - Bounded Career Coach memory: recent turns verbatim, older turns folded into a summary
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+from compaction import count_tokens
+from prompts import CHAT_SUMMARY_PROMPT
+
+KEEP_TURNS = int(os.getenv("RESUME_GENIE_CHAT_TURNS", "3"))
+CHAT_BUDGET = int(os.getenv("RESUME_GENIE_CHAT_BUDGET", "6000"))
+SUMMARY_WORDS = 150
+
+USER, COACH = "user", "assistant"
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="chat-summary")
+        return _pool
+
+
+def _clip(text, tokens, budget):
+    # Keep the end of an oversized message; the question is usually at the bottom
+    keep = max(0, int(len(text) * budget / max(tokens, 1)))
+    return text[-keep:] if keep else ""
+
+
+class ConversationMemory:
+    """Chat history whose prompt cost stays flat however long the conversation runs.
+
+    The full transcript is kept as ``(role, text)`` tuples for display. Prompts
+    are built from the system text, a rolling summary and the last ``keep_turns``
+    exchanges. Older turns are summarised on a background thread, and every
+    request is capped at ``budget`` tokens.
+    """
+
+    def __init__(self, llm, system_prompt, keep_turns=KEEP_TURNS, budget=CHAT_BUDGET, config=None):
+        self.llm = llm
+        self.system_prompt = system_prompt
+        self.keep_messages = keep_turns * 2
+        self.budget = budget
+        self.config = config
+        self.transcript = []
+        self.summary = ""
+        self.summarized = 0  # transcript messages covered by the summary
+        self._recent = []    # (role, text, tokens)
+        self._folding = []   # turns handed to the summariser, still sent verbatim until it finishes
+        self._future = None
+
+    @classmethod
+    def restore(cls, llm, system_prompt, transcript, summary="", summarized=0, **kwargs):
+        """Rebuild a memory from state kept by a client (see ``api_service``): no summary call is made."""
+        memory = cls(llm, system_prompt, **kwargs)
+        memory.transcript = list(transcript)
+        memory.summary, memory.summarized = summary, summarized
+        memory._recent = [(role, text, count_tokens(text)) for role, text in memory.transcript[summarized:]]
+        return memory
+
+    def __len__(self):
+        return len(self.transcript)
+
+    def add(self, role, text):
+        self.transcript.append((role, text))
+        self._recent.append((role, text, count_tokens(text)))
+        self._collect()
+        if self._future is None and len(self._recent) > self.keep_messages:
+            cut = len(self._recent) - self.keep_messages
+            self._folding, self._recent = self._recent[:cut], self._recent[cut:]
+            self._future = get_pool().submit(self._summarize, self.summary, self._folding)
+
+    def _summarize(self, summary, entries):
+        lines = "\n".join(f"{'Candidate' if role == USER else 'Coach'}: {text}" for role, text, _ in entries)
+        prompt = CHAT_SUMMARY_PROMPT.format(summary=summary or "(none)", messages=lines, max_words=SUMMARY_WORDS)
+        return self.llm.invoke(prompt, self.config).content.strip()
+
+    def _collect(self):
+        if self._future is None or not self._future.done():
+            return
+        try:
+            self.summary = self._future.result()
+            self.summarized += len(self._folding)
+        except Exception:
+            # Put the turns back; they are folded again with the next batch
+            self._recent = self._folding + self._recent
+        self._folding, self._future = [], None
+
+    def wait(self, timeout=None):
+        """Block until a pending summary (if any) has been applied."""
+        if self._future is not None:
+            try:
+                self._future.result(timeout)
+            except Exception:
+                pass
+        self._collect()
+
+    def messages(self, context=None):
+        """Messages for the next request: system + context + summary + the newest turns that fit the budget."""
+        self._collect()
+        system = self.system_prompt
+        if context:
+            system += f"\n\n{context}"
+        if self.summary:
+            system += f"\n\nEarlier in this conversation (summary):\n{self.summary}"
+        remaining = self.budget - count_tokens(system)
+
+        picked = []
+        for role, text, tokens in reversed(self._folding + self._recent):
+            if tokens > remaining:
+                if not picked:  # always send the latest message, trimmed if need be
+                    picked.append((role, _clip(text, tokens, remaining)))
+                break
+            picked.append((role, text))
+            remaining -= tokens
+        history = [HumanMessage(content=text) if role == USER else AIMessage(content=text)
+                   for role, text in reversed(picked)]
+        return [SystemMessage(content=system)] + history
@@ -0,0 +1,117 @@
+# coach_index.py - In-process vector index that grounds Career Coach answers in the relevant resume sections
+import glob
+import os
+import threading
+from dataclasses import dataclass
+
+import numpy as np
+
+from compaction import budget_for, count_tokens, split_sections
+from local_scorer import embed, load_embedder
+
+TOP_K = int(os.getenv("RESUME_GENIE_COACH_TOP_K", "4"))
+# Optional folder of .md/.txt career and interview guides searched alongside the resume
+GUIDES_DIR = os.getenv("RESUME_GENIE_GUIDES_DIR", "guides")
+PASSAGE_WORDS = 120
+
+
+@dataclass
+class Passage:
+    source: str
+    title: str
+    text: str
+
+
+def split_passages(text, source):
+    """Split text into section passages, cutting long sections into ~PASSAGE_WORDS-word pieces."""
+    passages = []
+    for title, body in split_sections(text):
+        lines, words = [], 0
+        for line in body.splitlines():
+            if lines and words + len(line.split()) > PASSAGE_WORDS:
+                passages.append(Passage(source, title, "\n".join(lines)))
+                lines, words = [], 0
+            if line.strip():
+                lines.append(line)
+                words += len(line.split())
+        if lines:
+            passages.append(Passage(source, title, "\n".join(lines)))
+    return passages
+
+
+class VectorIndex:
+    """Normalised embedding matrix with brute-force top-K cosine search."""
+
+    def __init__(self, passages, vectors):
+        self.passages = passages
+        self.vectors = vectors
+
+    @classmethod
+    def build(cls, passages, embedder=None):
+        return cls(passages, embed([p.text for p in passages], embedder))
+
+    def __len__(self):
+        return len(self.passages)
+
+    def search(self, query_vector, k=TOP_K):
+        if not self.passages or k <= 0:
+            return []
+        sims = self.vectors @ query_vector
+        k = min(k, len(sims))
+        top = np.argpartition(-sims, k - 1)[:k]
+        top = top[np.argsort(-sims[top])]
+        return [(float(sims[i]), self.passages[i]) for i in top]
+
+
+_guides = None
+_guides_lock = threading.Lock()
+
+
+def get_guide_index(embedder=None):
+    """Index of the guidance library, built once per process (empty if GUIDES_DIR is missing)."""
+    global _guides
+    with _guides_lock:
+        if _guides is None:
+            passages = []
+            for path in sorted(glob.glob(os.path.join(GUIDES_DIR, "**", "*.*"), recursive=True)):
+                if path.lower().endswith((".md", ".txt")):
+                    with open(path, encoding="utf-8") as f:
+                        passages += split_passages(f.read(), os.path.relpath(path, GUIDES_DIR))
+            _guides = VectorIndex.build(passages, embedder)
+        return _guides
+
+
+class CoachRetriever:
+    """Resume (plus guide library) index that returns only the passages relevant to a question.
+
+    Built once per upload. The resume's top block (name, contact, summary) is
+    always included so answers stay personal; the rest of the context is the
+    top-K passages by cosine similarity, capped at the coach token budget.
+    """
+
+    def __init__(self, resume_text, embedder=None, k=TOP_K):
+        self.embedder = embedder or load_embedder()
+        self.k = k
+        passages = split_passages(resume_text, "resume")
+        self.header = passages[0] if passages and passages[0].title == "header" else None
+        body = passages[1:] if self.header else passages
+        self.resume = VectorIndex.build(body, self.embedder)
+        self.guides = get_guide_index(self.embedder)
+
+    def retrieve(self, question):
+        query = embed([question], self.embedder)[0]
+        hits = self.resume.search(query, self.k) + self.guides.search(query, self.k)
+        return [p for _, p in sorted(hits, key=lambda hit: -hit[0])[:self.k]]
+
+    def context(self, question):
+        remaining = budget_for("coach")
+        blocks = []
+        for p in ([self.header] if self.header else []) + self.retrieve(question):
+            label = "Resume" if p.source == "resume" else f"Guide ({p.source})"
+            block = f"[{label} — {p.title}]\n{p.text}"
+            tokens = count_tokens(block)
+            if tokens > remaining:
+                break
+            blocks.append(block)
+            remaining -= tokens
+        return "\n\n".join(blocks)
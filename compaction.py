@@ -0,0 +1,251 @@
+# compaction.py - Normalise and trim resume text to a per-tool token budget before prompting
+import os
+import re
+import warnings
+from collections import Counter
+from dataclasses import dataclass
+
+from keyword_matcher import compile_jd, normalize
+
+# ───────────────────────────────────────────────
+# BUDGETS (tokens of resume text per prompt)
+# ───────────────────────────────────────────────
+TOOL_BUDGETS = {
+    "scorer": 3000,
+    "checker": 3500,
+    "cover_letter": 2500,
+    "coach": 2000,
+}
+
+SECTION_HEADINGS = (
+    "summary", "profile", "objective", "about me", "experience", "work experience",
+    "professional experience", "employment history", "education", "skills", "technical skills",
+    "core competencies", "projects", "certifications", "certificates", "publications", "awards",
+    "achievements", "languages", "interests", "volunteer", "volunteering", "leadership", "references",
+    "research", "teaching", "courses", "training",
+)
+# Sections that stay in every compacted resume whatever their JD relevance
+ALWAYS_KEEP = ("skills", "technical skills", "core competencies", "experience", "work experience",
+               "professional experience")
+
+_BOILERPLATE = [re.compile(p, re.IGNORECASE) for p in (
+    r"^\s*page\s+\d+(\s+of\s+\d+)?\s*$",
+    r"^\s*[-–—]?\s*\d{1,3}\s*[-–—]?\s*$",
+    r"^\s*\d+\s*/\s*\d+\s*$",
+    r"^\s*references\s+(are\s+)?available\s+(up)?on\s+request\.?\s*$",
+    r"^\s*curriculum\s+vitae\s*$",
+    r"^\s*r[ée]sum[ée]\s*$",
+    r"^\s*(confidential|private\s*&\s*confidential)\s*$",
+    r"^\s*i\s+hereby\s+declare\b.*$",
+)]
+
+
+def _get_encoder():
+    global _encoder
+    if _encoder is None:
+        name = os.getenv("RESUME_GENIE_TOKENIZER", "cl100k_base")
+        try:
+            import tiktoken
+
+            _encoder = tiktoken.get_encoding(name)
+        except Exception as e:
+            # Not installed or no cached vocab: budgets fall back to the estimate below, so say so once
+            warnings.warn(f"tiktoken encoding {name!r} unavailable ({e}); token budgets use a "
+                          f"character-based estimate", RuntimeWarning, stacklevel=3)
+            _encoder = False
+    return _encoder
+
+
+_encoder = None
+
+
+def count_tokens(text):
+    """Token count with the local tiktoken vocabulary, or a close estimate when it is unavailable."""
+    encoder = _get_encoder()
+    if encoder:
+        return len(encoder.encode(text, disallowed_special=()))
+    # ~4 characters per token for words, one token per punctuation mark
+    return sum(max(1, (len(w) + 3) // 4) for w in re.findall(r"\w+|[^\w\s]", text))
+
+
+# ───────────────────────────────────────────────
+# NORMALISATION
+# ───────────────────────────────────────────────
+def _furniture_key(line):
+    # Page headers/footers usually differ only by the page number
+    return re.sub(r"\d+", "#", line.strip().lower())
+
+
+def strip_page_furniture(pages, edge_lines=3):
+    """Drop header/footer lines that repeat at the top or bottom of most pages.
+
+    The first page keeps its copy of a repeated header, which is usually the
+    candidate's name and contact line.
+    """
+    if len(pages) < 2:
+        return pages
+    split = [page.splitlines() for page in pages]
+
+    def edges(lines):
+        bottom_start = max(edge_lines, len(lines) - edge_lines)
+        return range(min(edge_lines, len(lines))), range(bottom_start, len(lines))
+
+    counts = Counter()
+    for lines in split:
+        top, bottom = edges(lines)
+        counts.update({_furniture_key(lines[i]) for i in (*top, *bottom) if lines[i].strip()})
+    repeated = {key for key, n in counts.items() if n >= max(2, len(pages) // 2 + 1)}
+
+    cleaned, seen = [], set()
+    for lines in split:
+        top, bottom = edges(lines)
+        drop = set()
+        for i in (*top, *bottom):
+            key = _furniture_key(lines[i])
+            if key in repeated and (key in seen or i in bottom):
+                drop.add(i)
+            seen.add(key)
+        cleaned.append("\n".join(l for i, l in enumerate(lines) if i not in drop))
+    return cleaned
+
+
+def normalize_text(text):
+    lines = []
+    for line in text.splitlines():
+        if any(p.match(line) for p in _BOILERPLATE):
+            continue
+        lines.append(re.sub(r"[ \t ]+", " ", line).strip())
+    text = "\n".join(lines)
+    return re.sub(r"\n{3,}", "\n\n", text).strip()
+
+
+def clean_resume(resume):
+    """Resume pages (or text) with page furniture, boilerplate and whitespace runs removed."""
+    pages = [resume] if isinstance(resume, str) else list(resume)
+    return normalize_text("\n\n".join(strip_page_furniture(pages)))
+
+
+def budget_for(tool):
+    return int(os.getenv(f"RESUME_GENIE_BUDGET_{tool.upper()}", TOOL_BUDGETS[tool]))
+
+
+# ───────────────────────────────────────────────
+# SECTION RANKING
+# ───────────────────────────────────────────────
+def _heading(line):
+    if re.match(r"#{1,6} \S", line):  # markdown heading (guide documents)
+        return line.lstrip("#").strip().lower()
+    bare = re.sub(r"[^a-z ]", "", line.lower()).strip()
+    if bare in SECTION_HEADINGS:
+        return bare
+    # SHORT ALL-CAPS LINES are headings on most resumes
+    if 0 < len(line) <= 40 and line.isupper() and len(line.split()) <= 4:
+        return bare or line.lower()
+    return None
+
+
+def split_sections(text):
+    """[(heading, text)] in document order; the untitled top block is the contact/summary header."""
+    sections = [["header", []]]
+    for line in text.splitlines():
+        heading = _heading(line)
+        if heading:
+            sections.append([heading, [line]])
+        else:
+            sections[-1][1].append(line)
+    return [(name, "\n".join(lines).strip()) for name, lines in sections if "\n".join(lines).strip()]
+
+
+def _relevance(section_text, jd_index, jd_tokens):
+    tokens = normalize(section_text)
+    if not tokens:
+        return 0.0
+    keyword_hits = len(jd_index.find(section_text)) if jd_index else 0
+    overlap = len(set(tokens) & jd_tokens) / (len(set(tokens)) ** 0.5) if jd_tokens else 0.0
+    return keyword_hits * 2.0 + overlap
+
+
+def _truncate(text, budget):
+    out, used = [], 0
+    for line in text.splitlines():
+        cost = count_tokens(line) + 1
+        if used + cost > budget:
+            break
+        out.append(line)
+        used += cost
+    return "\n".join(out)
+
+
+@dataclass
+class Compaction:
+    text: str
+    tokens_before: int
+    tokens_after: int
+    dropped_sections: list
+
+    @property
+    def tokens_saved(self):
+        return self.tokens_before - self.tokens_after
+
+    @property
+    def summary(self):
+        dropped = f"; left out {', '.join(self.dropped_sections)}" if self.dropped_sections else ""
+        return f"Resume trimmed from {self.tokens_before} to {self.tokens_after} tokens ({self.tokens_saved} saved{dropped})"
+
+
+def compact_resume(resume, tool, job_description=None, budget=None):
+    """Clean ``resume`` (page list or text) and fit it into ``tool``'s token budget.
+
+    Repeated page headers/footers, page numbers, boilerplate and whitespace runs
+    go first. If the result is still over budget, sections are kept in order of
+    relevance to ``job_description`` and put back in their original order.
+    The header and ``ALWAYS_KEEP`` sections share the budget first (small ones
+    whole, the largest cut to fit); other sections are kept whole while they
+    fit, and only the most relevant one that does not is cut into what is left.
+    """
+    tokens_before = count_tokens(resume if isinstance(resume, str) else "\n\n".join(resume))
+    budget = budget or budget_for(tool)
+
+    text = clean_resume(resume)
+    if count_tokens(text) <= budget:
+        return Compaction(text, tokens_before, count_tokens(text), [])
+
+    sections = split_sections(text)
+    jd_index = compile_jd(job_description) if job_description else None
+    jd_tokens = set(normalize(job_description)) if job_description else set()
+    costs = [count_tokens(body) + 2 for _, body in sections]
+    # The contact/summary header and the ALWAYS_KEEP sections
+    required = [i for i in range(len(sections)) if i == 0 or sections[i][0] in ALWAYS_KEEP]
+    optional = sorted((i for i in range(len(sections)) if i not in required),
+                      key=lambda i: (-_relevance(sections[i][1], jd_index, jd_tokens), i))
+
+    kept, remaining = {}, budget
+    # Cheapest first with an equal share each, so one long section cannot crowd out the skills;
+    # the required sections that outgrow their share are cut last, into what is left
+    required.sort(key=lambda i: costs[i])
+    cut = []
+    for n, i in enumerate(required):
+        if costs[i] <= remaining // (len(required) - n):
+            kept[i] = sections[i][1]
+            remaining -= costs[i]
+        else:
+            cut.append(i)
+    # Whole optional sections may use up to half of what the cut sections would get
+    spare = remaining // 2 if cut else remaining
+    cut_optional = None
+    for i in optional:
+        if costs[i] <= spare:
+            kept[i] = sections[i][1]
+            spare -= costs[i]
+            remaining -= costs[i]
+        elif cut_optional is None:
+            cut_optional = i
+    if cut:
+        for n, i in enumerate(cut):
+            kept[i] = _truncate(sections[i][1], remaining // (len(cut) - n) - 2)
+            remaining -= count_tokens(kept[i]) + 2
+    elif cut_optional is not None and remaining > 50:
+        kept[cut_optional] = _truncate(sections[cut_optional][1], remaining - 2)
+    compacted = "\n\n".join(kept[i] for i in sorted(kept) if kept[i])
+    dropped = [sections[i][0] for i in range(len(sections)) if i not in kept]
+    return Compaction(compacted, tokens_before, count_tokens(compacted), dropped)
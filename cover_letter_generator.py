@@ -1,10 +1,13 @@
 # app.py
 import os
 import streamlit as st
-from langchain_xai import ChatXAI
-from langchain_community.document_loaders import PyPDFLoader
 from langchain_core.prompts import PromptTemplate
-import tempfile
+from pdf_extract import extract_resume_pages
+from compaction import compact_resume
+from stream_render import StreamRenderer
+from llm_gateway import get_chat_model, user_config
+from model_router import DEEP, ModelRouter, NotAResume
+from telemetry import span, start_metrics_server
 
 # =============================================================================
 #   Only imports + pure Python code here — NO st.anything()
@@ -30,13 +33,15 @@ else:
 # ────────────────────────────────────────────────
 
 @st.cache_resource(show_spinner=False)
-def get_llm():
-    return ChatXAI(
+def get_router():
+    # Streamed prose: the local resume checks, then Grok-4
+    llm = get_chat_model(
+        XAI_API_KEY,
         model="grok-4",
-        api_key=XAI_API_KEY,
         temperature=0.3,
         max_tokens=1500,
     )
+    return ModelRouter({DEEP: lambda: (llm, None)})
 
 # ────────────────────────────────────────────────
 #  Prompt
@@ -74,6 +79,13 @@ st.set_page_config(
     layout="wide"
 )
 
+@st.cache_resource
+def start_metrics():
+    # One Prometheus /metrics endpoint per server process
+    return start_metrics_server()
+
+start_metrics()
+
 # =============================================================================
 #   Now it's safe to use any st. command
 # =============================================================================
@@ -85,7 +97,7 @@ if _api_key_missing:
     st.error("XAI_API_KEY not found. Please set it in environment variables or `.streamlit/secrets.toml`.")
     st.stop()
 
-llm = get_llm()
+router = get_router()
 
 # ─── Layout ────────────────────────────────────────────────────────────────
 
@@ -123,38 +135,33 @@ if generate_clicked:
     else:
         with st.spinner("Extracting resume text…"):
             try:
-                with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
-                    tmp.write(uploaded_file.getvalue())
-                    tmp_path = tmp.name
-
-                loader = PyPDFLoader(tmp_path)
-                documents = loader.load()
-                resume_text = "\n\n".join(doc.page_content for doc in documents)
-
-                os.unlink(tmp_path)
-
+                with span("cover_letter", "extract"):
+                    pages = extract_resume_pages(uploaded_file)
+                with span("cover_letter", "prompt", prompt="COVER_LETTER_PROMPT"):
+                    compacted = compact_resume(pages, "cover_letter", job_desc)
             except Exception as e:
                 st.error(f"Could not read PDF: {e}")
                 st.stop()
 
+        st.caption(f"✂️ {compacted.summary}")
+        try:
+            llm = router.chat_model("cover_letter", compacted.text)
+        except NotAResume as e:
+            st.error(f"🚫 {e}")
+            st.stop()
         with st.spinner("Generating cover letter with Grok…"):
             try:
                 chain = COVER_LETTER_PROMPT | llm
 
-                response_container = st.empty()
-                full_response = ""
-
-                for chunk in chain.stream({
+                # Redraws every ~80 ms instead of once per token
+                renderer = StreamRenderer()
+                full_response = renderer.consume(chain.stream({
                     "job_description": job_desc,
-                    "resume_text": resume_text
-                }):
-                    content = chunk.content if hasattr(chunk, "content") else str(chunk)
-                    full_response += content
-                    response_container.markdown(full_response + "▌")
-
-                response_container.markdown(full_response)
+                    "resume_text": compacted.text
+                }, user_config("cover_letter")))
 
                 st.success("Cover letter generated!")
+                st.caption(f"⏱️ {renderer.summary}")
 
                 st.download_button(
                     label="Download Cover Letter",
@@ -0,0 +1,115 @@
+# disk_cache.py - Content-addressed cache: in-memory LRU in front of a SQLite store
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+# ───────────────────────────────────────────────
+# CONFIG
+# ───────────────────────────────────────────────
+# Point this at a volume shared by every replica so a resume parsed by one
+# worker is never parsed again by another.
+CACHE_DIR = os.getenv("RESUME_GENIE_CACHE_DIR") or os.path.join(
+    os.path.expanduser("~"), ".cache", "resume_genie"
+)
+
+
+def sha256_hex(data):
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    return hashlib.sha256(data).hexdigest()
+
+
+class DiskCache:
+    """Bytes-in, bytes-out cache shared by every process that opens the same file.
+
+    Values are zlib-compressed on disk. Entries expire after ``ttl`` seconds and
+    the least recently used ones are evicted once the store grows past ``max_bytes``.
+    """
+
+    def __init__(self, filename, max_bytes=256 * 1024 * 1024, ttl=7 * 24 * 3600, memory_items=128):
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        self.path = filename if os.path.isabs(filename) else os.path.join(CACHE_DIR, filename)
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.memory_items = memory_items
+        self._memory = OrderedDict()  # key -> (value, expires_at)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                value BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                expires_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at)")
+
+    # ─── memory tier ───
+    def _remember(self, key, value, expires_at):
+        self._memory[key] = (value, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            hit = self._memory.get(key)
+            if hit is not None:
+                if hit[1] > now:
+                    self._memory.move_to_end(key)
+                    return hit[0]
+                del self._memory[key]
+
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] <= now:
+                self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                return None
+            self._conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+            value = zlib.decompress(row[0])
+            self._remember(key, value, row[1])
+            return value
+
+    def set(self, key, value):
+        now = time.time()
+        expires_at = now + self.ttl
+        blob = zlib.compress(value, 6)
+        with self._lock:
+            self._remember(key, value, expires_at)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, expires_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, blob, len(blob), expires_at, now),
+            )
+            self._evict(now)
+
+    def delete(self, key):
+        with self._lock:
+            self._memory.pop(key, None)
+            self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def _evict(self, now):
+        self._conn.execute("DELETE FROM entries WHERE expires_at <= ?", (now,))
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Drop least recently used rows until we are back under budget
+        for key, size in self._conn.execute(
+            "SELECT key, size FROM entries ORDER BY accessed_at"
+        ).fetchall():
+            self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self._memory.pop(key, None)
+            total -= size
+            if total <= self.max_bytes:
+                break
@@ -0,0 +1,185 @@
+# fake_llm_server.py - Local OpenAI-compatible chat endpoint for load tests (no network, no tokens)
+import argparse
+import asyncio
+import json
+import random
+import re
+import time
+
+
+_WORDS = ["resume", "skills", "experience", "impact", "role", "python", "team", "growth"]
+_SCORE_KEYS = ("score", "match_percent", "readability", "ats")
+_TERM_RE = re.compile(r"\b[A-Z][A-Za-z+#.]{2,}\b")
+
+
+def fake_answer(messages, answer_words=120, grounded=True):
+    """Deterministic reply to a list of ``{"role", "content"}`` messages.
+
+    Prompts asking for a JSON object (structured mode) get every key of the
+    requested schema filled in; everything else gets ``answer_words`` words.
+    A ``skills`` list names capitalised terms from the prompt, or made-up
+    ones when not ``grounded`` (a model the cascade should not trust).
+    """
+    rng = random.Random(json.dumps(messages, sort_keys=True))
+    last = str((messages or [{}])[-1].get("content", ""))
+    if "JSON object" in last:
+        keys = re.findall(r'"(\w+)":', last) or re.findall(r"(\w+)(?:,|\.$)", last.splitlines()[-1])
+        answer = {}
+        for key in dict.fromkeys(keys):
+            if key in _SCORE_KEYS:
+                answer[key] = rng.randint(40, 95)
+            elif key == "skills":
+                # Prompts end with the resume after a "Resume:" label
+                terms = sorted(set(_TERM_RE.findall(last.rsplit("Resume:", 1)[-1]))) if grounded else []
+                answer[key] = rng.sample(terms, min(5, len(terms))) or [f"Skill{rng.randint(1, 999)}" for _ in range(3)]
+            elif key == "summary":
+                answer[key] = " ".join(rng.choice(_WORDS) for _ in range(20))
+            else:
+                answer[key] = [" ".join(rng.choice(_WORDS) for _ in range(6)) for _ in range(3)]
+        return json.dumps(answer)
+    return " ".join(rng.choice(_WORDS) for _ in range(answer_words))
+
+
+class FakeLLMServer:
+    """Minimal ``POST /v1/chat/completions`` server speaking the xAI/OpenAI wire format.
+
+    ``latency`` is the time to first token, ``tokens_per_second`` paces the
+    answer, and ``rate_limit_every`` returns a 429 for every Nth request so the
+    gateway's retry path gets exercised.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.5, tokens_per_second=200.0,
+                 answer_words=120, rate_limit_every=0):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.answer_words = answer_words
+        self.rate_limit_every = rate_limit_every
+        self.requests = 0
+        self.active = 0
+        self.peak_active = 0
+        self._server = None
+        self._connections = set()
+
+    @property
+    def base_url(self):
+        return f"http://{self.host}:{self.port}/v1"
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        self._server.close()
+        for task in list(self._connections):
+            task.cancel()
+        await self._server.wait_closed()
+
+    def _answer(self, body):
+        # Deterministic per prompt, so coalesced and cached answers can be compared
+        return fake_answer(body.get("messages", []), self.answer_words)
+
+    async def _handle(self, reader, writer):
+        task = asyncio.current_task()
+        self._connections.add(task)
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                raw = await reader.readexactly(int(headers.get("content-length", "0")))
+                if not await self._respond(request_line.decode("latin-1"), raw, writer):
+                    break
+        except (asyncio.IncompleteReadError, ConnectionResetError, asyncio.CancelledError):
+            pass
+        finally:
+            self._connections.discard(task)
+            writer.close()
+
+    async def _respond(self, request_line, raw, writer):
+        if "/chat/completions" not in request_line:
+            self._write(writer, 404, {"error": {"message": "not found"}})
+            return True
+
+        self.requests += 1
+        if self.rate_limit_every and self.requests % self.rate_limit_every == 0:
+            self._write(writer, 429, {"error": {"message": "rate limited"}}, {"retry-after": "0.2"})
+            return True
+
+        body = json.loads(raw or b"{}")
+        self.active += 1
+        self.peak_active = max(self.peak_active, self.active)
+        try:
+            await asyncio.sleep(self.latency)
+            answer = self._answer(body)
+            if not body.get("stream"):
+                await asyncio.sleep(len(answer.split()) / self.tokens_per_second)
+                self._write(writer, 200, {
+                    "id": f"fake-{self.requests}",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": body.get("model", "fake"),
+                    "choices": [{"index": 0, "finish_reason": "stop",
+                                 "message": {"role": "assistant", "content": answer}}],
+                    "usage": {"prompt_tokens": len(raw) // 4, "completion_tokens": len(answer.split()),
+                              "total_tokens": len(raw) // 4 + len(answer.split())},
+                })
+                return True
+
+            writer.write(
+                b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n"
+                b"Cache-Control: no-cache\r\nConnection: close\r\n\r\n"
+            )
+            for word in answer.split():
+                chunk = {
+                    "id": f"fake-{self.requests}", "object": "chat.completion.chunk",
+                    "created": int(time.time()), "model": body.get("model", "fake"),
+                    "choices": [{"index": 0, "delta": {"content": word + " "}, "finish_reason": None}],
+                }
+                writer.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                await writer.drain()
+                await asyncio.sleep(1 / self.tokens_per_second)
+            writer.write(b"data: [DONE]\n\n")
+            await writer.drain()
+            return False
+        finally:
+            self.active -= 1
+
+    def _write(self, writer, status, payload, extra_headers=None):
+        data = json.dumps(payload).encode()
+        reason = {200: "OK", 404: "Not Found", 429: "Too Many Requests"}[status]
+        head = [f"HTTP/1.1 {status} {reason}", "Content-Type: application/json",
+                f"Content-Length: {len(data)}", "Connection: keep-alive"]
+        head += [f"{k}: {v}" for k, v in (extra_headers or {}).items()]
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode() + data)
+
+
+async def _serve(args):
+    server = await FakeLLMServer(
+        args.host, args.port, args.latency, args.tokens_per_second, args.words, args.rate_limit_every
+    ).start()
+    print(f"Fake LLM listening on {server.base_url}")
+    await asyncio.Event().wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve a fake xAI chat completions endpoint")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.5, help="seconds before the first token")
+    parser.add_argument("--tokens-per-second", type=float, default=200.0)
+    parser.add_argument("--words", type=int, default=120, help="answer length in words")
+    parser.add_argument("--rate-limit-every", type=int, default=0, help="return 429 for every Nth request")
+    try:
+        asyncio.run(_serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,398 @@
+# jd_library.py - Job-description library: bulk ingest, float16 memmap embeddings, top-K search for a resume
+import argparse
+import csv
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from dataclasses import dataclass
+
+import numpy as np
+
+from disk_cache import CACHE_DIR, sha256_hex
+from local_scorer import EMBED_MODEL, chunk_text, embed, extract_requirements, load_embedder
+
+# ───────────────────────────────────────────────
+# CONFIG
+# ───────────────────────────────────────────────
+JD_LIBRARY_DIR = os.getenv("RESUME_GENIE_JD_LIBRARY") or os.path.join(CACHE_DIR, "jd_library")
+TOP_K = 10
+# Only the requirement-bearing start of a posting is embedded (sentence models truncate around here anyway)
+DOC_WORDS = 256
+INGEST_BATCH = 512
+# Rows scanned per float16 -> float32 block in a full scan
+SCAN_BLOCK = 16384
+# Below this many postings a full scan is fast enough and ``ingest`` skips the IVF index
+IVF_MIN_ROWS = 20000
+# Coarse lists probed per query (of about 2 * sqrt(rows) lists); more is slower and closer to exact
+NPROBE = int(os.getenv("RESUME_GENIE_JD_NPROBE", "32"))
+# ``ingest`` rebuilds the IVF index once this share of the rows was added after it was built
+IVF_REBUILD_SHARE = 0.1
+
+_TEXT_FIELDS = ("text", "description", "job_description")
+
+
+@dataclass
+class Posting:
+    id: str
+    title: str
+    company: str
+    url: str
+    text: str
+
+
+@dataclass
+class JDHit:
+    row: int
+    id: str
+    title: str
+    company: str
+    url: str
+    similarity: float
+
+
+def jd_document(text):
+    """The part of a posting that is embedded: its requirement statements, or its text, cut to DOC_WORDS."""
+    return " ".join(" ".join(extract_requirements(text) or [text]).split()[:DOC_WORDS])
+
+
+def resume_vector(resume_text, embedder=None):
+    """One unit vector for a resume: the mean of its chunk embeddings."""
+    chunks = chunk_text(resume_text) or [resume_text]
+    vector = embed(chunks, embedder).mean(axis=0)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def read_postings(path):
+    """Postings from a .jsonl/.json or .csv file with ``text`` (or ``description``) and optional
+    ``id``, ``title``, ``company``, ``url``; a posting without an id is keyed by its text."""
+    if path.lower().endswith(".csv"):
+        with open(path, encoding="utf-8", newline="") as f:
+            records = list(csv.DictReader(f))
+    elif path.lower().endswith(".json"):
+        with open(path, encoding="utf-8") as f:
+            records = json.load(f)
+    else:
+        with open(path, encoding="utf-8") as f:
+            records = [json.loads(line) for line in f if line.strip()]
+    for record in records:
+        text = next((record[name] for name in _TEXT_FIELDS if record.get(name)), "")
+        if not text.strip():
+            continue
+        yield Posting(id=str(record.get("id") or sha256_hex(text)[:16]), title=record.get("title") or "",
+                      company=record.get("company") or "", url=record.get("url") or "", text=text)
+
+
+# ───────────────────────────────────────────────
+# IVF INDEX
+# ───────────────────────────────────────────────
+class IVFIndex:
+    """Coarse quantizer over the first ``indexed`` rows: spherical k-means centroids plus, per
+    centroid, the rows assigned to it (``rows[offsets[i]:offsets[i + 1]]``)."""
+
+    def __init__(self, centroids, offsets, rows, indexed):
+        self.centroids = centroids
+        self.offsets = offsets
+        self.rows = rows
+        self.indexed = indexed
+
+    @classmethod
+    def build(cls, vectors, nlist=None, iterations=10, sample=None, seed=0):
+        count = len(vectors)
+        nlist = max(1, min(count, nlist or int(2 * np.sqrt(count))))
+        rng = np.random.default_rng(seed)
+        sample = min(count, sample or nlist * 64)
+        train = np.asarray(vectors[np.sort(rng.choice(count, sample, replace=False))], dtype=np.float32)
+        centroids = train[rng.choice(sample, nlist, replace=False)].copy()
+        for _ in range(iterations):
+            assign = (train @ centroids.T).argmax(axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, train)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            # A centroid that lost all its points keeps its previous position
+            centroids = np.where(norms > 0, sums / np.where(norms == 0, 1.0, norms), centroids)
+        assign = np.concatenate([
+            (np.asarray(vectors[start:start + SCAN_BLOCK], dtype=np.float32) @ centroids.T).argmax(axis=1)
+            for start in range(0, count, SCAN_BLOCK)
+        ])
+        rows = np.argsort(assign, kind="stable").astype(np.int64)
+        offsets = np.searchsorted(assign[rows], np.arange(nlist + 1)).astype(np.int64)
+        return cls(centroids.astype(np.float32), offsets, rows, count)
+
+    def probe(self, query, nprobe=NPROBE):
+        """Rows in the ``nprobe`` lists whose centroids are closest to ``query``."""
+        sims = self.centroids @ query
+        nprobe = min(nprobe, len(sims))
+        lists = np.argpartition(-sims, nprobe - 1)[:nprobe]
+        return np.concatenate([self.rows[self.offsets[i]:self.offsets[i + 1]] for i in lists])
+
+    def save(self, path):
+        tmp = path + ".tmp.npz"
+        np.savez(tmp, centroids=self.centroids, offsets=self.offsets, rows=self.rows, indexed=self.indexed)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(data["centroids"], data["offsets"], data["rows"], int(data["indexed"]))
+
+
+# ───────────────────────────────────────────────
+# LIBRARY
+# ───────────────────────────────────────────────
+class JDLibrary:
+    """Postings in SQLite, their embeddings in an append-only float16 memmap (row i = posting i).
+
+    Appends grow the matrix file by doubling, so ingesting in batches never
+    rewrites earlier rows. ``search`` scans every row, or only the probed IVF
+    lists (plus the rows added since the index was built) once one exists.
+    """
+
+    def __init__(self, path=JD_LIBRARY_DIR, model=None):
+        self.path = path
+        self.model = model or EMBED_MODEL
+        os.makedirs(path, exist_ok=True)
+        self._vectors_path = os.path.join(path, "vectors.f16")
+        self._ivf_path = os.path.join(path, "ivf.npz")
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(path, "postings.sqlite3"), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS postings (
+                row INTEGER PRIMARY KEY, id TEXT NOT NULL UNIQUE, title TEXT, company TEXT, url TEXT,
+                text TEXT NOT NULL, added_at REAL NOT NULL)"""
+        )
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self._conn.commit()
+        meta = dict(self._conn.execute("SELECT key, value FROM meta").fetchall())
+        if meta.get("model", self.model) != self.model:
+            raise ValueError(f"{path} holds {meta['model']} embeddings; open it with that model "
+                             f"(RESUME_GENIE_EMBED_MODEL) or ingest into another directory")
+        self.dim = int(meta["dim"]) if "dim" in meta else None
+        self._matrix = None
+        self._ivf = None
+        self._ivf_mtime = None
+
+    def __len__(self):
+        with self._lock:
+            return self._count()
+
+    def _count(self):
+        # Rows are dense and append-only, so this is an index lookup rather than a scan
+        return (self._conn.execute("SELECT MAX(row) FROM postings").fetchone()[0] or -1) + 1
+
+    def _vectors(self, count):
+        """Read-only view of the first ``count`` rows (reopened when the file has grown)."""
+        capacity = os.path.getsize(self._vectors_path) // (2 * self.dim) if os.path.exists(self._vectors_path) else 0
+        if self._matrix is None or len(self._matrix) != capacity:
+            self._matrix = np.memmap(self._vectors_path, dtype=np.float16, mode="r", shape=(capacity, self.dim)) \
+                if capacity else np.zeros((0, self.dim or 1), dtype=np.float16)
+        return self._matrix[:count]
+
+    def _index(self):
+        try:
+            mtime = os.path.getmtime(self._ivf_path)
+        except OSError:
+            self._ivf = self._ivf_mtime = None
+            return None
+        if mtime != self._ivf_mtime:
+            self._ivf, self._ivf_mtime = IVFIndex.load(self._ivf_path), mtime
+        return self._ivf
+
+    # ─── writing ───
+    def add(self, postings, embedder=None, batch_size=INGEST_BATCH, progress=None):
+        """Append new postings (ids already in the library are skipped). Returns (added, skipped)."""
+        embedder = embedder or load_embedder(self.model)
+        added = skipped = 0
+        batch = []
+        for posting in postings:
+            batch.append(posting)
+            if len(batch) >= batch_size:
+                a, s = self._add_batch(batch, embedder)
+                added, skipped, batch = added + a, skipped + s, []
+                if progress:
+                    progress(added, skipped)
+        if batch:
+            a, s = self._add_batch(batch, embedder)
+            added, skipped = added + a, skipped + s
+            if progress:
+                progress(added, skipped)
+        return added, skipped
+
+    def _add_batch(self, batch, embedder):
+        unique = {}
+        for posting in batch:
+            unique.setdefault(posting.id, posting)
+        with self._lock:
+            ids = list(unique)
+            known = {row[0] for row in self._conn.execute(
+                f"SELECT id FROM postings WHERE id IN ({','.join('?' * len(ids))})", ids)}
+            new = [p for p in unique.values() if p.id not in known]
+            if not new:
+                return 0, len(batch)
+            vectors = embed([jd_document(p.text) for p in new], embedder).astype(np.float16)
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+                self._conn.executemany("INSERT OR REPLACE INTO meta VALUES (?, ?)",
+                                       [("model", self.model), ("dim", str(self.dim))])
+            start = self._count()
+            self._write_vectors(start, vectors)
+            now = time.time()
+            # Rows become visible only once their vectors are on disk
+            self._conn.executemany(
+                "INSERT INTO postings (row, id, title, company, url, text, added_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(start + i, p.id, p.title, p.company, p.url, p.text, now) for i, p in enumerate(new)],
+            )
+            self._conn.commit()
+        return len(new), len(batch) - len(new)
+
+    def _write_vectors(self, start, vectors):
+        row_bytes = 2 * self.dim
+        size = os.path.getsize(self._vectors_path) if os.path.exists(self._vectors_path) else 0
+        needed = (start + len(vectors)) * row_bytes
+        if needed > size:
+            with open(self._vectors_path, "ab") as f:
+                f.truncate(max(needed, 2 * size, 1024 * row_bytes))
+        matrix = np.memmap(self._vectors_path, dtype=np.float16, mode="r+", offset=start * row_bytes,
+                           shape=vectors.shape)
+        matrix[:] = vectors
+        matrix.flush()
+        del matrix
+
+    def build_index(self, nlist=None, iterations=10, seed=0):
+        """(Re)build the IVF index over every current row; returns it, or None for an empty library."""
+        with self._lock:
+            count = self._count()
+            if not count:
+                return None
+            index = IVFIndex.build(self._vectors(count), nlist=nlist, iterations=iterations, seed=seed)
+            index.save(self._ivf_path)
+            self._ivf_mtime = None
+        return index
+
+    def index_stale(self):
+        """Whether enough rows were added since the IVF index was built (or none exists) to rebuild it."""
+        count = len(self)
+        if count < IVF_MIN_ROWS:
+            return False
+        with self._lock:
+            index = self._index()
+        return index is None or count - index.indexed > IVF_REBUILD_SHARE * index.indexed
+
+    # ─── reading ───
+    def search(self, resume, k=TOP_K, nprobe=NPROBE, exact=False, embedder=None):
+        """Top-``k`` postings for ``resume`` (text or a ``resume_vector``) by cosine similarity."""
+        query = resume_vector(resume, embedder or load_embedder(self.model)) if isinstance(resume, str) else resume
+        with self._lock:
+            count = self._count()
+            if not count or k <= 0:
+                return []
+            if self.dim is None:  # first rows were ingested by another process
+                self.dim = int(self._conn.execute("SELECT value FROM meta WHERE key = 'dim'").fetchone()[0])
+            vectors = self._vectors(count)
+            query = np.asarray(query, dtype=np.float32)
+            index = None if exact else self._index()
+            if index is not None and index.indexed <= count:
+                rows = index.probe(query, nprobe)
+                if index.indexed < count:
+                    rows = np.concatenate([rows, np.arange(index.indexed, count)])
+                rows.sort()  # sequential reads from the memmap
+                sims = np.asarray(vectors[rows], dtype=np.float32) @ query
+            else:
+                rows = None
+                sims = np.empty(count, dtype=np.float32)
+                for start in range(0, count, SCAN_BLOCK):
+                    block = np.asarray(vectors[start:start + SCAN_BLOCK], dtype=np.float32)
+                    np.dot(block, query, out=sims[start:start + len(block)])
+            k = min(k, len(sims))
+            top = np.argpartition(-sims, k - 1)[:k]
+            top = top[np.argsort(-sims[top])]
+            hits = [(int(rows[i]) if rows is not None else int(i), float(sims[i])) for i in top]
+            meta = self._rows([row for row, _ in hits], "row, id, title, company, url")
+        return [JDHit(*meta[row], similarity=similarity) for row, similarity in hits]
+
+    def _rows(self, rows, columns):
+        found = self._conn.execute(
+            f"SELECT {columns} FROM postings WHERE row IN ({','.join('?' * len(rows))})", rows).fetchall()
+        return {r[0]: r for r in found}
+
+    def posting(self, row):
+        with self._lock:
+            r = self._rows([row], "row, id, title, company, url, text").get(row)
+        return None if r is None else Posting(*r[1:])
+
+
+def analysis_prompt(posting, resume_pages, structured=False):
+    """``build_scorer_prompt`` for one library posting, exactly as the matcher builds it for a pasted JD."""
+    from compaction import compact_resume
+    from jd_sections import score_sections
+    from prompts import build_scorer_prompt
+
+    keywords = score_sections("\n\n".join(resume_pages), posting.text).keywords
+    compacted = compact_resume(resume_pages, "scorer", posting.text)
+    return build_scorer_prompt(posting.text, compacted.text, keywords, structured=structured)
+
+
+# ───────────────────────────────────────────────
+# CLI
+# ───────────────────────────────────────────────
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build and query the job-description library.")
+    parser.add_argument("--library", default=JD_LIBRARY_DIR, help="library directory")
+    commands = parser.add_subparsers(dest="command", required=True)
+    ingest = commands.add_parser("ingest", help="append postings from .jsonl/.json/.csv files")
+    ingest.add_argument("files", nargs="+")
+    ingest.add_argument("--batch-size", type=int, default=INGEST_BATCH)
+    ingest.add_argument("--no-index", action="store_true", help="skip the IVF (re)build")
+    index = commands.add_parser("index", help="(re)build the IVF index")
+    index.add_argument("--nlist", type=int, help="coarse lists (default: 2 * sqrt(rows))")
+    search = commands.add_parser("search", help="top postings for a resume PDF")
+    search.add_argument("resume")
+    search.add_argument("--top-k", type=int, default=TOP_K)
+    search.add_argument("--nprobe", type=int, default=NPROBE)
+    search.add_argument("--exact", action="store_true", help="scan every row instead of the IVF lists")
+    search.add_argument("--analyze", type=int, default=0, metavar="N",
+                        help="send the top N postings through the Grok-4 scorer prompt")
+    args = parser.parse_args(argv)
+
+    library = JDLibrary(args.library)
+    if args.command == "ingest":
+        def report(added, skipped):
+            print(f"\rAdded {added}, skipped {skipped} already in the library", end="", file=sys.stderr, flush=True)
+
+        for path in args.files:
+            library.add(read_postings(path), batch_size=args.batch_size, progress=report)
+            print(file=sys.stderr)
+        if not args.no_index and library.index_stale():
+            print(f"Building the IVF index over {len(library)} postings...", file=sys.stderr)
+            library.build_index()
+        print(f"{len(library)} postings in {library.path}")
+    elif args.command == "index":
+        index = library.build_index(nlist=args.nlist)
+        print(f"IVF index: {len(index.centroids) if index else 0} lists over {len(library)} postings")
+    else:
+        from pdf_extract import extract_pdf_pages
+
+        with open(args.resume, "rb") as f:
+            pages = extract_pdf_pages(f.read())
+        started = time.perf_counter()
+        hits = library.search("\n\n".join(pages), k=args.top_k, nprobe=args.nprobe, exact=args.exact)
+        print(f"{len(hits)} of {len(library)} postings in {(time.perf_counter() - started) * 1000:.1f} ms")
+        for rank, hit in enumerate(hits, 1):
+            print(f"{rank:>3}. {hit.similarity:.3f}  {hit.title or hit.id}" + (f" — {hit.company}" if hit.company else ""))
+        if args.analyze:
+            from llm_gateway import default_models
+
+            llm, _ = default_models()
+            for hit in hits[:args.analyze]:
+                print(f"\n## {hit.title or hit.id}\n")
+                print(llm.invoke(analysis_prompt(library.posting(hit.row), pages),
+                                 {"metadata": {"tool": "jd_library"}}).content)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
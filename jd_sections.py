@@ -0,0 +1,209 @@
+# jd_sections.py - JD split into hashed sections; per-section match results cached for edit-and-rescore loops
+import os
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from disk_cache import sha256_hex
+from keyword_matcher import KeywordIndex, KeywordMatch, extract_jd_keywords
+from local_scorer import (EMBED_MODEL, LocalMatch, chunk_text, embed, extract_requirements, load_embedder,
+                          score_match, summarize_coverage)
+
+# ───────────────────────────────────────────────
+# CONFIG
+# ───────────────────────────────────────────────
+# A JD edit that moves the local score (or match %) by fewer points than this keeps the previous
+# Grok-4 analysis instead of paying for a new one
+RESCORE_THRESHOLD = int(os.getenv("RESUME_GENIE_RESCORE_THRESHOLD", "5"))
+SECTION_CACHE_SIZE = 1024
+RESUME_CACHE_SIZE = 32
+
+RESPONSIBILITIES, REQUIREMENTS, NICE_TO_HAVE, OTHER = "responsibilities", "requirements", "nice_to_have", "other"
+
+_HEADING_PATTERNS = (
+    (NICE_TO_HAVE, re.compile(r"nice[ -]to[ -]haves?|preferred|bonus|good[ -]to[ -]have|pluses|extra credit")),
+    (REQUIREMENTS, re.compile(r"requirements?|qualifications?|must[ -]haves?|skills|what you(?:'|’)?ll (?:need|bring)"
+                              r"|what we(?:'|’)?re looking for|about you|who you are")),
+    (RESPONSIBILITIES, re.compile(r"responsibilities|what you(?:'|’)?ll do|duties|the role|your role|day[ -]to[ -]day"
+                                  r"|what you will do|key tasks")),
+)
+_HEADING_MAX_WORDS = 6
+_MARKUP_RE = re.compile(r"^[#*_\s]+|[#*_:\s]+$")
+
+
+# ───────────────────────────────────────────────
+# SECTIONS
+# ───────────────────────────────────────────────
+@dataclass
+class JDSection:
+    kind: str
+    text: str
+
+    @property
+    def key(self):
+        # Whitespace-only edits (re-wrapping, blank lines) keep the section's cached results
+        return sha256_hex(self.kind + "\n" + "\n".join(" ".join(line.split()) for line in self.text.splitlines()
+                                                       if line.strip()))
+
+
+def _heading_kind(line):
+    title = _MARKUP_RE.sub("", line).lower()
+    if not title or len(title.split()) > _HEADING_MAX_WORDS:
+        return None
+    for kind, pattern in _HEADING_PATTERNS:
+        if pattern.search(title):
+            return kind
+    return None
+
+
+def split_sections(job_description):
+    """Split a JD at its headings into responsibilities / requirements / nice-to-have (and other) sections.
+
+    Each section keeps its heading line, so the sections' requirements are
+    exactly ``extract_requirements`` of the whole JD.
+    """
+    sections, kind, lines = [], OTHER, []
+    for line in job_description.splitlines():
+        heading = _heading_kind(line) if line.strip() else None
+        if heading is not None:
+            if any(l.strip() for l in lines):
+                sections.append(JDSection(kind, "\n".join(lines)))
+            kind, lines = heading, []
+        lines.append(line)
+    if any(l.strip() for l in lines):
+        sections.append(JDSection(kind, "\n".join(lines)))
+    return sections
+
+
+# ───────────────────────────────────────────────
+# INCREMENTAL SCORING
+# ───────────────────────────────────────────────
+@dataclass
+class SectionMatch:
+    requirements: list
+    best: list
+    evidence: list
+    keywords: list
+    found: frozenset
+
+
+@dataclass
+class IncrementalMatch:
+    local: LocalMatch
+    keywords: KeywordMatch
+    sections: list = field(default_factory=list)
+    recomputed: int = 0
+
+    @property
+    def summary(self):
+        return f"{len(self.sections)} JD sections, {self.recomputed} re-scored"
+
+
+class _LRU:
+    def __init__(self, size):
+        self.size = size
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._items.get(key)
+            if value is not None:
+                self._items.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.size:
+                self._items.popitem(last=False)
+
+
+_sections = _LRU(SECTION_CACHE_SIZE)
+_resumes = _LRU(RESUME_CACHE_SIZE)
+
+
+def _resume_vectors(resume_key, resume_text, embedder):
+    cached = _resumes.get(resume_key)
+    if cached is None:
+        chunks = chunk_text(resume_text)
+        cached = (chunks, embed(chunks, embedder) if chunks else None)
+        _resumes.put(resume_key, cached)
+    return cached
+
+
+def score_sections(resume_text, job_description, embedder=None, model=None, cover_threshold=0.5):
+    """``score_match`` + ``match_keywords`` computed per JD section, reusing every unchanged section.
+
+    Results are cached by (resume, section content), so re-scoring after a
+    JD edit only embeds and matches the sections that changed.
+    """
+    embedder = embedder or load_embedder(model)
+    resume_key = sha256_hex(f"{model or EMBED_MODEL}\n{resume_text}")
+    sections = split_sections(job_description)
+    chunks, resume_vecs = _resume_vectors(resume_key, resume_text, embedder)
+
+    matches, stale = {}, []
+    for section in sections:
+        key = (resume_key, section.key)
+        matches[key] = _sections.get(key)
+        if matches[key] is None and key not in stale:
+            stale.append(key)
+    if stale:
+        texts = {(resume_key, section.key): section.text for section in sections}
+        requirements = {key: extract_requirements(texts[key]) for key in stale}
+        flat = [req for key in stale for req in requirements[key]]
+        # One batched encode for every changed section
+        vectors = embed(flat, embedder) if flat and chunks else None
+        offset = 0
+        for key in stale:
+            reqs = requirements[key]
+            if vectors is not None and reqs:
+                sims = vectors[offset:offset + len(reqs)] @ resume_vecs.T
+                best_idx = sims.argmax(axis=1)
+                best = sims[np.arange(len(reqs)), best_idx].tolist()
+                evidence = [chunks[i] for i in best_idx]
+            else:
+                best, evidence = [], []
+            offset += len(reqs)
+            terms = extract_jd_keywords(texts[key])
+            matches[key] = SectionMatch(reqs, best, evidence, terms, frozenset(KeywordIndex(terms).find(resume_text)))
+            _sections.put(key, matches[key])
+
+    ordered = [matches[(resume_key, section.key)] for section in sections]
+    requirements = [req for m in ordered for req in m.requirements]
+    if not chunks:
+        local = LocalMatch(score=0, match_percent=0)
+    elif not requirements:
+        # No sentence-like requirements: score_match falls back to JD chunks
+        local = score_match(resume_text, job_description, embedder, cover_threshold)
+    else:
+        local = summarize_coverage(requirements, [s for m in ordered for s in m.best],
+                                   [e for m in ordered for e in m.evidence], embedder, cover_threshold)
+    terms = list(dict.fromkeys(term for m in ordered for term in m.keywords))
+    found = frozenset().union(*(m.found for m in ordered))
+    keywords = KeywordMatch(matched=[t for t in terms if t in found], missing=[t for t in terms if t not in found])
+    return IncrementalMatch(local, keywords, sections, recomputed=len(stale))
+
+
+def section_keys(job_description):
+    return [section.key for section in split_sections(job_description)]
+
+
+def is_edit_of(previous_keys, current_keys):
+    """Whether a JD is an edit of another (given their ``section_keys``): at least half of the sections are
+    unchanged. A different posting shares none, or only the odd boilerplate section."""
+    unchanged = len(set(previous_keys) & set(current_keys))
+    return unchanged > 0 and 2 * unchanged >= max(len(previous_keys), len(current_keys))
+
+
+def analysis_still_valid(previous, current, previous_keys, current_keys, threshold=RESCORE_THRESHOLD):
+    """Whether an LLM analysis made at local match ``previous`` for the JD with ``previous_keys`` still
+    stands at ``current`` (both ``LocalMatch``): same posting, and a local match that barely moved."""
+    return (is_edit_of(previous_keys, current_keys)
+            and abs(current.score - previous.score) < threshold
+            and abs(current.match_percent - previous.match_percent) < threshold)
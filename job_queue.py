@@ -0,0 +1,527 @@
+# job_queue.py - SQLite-backed job queue and worker pool for scorer, checker and cover-letter runs
+import argparse
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+
+from disk_cache import CACHE_DIR, sha256_hex
+
+# ───────────────────────────────────────────────
+# CONFIG
+# ───────────────────────────────────────────────
+# Every process that opens the same file shares the queue (put it next to the caches)
+JOBS_DB = os.getenv("RESUME_GENIE_JOBS_DB", "jobs.sqlite3")
+JOB_WORKERS = int(os.getenv("RESUME_GENIE_JOB_WORKERS", "4"))
+# A running job whose worker stops renewing its lease for this long is handed to another worker
+VISIBILITY_TIMEOUT = float(os.getenv("RESUME_GENIE_JOB_VISIBILITY", "90"))
+MAX_ATTEMPTS = int(os.getenv("RESUME_GENIE_JOB_ATTEMPTS", "3"))
+JOB_TTL = int(os.getenv("RESUME_GENIE_JOB_TTL", str(7 * 24 * 3600)))
+POLL_INTERVAL = 0.5
+PROGRESS_INTERVAL = 1.0
+RETRY_BACKOFF_CAP = 60.0
+
+PRIORITY_INTERACTIVE = 10
+PRIORITY_BATCH = 5
+PRIORITY_BACKGROUND = 0
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+
+
+class PermanentJobError(Exception):
+    """Raised by a handler when retrying cannot help (e.g. an unreadable PDF)."""
+
+
+class JobCancelled(Exception):
+    """Raised from ``JobContext.progress`` once the job was cancelled (or its lease lost): stop working on it."""
+
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    payload: dict
+    priority: int
+    status: str
+    attempts: int
+    max_attempts: int
+    user: str
+    result: object
+    error: str
+    progress: str
+    created_at: float
+    updated_at: float
+
+    @property
+    def finished(self):
+        return self.status in (DONE, FAILED, CANCELLED)
+
+    @classmethod
+    def from_row(cls, row):
+        values = dict(row)
+        values["payload"] = json.loads(values["payload"])
+        values["result"] = None if values["result"] is None else json.loads(values["result"])
+        return cls(**{name: values[name] for name in cls.__dataclass_fields__})
+
+
+def job_key(kind, payload):
+    """Jobs are keyed by their content, so submitting the same work twice returns the same job."""
+    return sha256_hex(json.dumps([kind, payload], sort_keys=True, ensure_ascii=False))
+
+
+# ───────────────────────────────────────────────
+# QUEUE
+# ───────────────────────────────────────────────
+class JobQueue:
+    """Priority queue with retries and visibility timeouts in one SQLite file.
+
+    ``claim`` leases the highest-priority runnable job to a worker; the lease
+    is renewed while the job runs (``extend``/``set_progress``) and an expired
+    lease makes the job claimable again, so a crashed worker only delays it.
+    Finished jobs are kept for ``ttl`` seconds and double as a result cache.
+    """
+
+    def __init__(self, path=JOBS_DB, visibility_timeout=VISIBILITY_TIMEOUT, max_attempts=MAX_ATTEMPTS, ttl=JOB_TTL):
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        self.path = path if os.path.isabs(path) else os.path.join(CACHE_DIR, path)
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                priority INTEGER NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                max_attempts INTEGER NOT NULL,
+                user TEXT NOT NULL DEFAULT '',
+                worker TEXT,
+                run_at REAL NOT NULL,
+                lease_until REAL,
+                result TEXT,
+                error TEXT NOT NULL DEFAULT '',
+                progress TEXT NOT NULL DEFAULT '',
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_runnable ON jobs (status, priority DESC, created_at)")
+
+    def submit(self, kind, payload, priority=PRIORITY_INTERACTIVE, user=""):
+        """Queue ``kind`` with ``payload`` (JSON-able) unless the same job exists; failed or cancelled jobs start over."""
+        job_id = job_key(kind, payload)
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute("SELECT status, priority FROM jobs WHERE id = ?", (job_id,)).fetchone()
+                if row is None:
+                    self._conn.execute(
+                        """INSERT INTO jobs (id, kind, payload, priority, status, max_attempts, user, run_at,
+                                             created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                        (job_id, kind, json.dumps(payload, ensure_ascii=False), priority, QUEUED,
+                         self.max_attempts, user or "", now, now, now),
+                    )
+                elif row["status"] in (FAILED, CANCELLED):
+                    self._conn.execute(
+                        """UPDATE jobs SET status = ?, attempts = 0, error = '', progress = '', priority = ?,
+                                  user = ?, run_at = ?, created_at = ?, updated_at = ? WHERE id = ?""",
+                        (QUEUED, priority, user or "", now, now, now, job_id),
+                    )
+                elif row["status"] in (QUEUED, RUNNING) and priority > row["priority"]:
+                    # Someone is now waiting on a job that was queued in the background
+                    # (which also keeps it from being cancelled as background work)
+                    self._conn.execute("UPDATE jobs SET priority = ? WHERE id = ?", (priority, job_id))
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return self.get(job_id)
+
+    def get(self, job_id):
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return None if row is None else Job.from_row(row)
+
+    def get_many(self, job_ids):
+        """Jobs in the order of ``job_ids``; unknown (or purged) ids are skipped."""
+        jobs = {job_id: self.get(job_id) for job_id in dict.fromkeys(job_ids)}
+        return [jobs[job_id] for job_id in job_ids if jobs[job_id] is not None]
+
+    def claim(self, worker):
+        """Lease the next runnable job to ``worker``, or return None."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                while True:
+                    row = self._conn.execute(
+                        """SELECT id, status, attempts, max_attempts FROM jobs
+                           WHERE (status = ? AND run_at <= ?) OR (status = ? AND lease_until < ?)
+                           ORDER BY priority DESC, created_at LIMIT 1""",
+                        (QUEUED, now, RUNNING, now),
+                    ).fetchone()
+                    if row is None:
+                        self._conn.execute("COMMIT")
+                        return None
+                    if row["status"] == RUNNING and row["attempts"] >= row["max_attempts"]:
+                        # Its last worker vanished mid-run; give up instead of looping on it
+                        self._conn.execute(
+                            "UPDATE jobs SET status = ?, error = ?, updated_at = ? WHERE id = ?",
+                            (FAILED, "worker stopped responding", now, row["id"]),
+                        )
+                        continue
+                    self._conn.execute(
+                        """UPDATE jobs SET status = ?, worker = ?, attempts = attempts + 1, lease_until = ?,
+                                  updated_at = ? WHERE id = ?""",
+                        (RUNNING, worker, now + self.visibility_timeout, now, row["id"]),
+                    )
+                    self._conn.execute("COMMIT")
+                    break
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return self.get(row["id"])
+
+    def _update(self, sql, params):
+        with self._lock:
+            return self._conn.execute(sql, params).rowcount
+
+    def extend(self, job_id, worker):
+        """Renew ``worker``'s lease; False if the job was handed to someone else meanwhile."""
+        now = time.time()
+        return self._update(
+            "UPDATE jobs SET lease_until = ? WHERE id = ? AND worker = ? AND status = ?",
+            (now + self.visibility_timeout, job_id, worker, RUNNING),
+        ) > 0
+
+    def set_progress(self, job_id, worker, progress):
+        now = time.time()
+        return self._update(
+            "UPDATE jobs SET progress = ?, lease_until = ?, updated_at = ? WHERE id = ? AND worker = ? AND status = ?",
+            (progress, now + self.visibility_timeout, now, job_id, worker, RUNNING),
+        ) > 0
+
+    def complete(self, job_id, worker, result):
+        return self._update(
+            "UPDATE jobs SET status = ?, result = ?, progress = '', error = '', updated_at = ? "
+            "WHERE id = ? AND worker = ? AND status = ?",
+            (DONE, json.dumps(result, ensure_ascii=False), time.time(), job_id, worker, RUNNING),
+        ) > 0
+
+    def fail(self, job_id, worker, error, retry=True):
+        """Record a failed attempt: back to the queue with backoff, or failed for good."""
+        now = time.time()
+        job = self.get(job_id)
+        if job is None:
+            return False
+        if retry and job.attempts < job.max_attempts:
+            delay = min(RETRY_BACKOFF_CAP, 2.0 ** job.attempts)
+            return self._update(
+                "UPDATE jobs SET status = ?, error = ?, run_at = ?, lease_until = NULL, updated_at = ? "
+                "WHERE id = ? AND worker = ? AND status = ?",
+                (QUEUED, error, now + delay, now, job_id, worker, RUNNING),
+            ) > 0
+        return self._update(
+            "UPDATE jobs SET status = ?, error = ?, updated_at = ? WHERE id = ? AND worker = ? AND status = ?",
+            (FAILED, error, now, job_id, worker, RUNNING),
+        ) > 0
+
+    def cancel(self, job_ids, max_priority=None):
+        """Cancel the unfinished jobs among ``job_ids`` (only those at or below ``max_priority``, if given).
+
+        Queued jobs are never claimed; a running one stops at its handler's
+        next ``ctx.progress`` call (handlers make one before each model call)
+        and its result, if any, is discarded.
+        """
+        if not job_ids:
+            return 0
+        sql = (f"UPDATE jobs SET status = ?, progress = '', updated_at = ? "
+               f"WHERE id IN ({','.join('?' * len(job_ids))}) AND status IN (?, ?)")
+        params = [CANCELLED, time.time(), *job_ids, QUEUED, RUNNING]
+        if max_priority is not None:
+            sql += " AND priority <= ?"
+            params.append(max_priority)
+        return self._update(sql, params)
+
+    def submitted(self, user, since, priority=None):
+        """How many jobs ``user`` submitted (or resubmitted) since ``since``, optionally at one priority."""
+        sql, params = "SELECT COUNT(*) FROM jobs WHERE user = ? AND created_at >= ?", [user or "", since]
+        if priority is not None:
+            sql += " AND priority = ?"
+            params.append(priority)
+        with self._lock:
+            return self._conn.execute(sql, params).fetchone()[0]
+
+    def purge(self):
+        """Drop finished jobs older than ``ttl``."""
+        return self._update("DELETE FROM jobs WHERE status IN (?, ?, ?) AND updated_at < ?",
+                            (DONE, FAILED, CANCELLED, time.time() - self.ttl))
+
+    def stats(self):
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
+
+
+# ───────────────────────────────────────────────
+# WORKERS
+# ───────────────────────────────────────────────
+HANDLERS = {}
+
+
+def handler(kind):
+    """Register ``fn(payload, ctx)`` as the runner for ``kind`` jobs; its return value is the result."""
+
+    def register(fn):
+        HANDLERS[kind] = fn
+        return fn
+
+    return register
+
+
+class JobContext:
+    """Passed to handlers: the job itself and throttled progress reporting (which also renews the lease)."""
+
+    def __init__(self, queue, job, worker):
+        self.queue = queue
+        self.job = job
+        self.worker = worker
+        self._last = 0.0
+
+    @property
+    def config(self):
+        return {"metadata": {"user": self.job.user or "jobs", "tool": self.job.kind}}
+
+    def progress(self, text, force=False):
+        """``text`` may be a callable, only called when a write is due (e.g. to join a growing letter)."""
+        now = time.monotonic()
+        if force or now - self._last >= PROGRESS_INTERVAL:
+            self._last = now
+            if not self.queue.set_progress(self.job.id, self.worker, text() if callable(text) else text):
+                raise JobCancelled(self.job.id)
+
+
+class WorkerPool:
+    """Threads that claim and run jobs; a heartbeat renews the leases of the jobs in progress."""
+
+    def __init__(self, queue, workers=JOB_WORKERS):
+        self.queue = queue
+        self.workers = workers
+        self._stop = threading.Event()
+        self._running = {}  # job id -> worker name
+        self._running_lock = threading.Lock()
+        self._threads = []
+
+    def start(self):
+        prefix = f"{socket.gethostname()}:{os.getpid()}"
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, args=(f"{prefix}:{i}",), name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        heartbeat = threading.Thread(target=self._heartbeat, name="job-heartbeat", daemon=True)
+        heartbeat.start()
+        self._threads.append(heartbeat)
+        return self
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def _heartbeat(self):
+        while not self._stop.wait(self.queue.visibility_timeout / 3):
+            with self._running_lock:
+                running = list(self._running.items())
+            for job_id, worker in running:
+                self.queue.extend(job_id, worker)
+
+    def _work(self, worker):
+        while not self._stop.is_set():
+            job = self.queue.claim(worker)
+            if job is None:
+                self._stop.wait(POLL_INTERVAL)
+                continue
+            self.run(job, worker)
+
+    def run(self, job, worker):
+        with self._running_lock:
+            self._running[job.id] = worker
+        try:
+            run = HANDLERS.get(job.kind)
+            if run is None:
+                raise PermanentJobError(f"no handler for job kind {job.kind!r}")
+            self.queue.complete(job.id, worker, run(job.payload, JobContext(self.queue, job, worker)))
+        except JobCancelled:
+            pass  # nothing to record: the job is no longer ours
+        except PermanentJobError as e:
+            self.queue.fail(job.id, worker, str(e), retry=False)
+        except Exception as e:
+            self.queue.fail(job.id, worker, f"{type(e).__name__}: {e}")
+        finally:
+            with self._running_lock:
+                self._running.pop(job.id, None)
+
+
+_queue = None
+_workers = None
+_singleton_lock = threading.Lock()
+
+
+def get_queue():
+    global _queue
+    with _singleton_lock:
+        if _queue is None:
+            _queue = JobQueue()
+            _queue.purge()
+        return _queue
+
+
+def start_workers(workers=JOB_WORKERS):
+    """Start this process's worker pool once (0 workers: submit only, e.g. when a separate worker runs)."""
+    global _workers
+    queue = get_queue()
+    with _singleton_lock:
+        if _workers is None and workers > 0:
+            _workers = WorkerPool(queue, workers).start()
+    return queue
+
+
+# ───────────────────────────────────────────────
+# HANDLERS
+# ───────────────────────────────────────────────
+def _pages(payload):
+    import base64
+
+    from pdf_extract import PDFExtractionError, extract_pdf_pages
+
+    try:
+        return extract_pdf_pages(base64.b64decode(payload["resume_pdf"]))
+    except PDFExtractionError as e:
+        raise PermanentJobError(str(e)) from None
+
+
+def _route(tool, prompt, result_cls, resume_text, ctx, deep=False):
+    """Routed answer from ``model_router``; a resume the local checks turn away fails the job for good."""
+    from model_router import NotAResume, default_router
+
+    try:
+        return default_router().invoke(tool, prompt, result_cls, resume_text, ctx.config, deep)
+    except NotAResume as e:
+        raise PermanentJobError(str(e)) from None
+
+
+def resume_payload(pdf_bytes, **fields):
+    """Payload for a job over one resume PDF (base64, so it round-trips through JSON)."""
+    import base64
+
+    from structured_output import STRUCTURED
+
+    # The output mode changes the result, so it is part of the job's key
+    return {"resume_pdf": base64.b64encode(pdf_bytes).decode("ascii"), "structured": STRUCTURED, **fields}
+
+
+@handler("score")
+def run_score(payload, ctx):
+    from dataclasses import asdict
+
+    from compaction import compact_resume
+    from jd_sections import score_sections
+    from prompts import build_scorer_prompt
+    from structured_output import STRUCTURED, ScorerResult
+
+    pages, job_description = _pages(payload), payload["job_description"]
+    match = score_sections("\n\n".join(pages), job_description)
+    local, keywords = match.local, match.keywords
+    result = {"local": asdict(local), "keywords": asdict(keywords)}
+    if payload.get("deep"):
+        compacted = compact_resume(pages, "scorer", job_description)
+        prompt = build_scorer_prompt(job_description, compacted.text, keywords, structured=STRUCTURED)
+        result["compaction"] = compacted.summary
+        # A prefetched job cancelled while it scored locally stops here, before paying for Grok-4
+        ctx.progress("", force=True)
+        # A deep analysis was asked for, so it goes straight to Grok-4 (no local checks, no fast tier)
+        routed = _route("scorer", prompt, ScorerResult if STRUCTURED else None, compacted.text, ctx, deep=True)
+        if STRUCTURED:
+            routed.result.keywords_matched, routed.result.keywords_missing = keywords.matched, keywords.missing
+            result["analysis"] = routed.result.as_dict()
+        else:
+            result["analysis"] = routed.result
+        result["route"] = routed.as_dict()
+    return result
+
+
+@handler("check")
+def run_check(payload, ctx):
+    from compaction import compact_resume
+    from prompts import RESUME_CHECKER_JSON_PROMPT, RESUME_CHECKER_PROMPT
+    from structured_output import STRUCTURED, CheckerResult
+
+    compacted = compact_resume(_pages(payload), "checker")
+    if STRUCTURED:
+        routed = _route("checker", RESUME_CHECKER_JSON_PROMPT.format(context=compacted.text), CheckerResult,
+                        compacted.text, ctx, payload.get("deep", False))
+        result = routed.result.as_dict()
+    else:
+        routed = _route("checker", RESUME_CHECKER_PROMPT.format(context=compacted.text), None, compacted.text, ctx,
+                        payload.get("deep", False))
+        result = routed.result
+    return {"name": payload.get("name", ""), "compaction": compacted.summary, "result": result,
+            "route": routed.as_dict()}
+
+
+@handler("cover_letter")
+def run_cover_letter(payload, ctx):
+    from compaction import compact_resume
+    from model_router import NotAResume, default_router
+    from prompts import COVER_LETTER_PROMPT
+
+    compacted = compact_resume(_pages(payload), "cover_letter", payload["job_description"])
+    ctx.progress("", force=True)  # a letter cancelled by now is never sent to Grok-4
+    try:
+        llm = default_router().chat_model("cover_letter", compacted.text)
+    except NotAResume as e:
+        raise PermanentJobError(str(e)) from None
+    parts = []
+    chunks = (COVER_LETTER_PROMPT | llm).stream(
+        {"job_description": payload["job_description"], "resume_text": compacted.text}, ctx.config)
+    for chunk in chunks:
+        if isinstance(chunk.content, str) and chunk.content:
+            parts.append(chunk.content)
+            ctx.progress(lambda: "".join(parts))  # pollers see the letter grow
+    return {"compaction": compacted.summary, "text": "".join(parts)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run job workers for the Resume Genie tools, or show queue stats.")
+    parser.add_argument("command", choices=["worker", "stats", "purge"])
+    parser.add_argument("--workers", type=int, default=JOB_WORKERS)
+    args = parser.parse_args(argv)
+
+    queue = get_queue()
+    if args.command == "stats":
+        print(json.dumps(queue.stats()))
+    elif args.command == "purge":
+        print(f"Removed {queue.purge()} finished jobs")
+    else:
+        start_workers(args.workers)
+        print(f"{args.workers} workers on {queue.path}; Ctrl+C to stop")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
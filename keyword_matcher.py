@@ -0,0 +1,199 @@
+# keyword_matcher.py - Deterministic JD keyword extraction and resume matching
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+# ───────────────────────────────────────────────
+# VOCABULARY
+# ───────────────────────────────────────────────
+# canonical term -> aliases that mean the same thing on a resume
+SYNONYMS = {
+    "kubernetes": ["k8s"],
+    "javascript": ["js", "ecmascript"],
+    "typescript": ["ts"],
+    "postgresql": ["postgres", "psql"],
+    "mongodb": ["mongo"],
+    "amazon web services": ["aws"],
+    "google cloud platform": ["gcp", "google cloud"],
+    "microsoft azure": ["azure"],
+    "machine learning": ["ml"],
+    "deep learning": ["dl"],
+    "artificial intelligence": ["ai"],
+    "natural language processing": ["nlp"],
+    "large language models": ["llm", "llms", "large language model"],
+    "continuous integration": ["ci", "ci/cd", "cicd"],
+    "node.js": ["node", "nodejs"],
+    "react": ["react.js", "reactjs"],
+    "vue": ["vue.js", "vuejs"],
+    "angular": ["angularjs", "angular.js"],
+    "c#": ["csharp", "c sharp"],
+    "c++": ["cpp"],
+    ".net": ["dotnet"],
+    "golang": ["go lang"],
+    "scikit-learn": ["sklearn", "scikit learn"],
+    "tensorflow": ["tf"],
+    "pytorch": ["torch"],
+    "rest api": ["rest apis", "restful", "restful api", "restful apis"],
+    "graphql": ["graph ql"],
+    "sql server": ["mssql", "ms sql"],
+    "power bi": ["powerbi"],
+    "user experience": ["ux"],
+    "user interface": ["ui"],
+    "quality assurance": ["qa"],
+    "search engine optimization": ["seo"],
+    "customer relationship management": ["crm"],
+    "elasticsearch": ["elastic search"],
+    "github actions": ["gh actions"],
+}
+
+# Skills and tools recognised in a JD even when they are not written in a "tech-looking" way
+SKILL_TERMS = """
+python, java, scala, kotlin, swift, rust, ruby, php, perl, matlab, sql, nosql, bash, powershell, html, css, sass,
+django, flask, fastapi, spring boot, rails, laravel, next.js, svelte, jquery, redux,
+agile, scrum, kanban, docker, kubernetes, helm, terraform, hcl, ansible, puppet, jenkins, gitlab, github, git, bitbucket, circleci,
+linux, unix, android, ios,
+lambda, ec2, s3, eks, ecs, rds, sqs, sns, cloudformation, serverless, microservices,
+mysql, postgresql, oracle, redis, cassandra, dynamodb, snowflake, bigquery, redshift, databricks,
+kafka, rabbitmq, spark, hadoop, airflow, elk, dbt, etl, data warehouse, data pipelines, data modeling,
+pandas, numpy, scipy, matplotlib, tableau, looker, jupyter,
+keras, xgboost, hugging face, transformers, langchain, mlops, computer vision,
+statistics, a/b testing, data analysis, data visualization, data science,
+grpc, websockets, oauth,
+jira, confluence, figma, sketch,
+unit testing, integration testing, test automation, selenium, cypress, pytest, junit,
+devops, sre, observability, prometheus, grafana, datadog, splunk,
+penetration testing, siem, iam, encryption, compliance, gdpr, hipaa, soc 2,
+salesforce, sap, hubspot, erp,
+product management, project management, stakeholder management,
+communication, leadership, mentoring, problem solving
+"""
+
+_TOKEN_RE = re.compile(r"[a-z0-9#+][a-z0-9#+./&-]*")
+# Tokens that look like tech on their own: CamelCase, versioned or dotted names. Bare acronyms
+# are not enough (NYC, PTO, EOE); the ones that are skills are in the vocabulary.
+_TECHY_RE = re.compile(r"^(?:[A-Z]?[a-z]+[A-Z][A-Za-z0-9]*|[A-Za-z]+[0-9.#+]+[A-Za-z0-9.#+]*)$")
+# Tech-shaped JD boilerplate: business models, quarters, visas, titles
+_NOT_TECH = frozenset("saas paas b2b b2c d2c q1 q2 q3 q4 h1b w2 ph.d m.s b.s e.g i.e".split())
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from in into is of on or our the to we with you your "
+    "i ii iii us eu usa uk it ok ceo cto hr bs ms ba ma cs phd mba eeo faq".split()
+)
+
+
+def normalize(text):
+    """Lowercase and tokenize, dropping trailing sentence punctuation from tokens."""
+    tokens = (t.rstrip(".-&/") for t in _TOKEN_RE.findall(text.lower()))
+    return tuple(t for t in tokens if t)
+
+
+def _build_aliases(synonyms):
+    aliases = {}
+    for canonical, names in synonyms.items():
+        aliases[normalize(canonical)] = canonical
+        for name in names:
+            aliases[normalize(name)] = canonical
+    return aliases
+
+
+_ALIASES = _build_aliases(SYNONYMS)
+_VOCAB = {}
+for _term in filter(None, (t.strip() for t in SKILL_TERMS.replace("\n", ",").split(","))):
+    _VOCAB[normalize(_term)] = _ALIASES.get(normalize(_term), _term)
+_VOCAB.update(_ALIASES)
+_VOCAB_MAX_LEN = max(len(p) for p in _VOCAB)
+
+
+# ───────────────────────────────────────────────
+# INDEX
+# ───────────────────────────────────────────────
+class KeywordIndex:
+    """Precompiled phrase -> canonical term table.
+
+    Matching walks the resume's n-grams once and does a dict lookup for each,
+    so the cost per resume depends on resume length, not on how many terms
+    the index holds.
+    """
+
+    def __init__(self, terms, synonyms=None):
+        aliases = _ALIASES if synonyms is None else _build_aliases(synonyms)
+        canonicals = {}
+        for term in terms:
+            phrase = normalize(term)
+            if phrase:
+                canonicals.setdefault(aliases.get(phrase, " ".join(phrase)), None)
+        self.terms = list(canonicals)
+        self._phrases = {normalize(t): t for t in self.terms}
+        for phrase, canonical in aliases.items():
+            if canonical in canonicals:
+                self._phrases[phrase] = canonical
+        self.max_len = max((len(p) for p in self._phrases), default=1)
+
+    def find(self, text):
+        tokens = normalize(text)
+        found = set()
+        phrases = self._phrases
+        for i in range(len(tokens)):
+            for n in range(1, min(self.max_len, len(tokens) - i) + 1):
+                canonical = phrases.get(tokens[i:i + n])
+                if canonical is not None:
+                    found.add(canonical)
+        return found
+
+
+def extract_jd_keywords(job_description):
+    """Pull skill/tool terms out of a JD, canonicalised and in order of first mention."""
+    tokens = normalize(job_description)
+    seen = {}
+    consumed = set()
+    i = 0
+    while i < len(tokens):
+        # Longest vocabulary phrase starting here wins ("spring boot" over "spring")
+        for n in range(min(_VOCAB_MAX_LEN, len(tokens) - i), 0, -1):
+            canonical = _VOCAB.get(tokens[i:i + n])
+            if canonical is not None:
+                seen.setdefault(canonical, None)
+                consumed.update(tokens[i:i + n])
+                i += n
+                break
+        else:
+            i += 1
+
+    # Tech-looking tokens the vocabulary doesn't know yet (e.g. "GraphX", "Vue3", "PySpark")
+    for raw in re.findall(r"[A-Za-z.][A-Za-z0-9.#+/]*", job_description):
+        raw = raw.rstrip("./")
+        if not _TECHY_RE.match(raw) or raw.lower() in _STOPWORDS or raw.lower() in _NOT_TECH:
+            continue
+        phrase = normalize(raw)
+        if phrase and not consumed.issuperset(phrase):
+            seen.setdefault(_ALIASES.get(phrase, " ".join(phrase)), None)
+    return list(seen)
+
+
+@lru_cache(maxsize=256)
+def compile_jd(job_description):
+    return KeywordIndex(extract_jd_keywords(job_description))
+
+
+@dataclass
+class KeywordMatch:
+    matched: list = field(default_factory=list)
+    missing: list = field(default_factory=list)
+
+    @property
+    def match_percent(self):
+        total = len(self.matched) + len(self.missing)
+        return round(100 * len(self.matched) / total) if total else 0
+
+
+def match_keywords(resume_text, job_description):
+    index = compile_jd(job_description)
+    found = index.find(resume_text)
+    return KeywordMatch(
+        matched=[t for t in index.terms if t in found],
+        missing=[t for t in index.terms if t not in found],
+    )
+
+
+def format_keywords(terms, bullet="•"):
+    """Bullet list for prompts (or markdown with ``bullet="-"``); an explicit 'None' keeps the prompt unambiguous."""
+    return "\n".join(f"{bullet} {t}" for t in terms) if terms else f"{bullet} None"
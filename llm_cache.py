@@ -0,0 +1,161 @@
+# llm_cache.py - Persistent response cache around the Grok chat model
+import json
+import os
+import re
+import threading
+
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage, convert_to_messages
+from langchain_core.prompt_values import PromptValue
+from langchain_core.runnables import Runnable
+
+from disk_cache import DiskCache, sha256_hex
+
+LLM_CACHE_ENABLED = os.getenv("RESUME_GENIE_LLM_CACHE", "1") != "0"
+# Cached answers are replayed in pieces of this many characters so the UI still streams
+REPLAY_CHUNK_CHARS = 64
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = DiskCache(
+                "llm_responses.sqlite3",
+                max_bytes=int(os.getenv("RESUME_GENIE_LLM_CACHE_MB", "128")) * 1024 * 1024,
+                ttl=int(os.getenv("RESUME_GENIE_LLM_CACHE_TTL", str(24 * 3600))),
+            )
+        return _cache
+
+
+def to_messages(model_input):
+    if isinstance(model_input, PromptValue):
+        return model_input.to_messages()
+    if isinstance(model_input, str):
+        return [HumanMessage(content=model_input)]
+    return convert_to_messages(model_input)
+
+
+def _normalize(content):
+    if not isinstance(content, str):
+        content = json.dumps(content, sort_keys=True, ensure_ascii=False)
+    return re.sub(r"\s+", " ", content).strip()
+
+
+class CachedChatModel(Runnable):
+    """Drop-in wrapper for a chat model that answers repeated prompts from a local cache.
+
+    The key covers the model name, temperature, max_tokens and a whitespace
+    normalised hash of the messages, so a resubmitted resume/JD pair costs
+    no tokens. Works anywhere the wrapped model does, including ``prompt | llm``.
+    """
+
+    def __init__(self, llm, cache=None):
+        self.llm = llm
+        self.cache = cache or get_cache()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        # model_name, temperature, ... come from the wrapped model
+        if name == "llm":
+            raise AttributeError(name)
+        return getattr(self.llm, name)
+
+    @property
+    def stats(self):
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / total if total else 0.0}
+
+    def cache_key(self, messages):
+        llm = self.llm
+        payload = json.dumps(
+            [
+                getattr(llm, "model_name", None) or getattr(llm, "model", None),
+                getattr(llm, "temperature", None),
+                getattr(llm, "max_tokens", None),
+                [(m.type, _normalize(m.content)) for m in messages],
+            ],
+            ensure_ascii=False,
+        )
+        return "chat:" + sha256_hex(payload)
+
+    def _lookup(self, key):
+        cached = self.cache.get(key)
+        with self._lock:
+            if cached is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return None if cached is None else cached.decode("utf-8")
+
+    def _save(self, key, content):
+        if content:
+            self.cache.set(key, content.encode("utf-8"))
+
+    def forget(self, input):
+        """Drop the cached reply to ``input`` (one that failed validation) so the next call asks the model."""
+        self.cache.delete(self.cache_key(to_messages(input)))
+
+    def invoke(self, input, config=None, **kwargs):
+        messages = to_messages(input)
+        key = self.cache_key(messages)
+        cached = self._lookup(key)
+        if cached is not None:
+            return AIMessage(content=cached, response_metadata={"cache_hit": True})
+        response = self.llm.invoke(messages, config, **kwargs)
+        if isinstance(response.content, str):
+            self._save(key, response.content)
+        return response
+
+    async def ainvoke(self, input, config=None, **kwargs):
+        messages = to_messages(input)
+        key = self.cache_key(messages)
+        cached = self._lookup(key)
+        if cached is not None:
+            return AIMessage(content=cached, response_metadata={"cache_hit": True})
+        response = await self.llm.ainvoke(messages, config, **kwargs)
+        if isinstance(response.content, str):
+            self._save(key, response.content)
+        return response
+
+    def stream(self, input, config=None, **kwargs):
+        messages = to_messages(input)
+        key = self.cache_key(messages)
+        cached = self._lookup(key)
+        if cached is not None:
+            for i in range(0, len(cached), REPLAY_CHUNK_CHARS):
+                yield AIMessageChunk(content=cached[i:i + REPLAY_CHUNK_CHARS])
+            return
+
+        parts = []
+        for chunk in self.llm.stream(messages, config, **kwargs):
+            if isinstance(chunk.content, str):
+                parts.append(chunk.content)
+            yield chunk
+        # Only reached when the stream ran to completion, so partial answers are never cached
+        self._save(key, "".join(parts))
+
+    async def astream(self, input, config=None, **kwargs):
+        messages = to_messages(input)
+        key = self.cache_key(messages)
+        cached = self._lookup(key)
+        if cached is not None:
+            for i in range(0, len(cached), REPLAY_CHUNK_CHARS):
+                yield AIMessageChunk(content=cached[i:i + REPLAY_CHUNK_CHARS])
+            return
+
+        parts = []
+        async for chunk in self.llm.astream(messages, config, **kwargs):
+            if isinstance(chunk.content, str):
+                parts.append(chunk.content)
+            yield chunk
+        self._save(key, "".join(parts))
+
+
+def cached(llm):
+    """Wrap ``llm`` with the shared response cache unless RESUME_GENIE_LLM_CACHE=0."""
+    return CachedChatModel(llm) if LLM_CACHE_ENABLED else llm
@@ -0,0 +1,487 @@
+# llm_gateway.py - Shared asyncio gateway every tool uses to reach Grok
+import asyncio
+import contextlib
+import json
+import os
+import queue
+import random
+import threading
+import time
+import weakref
+from collections import defaultdict
+
+from langchain_core.runnables import Runnable
+
+from compaction import count_tokens
+from disk_cache import sha256_hex
+from llm_cache import cached, to_messages
+from telemetry import record_llm, span
+
+# ───────────────────────────────────────────────
+# CONFIG
+# ───────────────────────────────────────────────
+XAI_BASE_URL = os.getenv("RESUME_GENIE_XAI_BASE_URL", "https://api.x.ai/v1")
+MAX_CONCURRENCY = int(os.getenv("RESUME_GENIE_LLM_CONCURRENCY", "16"))
+USER_CONCURRENCY = int(os.getenv("RESUME_GENIE_LLM_USER_CONCURRENCY", "8"))
+REQUESTS_PER_MINUTE = float(os.getenv("RESUME_GENIE_LLM_RPM", "60"))
+TOKENS_PER_MINUTE = float(os.getenv("RESUME_GENIE_LLM_TPM", "200000"))
+MAX_RETRIES = int(os.getenv("RESUME_GENIE_LLM_RETRIES", "4"))
+BACKOFF_BASE = 1.0
+BACKOFF_CAP = 30.0
+REQUEST_TIMEOUT = 120.0
+
+_DONE = object()
+
+
+class TokenBucket:
+    """Async token bucket; ``pause`` holds every caller back until a provider-given reset."""
+
+    def __init__(self, per_minute, burst=1 / 6):
+        self.burst = burst  # share of a minute's allowance that may be spent at once
+        self.tokens = float("inf")
+        self.set_limit(per_minute)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def set_limit(self, per_minute):
+        self.rate = per_minute / 60.0
+        self.capacity = max(1.0, per_minute * self.burst)
+        self.tokens = min(self.tokens, self.capacity)
+
+    def pause(self, seconds):
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+    async def acquire(self, amount=1.0):
+        amount = min(amount, self.capacity)
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            wait = self.blocked_until - now
+            if wait <= 0 and self.tokens >= amount:
+                self.tokens -= amount
+                return
+            await asyncio.sleep(max(wait, (amount - self.tokens) / self.rate, 0.01))
+
+
+def _is_retryable(error):
+    status = getattr(error, "status_code", None)
+    if status is not None:
+        return status in (408, 409, 429) or status >= 500
+    # Connection resets and timeouts from openai/httpx carry no status code
+    return type(error).__name__ in ("APIConnectionError", "APITimeoutError", "ConnectError",
+                                    "ReadTimeout", "RemoteProtocolError", "ReadError")
+
+
+def _retry_after(error):
+    response = getattr(error, "response", None)
+    value = response.headers.get("retry-after") if response is not None else None
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+class LLMGateway:
+    """One per process: pooled HTTP client, global and per-user concurrency caps,
+    request/token rate limiting, jittered retries and coalescing of identical
+    in-flight completions.
+
+    The gateway owns a private event loop on a daemon thread, so Streamlit's
+    synchronous script threads and async callers can both use it.
+    """
+
+    def __init__(self, api_key, base_url=XAI_BASE_URL, max_concurrency=MAX_CONCURRENCY,
+                 user_concurrency=USER_CONCURRENCY, requests_per_minute=REQUESTS_PER_MINUTE,
+                 tokens_per_minute=TOKENS_PER_MINUTE, max_retries=MAX_RETRIES):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.max_concurrency = max_concurrency
+        self.user_concurrency = user_concurrency
+        self.max_retries = max_retries
+        self.request_bucket = TokenBucket(requests_per_minute)
+        self.token_bucket = TokenBucket(tokens_per_minute, burst=1.0)
+        self.stats = defaultdict(int)
+        self._models = {}
+        self._inflight = {}
+        # Held only while a call of that user waits or runs, so idle sessions don't pile up
+        self._user_limits = weakref.WeakValueDictionary()
+        self._global_limit = None
+        self._http = None
+        self._loop = asyncio.new_event_loop()
+        threading.Thread(target=self._loop.run_forever, name="llm-gateway", daemon=True).start()
+
+    # ─── plumbing ───
+    def _model(self, model, temperature, max_tokens):
+        key = (model, temperature, max_tokens)
+        if key not in self._models:
+            import httpx
+            from langchain_xai import ChatXAI
+
+            if self._http is None:
+                self._http = httpx.AsyncClient(
+                    limits=httpx.Limits(max_connections=self.max_concurrency * 2,
+                                        max_keepalive_connections=self.max_concurrency),
+                    timeout=REQUEST_TIMEOUT,
+                )
+            self._models[key] = ChatXAI(
+                model=model, api_key=self.api_key, temperature=temperature, max_tokens=max_tokens,
+                xai_api_base=self.base_url, http_async_client=self._http,
+                max_retries=0, include_response_headers=True,
+            )
+        return self._models[key]
+
+    def _limits(self, user):
+        if self._global_limit is None:
+            self._global_limit = asyncio.Semaphore(self.max_concurrency)
+        if user is None:
+            return [self._global_limit]
+        limit = self._user_limits.get(user)
+        if limit is None:
+            limit = self._user_limits[user] = asyncio.Semaphore(self.user_concurrency)
+        return [limit, self._global_limit]
+
+    def _observe(self, headers):
+        # Follow whatever limits the provider reports instead of our static guesses
+        headers = {k.lower(): v for k, v in (headers or {}).items()}
+        try:
+            if "x-ratelimit-limit-requests" in headers:
+                self.request_bucket.set_limit(float(headers["x-ratelimit-limit-requests"]))
+            if "x-ratelimit-limit-tokens" in headers:
+                self.token_bucket.set_limit(float(headers["x-ratelimit-limit-tokens"]))
+            if headers.get("x-ratelimit-remaining-requests") == "0":
+                self.request_bucket.pause(float(headers.get("x-ratelimit-reset-requests", "1").rstrip("s")))
+        except ValueError:
+            pass
+
+    async def _admit(self, messages, max_tokens):
+        prompt_chars = sum(len(str(m.content)) for m in messages)
+        await self.request_bucket.acquire(1)
+        await self.token_bucket.acquire(prompt_chars / 4 + (max_tokens or 1000))
+
+    async def _backoff(self, attempt, error):
+        delay = random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+        retry_after = _retry_after(error)
+        if retry_after is not None:
+            self.request_bucket.pause(retry_after)
+            delay = max(delay, retry_after)
+        if getattr(error, "status_code", None) == 429:
+            self.stats["rate_limited"] += 1
+        self.stats["retries"] += 1
+        await asyncio.sleep(delay)
+
+    # ─── async API ───
+    async def _call(self, model, messages, user):
+        llm = self._model(*model)
+        for attempt in range(self.max_retries + 1):
+            await self._admit(messages, model[2])
+            try:
+                # Only the permits actually taken are given back, even when cancelled mid-acquire
+                async with contextlib.AsyncExitStack() as held:
+                    for limit in self._limits(user):
+                        await held.enter_async_context(limit)
+                    self.stats["upstream_calls"] += 1
+                    response = await llm.ainvoke(messages)
+                self._observe(response.response_metadata.get("headers"))
+                return response
+            except Exception as e:
+                if attempt == self.max_retries or not _is_retryable(e):
+                    self.stats["errors"] += 1
+                    raise
+                error = e
+            await self._backoff(attempt, error)
+
+    async def acomplete(self, messages, model="grok-4", temperature=None, max_tokens=None, user=None):
+        """Return an AIMessage. Identical requests already in flight share one upstream call."""
+        spec = (model, temperature, max_tokens)
+        key = sha256_hex(json.dumps([spec, [(m.type, m.content) for m in messages]], default=str))
+        pending = self._inflight.get(key)
+        if pending is not None:
+            self.stats["coalesced"] += 1
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await self._call(spec, messages, user)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # mark retrieved when nobody else was waiting
+            raise
+        finally:
+            del self._inflight[key]
+
+    async def astream(self, messages, model="grok-4", temperature=None, max_tokens=None, user=None):
+        """Yield AIMessageChunks. Streams are per caller, so they are never coalesced;
+        a failed stream is only retried if it had not produced any output yet."""
+        llm = self._model(model, temperature, max_tokens)
+        for attempt in range(self.max_retries + 1):
+            await self._admit(messages, max_tokens)
+            started = False
+            try:
+                async with contextlib.AsyncExitStack() as held:
+                    for limit in self._limits(user):
+                        await held.enter_async_context(limit)
+                    self.stats["upstream_calls"] += 1
+                    async for chunk in llm.astream(messages):
+                        started = True
+                        yield chunk
+                return
+            except Exception as e:
+                if started or attempt == self.max_retries or not _is_retryable(e):
+                    self.stats["errors"] += 1
+                    raise
+                error = e
+            await self._backoff(attempt, error)
+
+    # ─── bridges for sync callers and foreign event loops ───
+    def run(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def close(self):
+        if self._http is not None:
+            self.run(self._http.aclose()).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+    def complete(self, messages, **kwargs):
+        return self.run(self.acomplete(messages, **kwargs)).result()
+
+    def _pump(self, messages, kwargs, put):
+        async def pump():
+            try:
+                async for chunk in self.astream(messages, **kwargs):
+                    put(chunk)
+                put(_DONE)
+            except BaseException as e:
+                put(e)
+        return self.run(pump())
+
+    def stream(self, messages, **kwargs):
+        items = queue.Queue()
+        job = self._pump(messages, kwargs, items.put)
+        try:
+            while True:
+                item = items.get()
+                if item is _DONE:
+                    return
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            job.cancel()  # the consumer stopped early; stop the upstream stream too
+
+    async def astream_from(self, messages, **kwargs):
+        """``astream`` for callers running on their own event loop (e.g. the API service)."""
+        loop = asyncio.get_running_loop()
+        items = asyncio.Queue()
+        job = self._pump(messages, kwargs, lambda item: loop.call_soon_threadsafe(items.put_nowait, item))
+        try:
+            while True:
+                item = await items.get()
+                if item is _DONE:
+                    return
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            job.cancel()
+
+
+class GatewayChatModel(Runnable):
+    """LangChain Runnable that sends every call through the shared gateway.
+
+    Pass ``config={"metadata": {"user": ...}}`` to apply the per-user concurrency cap.
+    """
+
+    def __init__(self, gateway, model="grok-4", temperature=None, max_tokens=None):
+        self.gateway = gateway
+        self.model_name = model
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+
+    def _kwargs(self, config):
+        return {
+            "model": self.model_name, "temperature": self.temperature, "max_tokens": self.max_tokens,
+            "user": ((config or {}).get("metadata") or {}).get("user"),
+        }
+
+    def invoke(self, input, config=None, **kwargs):
+        return self.gateway.complete(to_messages(input), **self._kwargs(config))
+
+    async def ainvoke(self, input, config=None, **kwargs):
+        future = self.gateway.run(self.gateway.acomplete(to_messages(input), **self._kwargs(config)))
+        return await asyncio.wrap_future(future)
+
+    def stream(self, input, config=None, **kwargs):
+        yield from self.gateway.stream(to_messages(input), **self._kwargs(config))
+
+    async def astream(self, input, config=None, **kwargs):
+        async for chunk in self.gateway.astream_from(to_messages(input), **self._kwargs(config)):
+            yield chunk
+
+
+_gateway = None
+_gateway_lock = threading.Lock()
+
+
+def get_gateway(api_key):
+    global _gateway
+    with _gateway_lock:
+        if _gateway is None:
+            _gateway = LLMGateway(api_key)
+        return _gateway
+
+
+class TracedChatModel(Runnable):
+    """Times every call as an ``llm`` span and records time to first token and tokens in/out.
+
+    The tool label comes from ``config["metadata"]["tool"]`` (see ``user_config``),
+    which LangChain passes down through ``prompt | llm`` chains.
+    """
+
+    def __init__(self, llm):
+        self.llm = llm
+
+    def __getattr__(self, name):
+        # stats, model_name, ... come from the wrapped model
+        if name == "llm":
+            raise AttributeError(name)
+        return getattr(self.llm, name)
+
+    def _start(self, input, config):
+        messages = to_messages(input)
+        tool = ((config or {}).get("metadata") or {}).get("tool") or "other"
+        return messages, tool, span(tool, "llm", model=getattr(self.llm, "model_name", ""))
+
+    def _record(self, tool, messages, output, ttft=None):
+        prompt = sum(count_tokens(m.content) for m in messages if isinstance(m.content, str))
+        record_llm(tool, prompt, count_tokens(output) if isinstance(output, str) else None, ttft)
+
+    def invoke(self, input, config=None, **kwargs):
+        messages, tool, step = self._start(input, config)
+        with step:
+            response = self.llm.invoke(messages, config, **kwargs)
+        self._record(tool, messages, response.content)
+        return response
+
+    async def ainvoke(self, input, config=None, **kwargs):
+        messages, tool, step = self._start(input, config)
+        with step:
+            response = await self.llm.ainvoke(messages, config, **kwargs)
+        self._record(tool, messages, response.content)
+        return response
+
+    def stream(self, input, config=None, **kwargs):
+        messages, tool, step = self._start(input, config)
+        parts, ttft = [], None
+        with step:
+            for chunk in self.llm.stream(messages, config, **kwargs):
+                if isinstance(chunk.content, str) and chunk.content:
+                    if ttft is None:
+                        ttft = time.perf_counter() - step.started
+                    parts.append(chunk.content)
+                yield chunk
+        self._record(tool, messages, "".join(parts), ttft)
+
+    async def astream(self, input, config=None, **kwargs):
+        messages, tool, step = self._start(input, config)
+        parts, ttft = [], None
+        with step:
+            async for chunk in self.llm.astream(messages, config, **kwargs):
+                if isinstance(chunk.content, str) and chunk.content:
+                    if ttft is None:
+                        ttft = time.perf_counter() - step.started
+                    parts.append(chunk.content)
+                yield chunk
+        self._record(tool, messages, "".join(parts), ttft)
+
+
+def get_chat_model(api_key, model="grok-4", temperature=None, max_tokens=None):
+    """The chat model every tool should use: telemetry → response cache → gateway → xAI."""
+    return TracedChatModel(cached(GatewayChatModel(get_gateway(api_key), model, temperature, max_tokens)))
+
+
+_default_models = {}
+_models_lock = threading.Lock()
+
+
+def default_models(model="grok-4"):
+    """(chat model, structured-output model) from XAI_API_KEY for code running outside a Streamlit
+    script: the API service and job workers. Raises RuntimeError when the key is missing."""
+    with _models_lock:
+        if model not in _default_models:
+            from structured_output import STRUCTURED_MAX_TOKENS
+
+            api_key = os.getenv("XAI_API_KEY", "")
+            if not api_key:
+                raise RuntimeError("XAI_API_KEY is not set")
+            _default_models[model] = (
+                get_chat_model(api_key, model, temperature=0.2, max_tokens=2000),
+                get_chat_model(api_key, model, temperature=0.2, max_tokens=STRUCTURED_MAX_TOKENS),
+            )
+        return _default_models[model]
+
+
+def user_config(tool=None):
+    """Run config tagging the call with the current Streamlit session for per-user limits.
+
+    ``tool`` labels the call's latency and token metrics.
+    """
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+        ctx = get_script_run_ctx()
+    except ImportError:
+        ctx = None
+    metadata = {"user": ctx.session_id} if ctx is not None else {}
+    if tool:
+        metadata["tool"] = tool
+    return {"metadata": metadata} if metadata else {}
+
+
+# ───────────────────────────────────────────────
+# LOAD TEST:  python llm_gateway.py --requests 200 --users 20
+# ───────────────────────────────────────────────
+async def _load_test(args):
+    from fake_llm_server import FakeLLMServer
+
+    server = await FakeLLMServer(latency=args.latency, rate_limit_every=args.rate_limit_every).start()
+    gateway = LLMGateway("fake-key", base_url=server.base_url, max_concurrency=args.concurrency,
+                         user_concurrency=args.user_concurrency, requests_per_minute=args.rpm)
+    model = GatewayChatModel(gateway, "grok-4", 0.2, 500)
+
+    async def one(i):
+        # A share of users resubmit the same prompt at the same time (tab switches, refreshes)
+        prompt = f"Score resume {i % args.distinct}" if args.distinct else f"Score resume {i}"
+        return await model.ainvoke(prompt, {"metadata": {"user": f"user-{i % args.users}"}})
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(args.requests)))
+    elapsed = time.perf_counter() - started
+    gateway.close()
+    await server.stop()
+    print(json.dumps({
+        "requests": args.requests,
+        "seconds": round(elapsed, 3),
+        "requests_per_second": round(args.requests / elapsed, 1),
+        "server_requests": server.requests,
+        "server_peak_concurrency": server.peak_active,
+        **gateway.stats,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Load-test the gateway against a local fake LLM")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--distinct", type=int, default=0, help="number of distinct prompts (0 = all distinct)")
+    parser.add_argument("--concurrency", type=int, default=MAX_CONCURRENCY)
+    parser.add_argument("--user-concurrency", type=int, default=USER_CONCURRENCY)
+    parser.add_argument("--rpm", type=float, default=6000)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--rate-limit-every", type=int, default=0)
+    asyncio.run(_load_test(parser.parse_args()))
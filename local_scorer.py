@@ -0,0 +1,203 @@
+# local_scorer.py - Offline Resume-JD match scoring with local sentence embeddings
+import hashlib
+import os
+import re
+import threading
+from dataclasses import dataclass, field
+
+import numpy as np
+
+# ───────────────────────────────────────────────
+# CONFIG
+# ───────────────────────────────────────────────
+# A local directory (or hub name) for sentence_transformers, or "hashing" for the
+# deterministic built-in model used in CI and offline smoke runs.
+EMBED_MODEL = os.getenv("RESUME_GENIE_EMBED_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+EMBED_BATCH_SIZE = int(os.getenv("RESUME_GENIE_EMBED_BATCH", "32"))
+CHUNK_WORDS = 50
+
+_BULLET_RE = re.compile(r"^\s*(?:[•\-\*▪●◦·]|\d+[.)])\s*")
+_WORD_RE = re.compile(r"[a-z0-9][a-z0-9+#./-]*")
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from in into is of on or our the to we with you your "
+    "will years year experience strong ability using use".split()
+)
+
+
+class HashingEmbedder:
+    """Deterministic bag-of-words embedder (unigrams + bigrams hashed into ``dim`` buckets).
+
+    Needs no model download and gives identical vectors on every machine, so
+    scores computed with it are stable enough to assert on.
+    """
+
+    # Similarities that map to a 0 and a 100 requirement score
+    score_range = (0.02, 0.3)
+
+    def __init__(self, dim=512):
+        self.dim = dim
+
+    def _bucket(self, token):
+        digest = hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
+        return int.from_bytes(digest, "little") % self.dim
+
+    def encode(self, texts, batch_size=None, normalize_embeddings=True, **kwargs):
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            words = [w for w in _WORD_RE.findall(text.lower()) if w not in _STOPWORDS]
+            for token in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+                out[row, self._bucket(token)] += 1.0
+        if normalize_embeddings:
+            norms = np.linalg.norm(out, axis=1, keepdims=True)
+            out /= np.where(norms == 0, 1.0, norms)
+        return out
+
+
+_embedders = {}
+_embedders_lock = threading.Lock()
+
+
+def load_embedder(model=None):
+    """Load (once per process) the embedding model named by ``model`` or RESUME_GENIE_EMBED_MODEL."""
+    model = model or EMBED_MODEL
+    with _embedders_lock:
+        if model not in _embedders:
+            if model == "hashing":
+                _embedders[model] = HashingEmbedder()
+            else:
+                from sentence_transformers import SentenceTransformer
+
+                # A local path loads without touching the network
+                _embedders[model] = SentenceTransformer(
+                    model, device="cpu", local_files_only=os.path.isdir(model)
+                )
+        return _embedders[model]
+
+
+def embed(texts, embedder=None):
+    embedder = embedder or load_embedder()
+    if not texts:
+        return np.zeros((0, 1), dtype=np.float32)
+    vectors = embedder.encode(
+        list(texts), batch_size=EMBED_BATCH_SIZE, normalize_embeddings=True, show_progress_bar=False
+    )
+    return np.asarray(vectors, dtype=np.float32)
+
+
+# ───────────────────────────────────────────────
+# CHUNKING
+# ───────────────────────────────────────────────
+def _lines(text):
+    for line in text.splitlines():
+        line = _BULLET_RE.sub("", line).strip()
+        if line:
+            yield line
+
+
+def chunk_text(text, max_words=CHUNK_WORDS):
+    """Group consecutive resume lines into chunks of roughly ``max_words`` words."""
+    chunks, current, count = [], [], 0
+    for line in _lines(text):
+        words = len(line.split())
+        if current and count + words > max_words:
+            chunks.append(" ".join(current))
+            current, count = [], 0
+        current.append(line)
+        count += words
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+
+def extract_requirements(job_description, min_words=3):
+    """Split a JD into individual requirement statements (bullets and sentences)."""
+    requirements = []
+    for line in _lines(job_description):
+        for sentence in re.split(r"(?<=[.;!?])\s+", line):
+            sentence = sentence.strip()
+            if len(sentence.split()) >= min_words:
+                requirements.append(sentence)
+    return requirements
+
+
+# ───────────────────────────────────────────────
+# SCORING
+# ───────────────────────────────────────────────
+@dataclass
+class RequirementCoverage:
+    requirement: str
+    similarity: float
+    covered: bool
+    evidence: str
+
+
+@dataclass
+class PreparedJob:
+    requirements: list
+    vectors: np.ndarray
+
+
+@dataclass
+class LocalMatch:
+    score: int
+    match_percent: int
+    coverage: list = field(default_factory=list)
+
+    @property
+    def missing(self):
+        return [c.requirement for c in self.coverage if not c.covered]
+
+
+def prepare_job(job_description, embedder=None):
+    """Split and embed a JD once so it can be scored against many resumes."""
+    requirements = extract_requirements(job_description) or chunk_text(job_description)
+    return PreparedJob(requirements=requirements, vectors=embed(requirements, embedder))
+
+
+def score_match(resume_text, job_description, embedder=None, cover_threshold=0.5):
+    """Score a resume against a JD (text or ``PreparedJob``) from embedding similarity alone.
+
+    Every JD requirement is matched to its most similar resume chunk. ``score``
+    averages the rescaled similarities, and ``match_percent`` is the share of
+    requirements whose rescaled similarity reaches ``cover_threshold``.
+    """
+    embedder = embedder or load_embedder()
+    chunks = chunk_text(resume_text)
+    if isinstance(job_description, PreparedJob):
+        requirements, req_vecs = job_description.requirements, job_description.vectors
+        resume_vecs = embed(chunks, embedder) if chunks else None
+    else:
+        requirements = extract_requirements(job_description) or chunk_text(job_description)
+        if chunks and requirements:
+            # One batched encode for both sides
+            vectors = embed(chunks + requirements, embedder)
+            resume_vecs, req_vecs = vectors[: len(chunks)], vectors[len(chunks):]
+    if not chunks or not requirements:
+        return LocalMatch(score=0, match_percent=0)
+
+    sims = req_vecs @ resume_vecs.T
+    best_idx = sims.argmax(axis=1)
+    best = sims[np.arange(len(requirements)), best_idx]
+    return summarize_coverage(requirements, best, [chunks[i] for i in best_idx], embedder, cover_threshold)
+
+
+def summarize_coverage(requirements, best, evidence, embedder=None, cover_threshold=0.5):
+    """``LocalMatch`` from each requirement's best similarity and the resume chunk it came from."""
+    embedder = embedder or load_embedder()
+    best = np.asarray(best, dtype=np.float32)
+    low, high = getattr(embedder, "score_range", (0.2, 0.7))
+    scaled = np.clip((best - low) / (high - low), 0.0, 1.0)
+    coverage = [
+        RequirementCoverage(
+            requirement=req,
+            similarity=float(best[i]),
+            covered=bool(scaled[i] >= cover_threshold),
+            evidence=evidence[i],
+        )
+        for i, req in enumerate(requirements)
+    ]
+    return LocalMatch(
+        score=int(round(float(scaled.mean()) * 100)),
+        match_percent=int(round(100 * sum(c.covered for c in coverage) / len(coverage))),
+        coverage=coverage,
+    )
@@ -1,11 +1,9 @@
 # main.py - Resume AI Toolkit (Grok-4 Powered)
 import streamlit as st
 import os
-import tempfile
-from langchain_xai import ChatXAI
-from langchain_community.document_loaders import PyPDFLoader
-from langchain_core.prompts import PromptTemplate
-from langchain_core.messages import SystemMessage, HumanMessage, AIMessage
+import sys
+# Tool modules (langchain, numpy, pypdf, ...) are imported inside the branch of the
+# selected tool, so a cold start only pays for what the first page needs.
 
 # ───────────────────────────────────────────────
 # CONFIG (shared across all tools)
@@ -17,10 +15,21 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-from PIL import Image
+LOGO_WIDTH = 80
 
-logo = Image.open("logo.png")
-st.sidebar.image(logo,width=80)
+@st.cache_resource
+def load_logo():
+    # Resized once per process; st.image passes bytes already at display width through untouched
+    import io
+    from PIL import Image
+
+    logo = Image.open("logo.png")
+    logo.thumbnail((LOGO_WIDTH, logo.height))
+    buf = io.BytesIO()
+    logo.save(buf, format="PNG")
+    return buf.getvalue()
+
+st.sidebar.image(load_logo(), width=LOGO_WIDTH)
 
 st.sidebar.markdown("**Resume Genie**")
 
@@ -33,61 +42,146 @@ if not XAI_API_KEY:
 
 @st.cache_resource(show_spinner="🔄 Initializing Grok-4...")
 def get_llm():
-    return ChatXAI(model="grok-4", api_key=XAI_API_KEY, temperature=0.2, max_tokens=2000)
+    from llm_gateway import get_chat_model
+
+    return get_chat_model(XAI_API_KEY, "grok-4", temperature=0.2, max_tokens=2000)
+
+@st.cache_resource(show_spinner=False)
+def get_structured_llm():
+    # JSON answers are a fraction of the markdown reports, so the output cap is too
+    from llm_gateway import get_chat_model
+    from structured_output import STRUCTURED_MAX_TOKENS
+
+    return get_chat_model(XAI_API_KEY, "grok-4", temperature=0.2, max_tokens=STRUCTURED_MAX_TOKENS)
+
+@st.cache_resource(show_spinner=False)
+def get_router():
+    from llm_gateway import get_chat_model
+    from model_router import DEEP, FAST, FAST_MODEL, ModelRouter
+    from structured_output import STRUCTURED_MAX_TOKENS
+
+    # Built here, not in the tier callables: the checker calls them from batch worker threads
+    fast = None, get_chat_model(XAI_API_KEY, FAST_MODEL, temperature=0.2, max_tokens=STRUCTURED_MAX_TOKENS)
+    deep = get_llm(), get_structured_llm()
+    # The fast tier only gives structured answers
+    return ModelRouter({FAST: lambda: fast, DEEP: lambda: deep})
 
-llm = get_llm()
+CHECKER_CONCURRENCY = int(os.getenv("RESUME_GENIE_CHECKER_CONCURRENCY", "8"))
+# Set to run every tool on api_service replicas; the dashboard then only renders
+API_URL = os.getenv("RESUME_GENIE_API_URL", "")
+# Opt-in: in-process runs go through job_queue, so the LLM work outlives reruns, reloads and dropped sessions
+JOB_QUEUE = not API_URL and os.getenv("RESUME_GENIE_JOB_QUEUE", "0") == "1"
+JOB_POLL = 1.0
+# Opt-in: once the sidebar resume and JD are in, start the matcher and cover letter in the background
+PREFETCH = JOB_QUEUE and os.getenv("RESUME_GENIE_PREFETCH", "0") == "1"
+ADMIN_PANEL = os.getenv("RESUME_GENIE_ADMIN_PANEL", "0") == "1"
+ADMIN_REFRESH = 5
+
+@st.cache_resource
+def start_metrics():
+    # One Prometheus /metrics endpoint per server process (telemetry is stdlib-only, cheap to import)
+    from telemetry import start_metrics_server
+
+    return start_metrics_server()
+
+start_metrics()
 
 # ───────────────────────────────────────────────
 # SHARED PDF LOADER
 # ───────────────────────────────────────────────
-@st.cache_data
-def extract_resume_text(uploaded_file):
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
-        tmp.write(uploaded_file.getvalue())
-        tmp_path = tmp.name
+def load_resume(uploaded_file):
+    """Resume pages; join them for local scoring, pass them to ``compact_resume`` for prompts."""
+    from pdf_extract import PDFExtractionError, extract_resume_pages
+
     try:
-        loader = PyPDFLoader(tmp_path)
-        docs = loader.load()
-        text = "\n\n".join(doc.page_content for doc in docs)
-        return text
-    finally:
-        os.unlink(tmp_path)
+        return extract_resume_pages(uploaded_file)
+    except PDFExtractionError as e:
+        st.error(f"❌ {e}")
+        st.stop()
 
-# ───────────────────────────────────────────────
-# PROMPTS (pre-defined for each tool)
-# ───────────────────────────────────────────────
-COVER_LETTER_PROMPT = PromptTemplate.from_template("""
-Write a professional cover letter (300–450 words) for this job. Match resume to JD exactly. Standard format.
-Job Description: {job_description}
-Resume: {resume_text}
-Do not invent facts.
-""")
+def session_id():
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
 
-RESUME_SCORER_PROMPT = """You are an expert resume scorer. Analyze match to JD. EXACT structure:
-**Score**: X/100
-**Overall Match**: X%
-Keywords matched: • ...
-Missing keywords: • ...
-Readability Score: X/100
-ATS Compatibility Score: X/100
-2-liner summary: ...
-Skill gap analysis: • ...
-Overall improvement suggestions: • ...
-Industry specific feedback: • ...
-Job: {job_description}
-Resume: {context}
-Be honest, use rubrics."""
-
-RESUME_CHECKER_PROMPT = PromptTemplate.from_template("""
-Score resume standalone (clarity, format, ATS, skills): EXACT structure:
-1. **Score**: X/100
-2. **Strengths**: • ...
-3. **Weaknesses**: • ...
-4. **Skills Mentioned**: • ...
-5. **Recommended Skills**: • ...
-6. **Next Career Steps**: • ...
-Resume: {context}
-""")
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx is not None else None
+
+def routed_invoke(tool, *args, **kwargs):
+    """``get_router().invoke``; a resume the local checks turn away ends the run with their reason."""
+    from model_router import NotAResume
+
+    try:
+        return get_router().invoke(tool, *args, **kwargs)
+    except NotAResume as e:
+        st.error(f"🚫 {e}")
+        st.stop()
+
+def routed_chat_model(tool, resume_text):
+    from model_router import NotAResume
+
+    try:
+        return get_router().chat_model(tool, resume_text)
+    except NotAResume as e:
+        st.error(f"🚫 {e}")
+        st.stop()
+
+def remote(fn, *args, **kwargs):
+    """Call an ``api_client`` function (or consume one of its streams); service errors end the run."""
+    from api_client import ServiceError
+
+    try:
+        return fn(*args, **kwargs)
+    except ServiceError as e:
+        st.error(f"❌ {e}")
+        st.stop()
+
+@st.cache_resource
+def get_jobs():
+    # Workers live in the server process (RESUME_GENIE_JOB_WORKERS=0 when `job_queue.py worker` runs them)
+    from job_queue import start_workers
+
+    # Workers build their models from the environment; hand them a key that came from st.secrets
+    os.environ.setdefault("XAI_API_KEY", XAI_API_KEY)
+    return start_workers()
+
+def attached_jobs(param):
+    """Jobs whose ids are in the URL, so a reload (or a shared link) picks the results back up."""
+    ids = st.query_params.get(param, "")
+    return get_jobs().get_many([job_id for job_id in ids.split(",") if job_id])
+
+@st.fragment(run_every=JOB_POLL)
+def watch_jobs(param, render):
+    jobs = attached_jobs(param)
+    if jobs and all(job.finished for job in jobs):
+        st.rerun()  # stop polling; the full run renders the results
+    render(jobs)
+
+def prefetch_tools(job_desc, resume_file):
+    """Keep background matcher and cover-letter jobs in line with the sidebar inputs and attach them to
+    their tools, so switching tools shows results (or progress) straight away."""
+    from prefetch import PREFETCH_KINDS, schedule
+
+    previous = st.session_state.get("prefetch")
+    state = schedule(get_jobs(), session_id(), resume_file.getvalue() if resume_file else None, job_desc, previous)
+    if state.skipped:
+        st.sidebar.caption(f"⚡ Not prefetching: {state.skipped}")
+    if state is previous:
+        return
+    st.session_state.prefetch = state
+    for kind, param in zip(PREFETCH_KINDS, ("scorer_job", "cover_letter_job")):
+        if kind in state.jobs:
+            st.query_params[param] = state.jobs[kind]
+        elif previous is not None and st.query_params.get(param) == previous.jobs.get(kind):
+            st.query_params.pop(param, None)
+
+def show_jobs(param, render):
+    """Render the jobs attached under ``param``, polling until every one of them has finished."""
+    jobs = attached_jobs(param)
+    if not jobs:
+        return
+    if all(job.finished for job in jobs):
+        render(jobs)
+    else:
+        watch_jobs(param, render)
 
 # ───────────────────────────────────────────────
 # MAIN UI
@@ -112,12 +206,31 @@ if tool in ["✉️ Cover Letter Generator", "📊 Resume-JD Matcher"]:
     st.sidebar.subheader("📤 Inputs")
     job_desc = st.sidebar.text_area("Job Description", height=200, key="jd_shared")
     resume_file = st.sidebar.file_uploader("Resume PDF", type="pdf", key="resume_shared")
+    if PREFETCH:
+        prefetch_tools(job_desc, resume_file)
+
+# Each tool body is a fragment: its widgets rerun only the tool, not the whole page
+# (sidebar, header, footer and, in the coach, the resume panel stay as they are).
 
 # ───────────────────────────────────────────────
 # TOOL 1: COVER LETTER
 # ───────────────────────────────────────────────
-if tool == "✉️ Cover Letter Generator":
-    st.header("✉️ AI Cover Letter Generator")
+def render_cover_letter_job(jobs):
+    from job_queue import DONE, FAILED
+
+    job = jobs[0]
+    if job.status == DONE:
+        st.caption(f"✂️ {job.result['compaction']}")
+        st.session_state.cover_letter = job.result["text"]
+    elif job.status == FAILED:
+        st.error(f"❌ {job.error}")
+    else:
+        st.caption(f"⏳ Cover letter {job.status}...")
+        if job.progress:
+            st.markdown(job.progress + "▌")
+
+@st.fragment
+def cover_letter_tool(job_desc, resume_file):
     col1, col2 = st.columns([1,1])
     
     with col1:
@@ -126,26 +239,235 @@ if tool == "✉️ Cover Letter Generator":
     
     with col2:
         st.subheader("📄 Your Resume")
-        uploaded_file = st.file_uploader("Upload PDF", type="pdf", key="cl_resume")
-        if uploaded_file:
-            if st.button("🔥 Generate Cover Letter", type="primary"):
+        uploaded_file = st.file_uploader("Upload PDF", type="pdf", key="cl_resume") or resume_file
+        if uploaded_file and st.button("🔥 Generate Cover Letter", type="primary"):
+            if JOB_QUEUE:
+                from job_queue import resume_payload
+
+                payload = resume_payload(uploaded_file.getvalue(), job_description=job_description)
+                st.session_state.pop("cover_letter", None)
+                st.query_params["cover_letter_job"] = get_jobs().submit("cover_letter", payload, user=session_id()).id
+            else:
+                from stream_render import StreamRenderer
+
                 with st.spinner("Extracting → Generating..."):
-                    resume_text = extract_resume_text(uploaded_file)
-                    chain = COVER_LETTER_PROMPT | llm
-                    full_response = ""
-                    resp_container = st.empty()
-                    for chunk in chain.stream({"job_description": job_description, "resume_text": resume_text}):
-                        content = chunk.content if hasattr(chunk, "content") else str(chunk)
-                        full_response += content
-                        resp_container.markdown(full_response + "▌")
-                    resp_container.markdown(full_response)
-                    st.download_button("💾 Download .md", full_response, "cover_letter.md")
+                    if API_URL:
+                        from api_client import stream_cover_letter
+
+                        chunks = stream_cover_letter(uploaded_file.getvalue(), job_description, session_id())
+                    else:
+                        from compaction import compact_resume
+                        from prompts import COVER_LETTER_PROMPT
+                        from llm_gateway import user_config
+                        from telemetry import span
+
+                        with span("cover_letter", "extract"):
+                            pages = load_resume(uploaded_file)
+                        with span("cover_letter", "prompt"):
+                            compacted = compact_resume(pages, "cover_letter", job_description)
+                        st.caption(f"✂️ {compacted.summary}")
+                        chain = COVER_LETTER_PROMPT | routed_chat_model("cover_letter", compacted.text)
+                        chunks = chain.stream({"job_description": job_description, "resume_text": compacted.text},
+                                              user_config("cover_letter"))
+                    renderer = StreamRenderer()
+                    remote(renderer.consume, chunks)
+                    renderer.container.empty()
+                    if API_URL:
+                        st.caption(f"✂️ {chunks.meta.get('compaction', '')}")
+                    st.session_state.cover_letter = renderer.text
+                    st.caption(f"⏱️ {renderer.summary}")
+        if JOB_QUEUE:
+            show_jobs("cover_letter_job", render_cover_letter_job)
+        if st.session_state.get("cover_letter"):
+            st.markdown(st.session_state.cover_letter)
+            st.download_button("💾 Download .md", st.session_state.cover_letter, "cover_letter.md",
+                               on_click="ignore")
 
 # ───────────────────────────────────────────────
 # TOOL 2: RESUME SCORER/MATCHER
 # ───────────────────────────────────────────────
-elif tool == "📊 Resume-JD Matcher":
-    st.header("📊 Resume vs Job Description Matcher")
+def render_match(local, keywords, expanded):
+    from keyword_matcher import format_keywords
+
+    m1, m2 = st.columns(2)
+    m1.metric("Score", f"{local.score}/100")
+    m2.metric("Overall Match", f"{local.match_percent}%")
+    with st.expander("📋 Requirement coverage", expanded=expanded):
+        for c in local.coverage:
+            st.markdown(f"{'✅' if c.covered else '❌'} {c.requirement}")
+    k1, k2 = st.columns(2)
+    with k1:
+        st.markdown("**Keywords matched**")
+        st.markdown(format_keywords(keywords.matched, bullet="-"))
+    with k2:
+        st.markdown("**Missing keywords**")
+        st.markdown(format_keywords(keywords.missing, bullet="-"))
+
+def render_analysis(summary, result):
+    from structured_output import ScorerResult
+
+    st.caption(f"✂️ {summary}")
+    st.markdown("### 📊 **Analysis Result**")
+    if isinstance(result, ScorerResult):
+        g1, g2, g3, g4 = st.columns(4)
+        g1.metric("Grok-4 score", f"{result.score}/100")
+        g2.metric("Match", f"{result.match_percent}%")
+        g3.metric("Readability", f"{result.readability}/100")
+        g4.metric("ATS", f"{result.ats}/100")
+        st.markdown(result.markdown())
+    else:
+        st.markdown(result)
+
+def remember_analysis(pdf_bytes, job_description, local, summary, result):
+    from disk_cache import sha256_hex
+    from jd_sections import section_keys
+
+    st.session_state.scorer_analysis = {"resume": sha256_hex(pdf_bytes), "jd": section_keys(job_description),
+                                        "local": local, "summary": summary, "result": result}
+
+def previous_analysis(pdf_bytes, job_description, local, keywords):
+    """(compaction summary, analysis) of this session's last deep run on the same resume, if the JD is an
+    edit of the one analysed and the local match has not moved past RESCORE_THRESHOLD since; JD edits that
+    small are not worth another LLM call."""
+    import dataclasses
+    from disk_cache import sha256_hex
+    from jd_sections import analysis_still_valid, section_keys
+    from structured_output import ScorerResult
+
+    last = st.session_state.get("scorer_analysis")
+    if (not last or last["resume"] != sha256_hex(pdf_bytes)
+            or not analysis_still_valid(last["local"], local, last["jd"], section_keys(job_description))):
+        return None
+    result = last["result"]
+    if isinstance(result, ScorerResult):
+        # The keyword lists are local, so they follow the edited JD
+        result = dataclasses.replace(result, keywords_matched=keywords.matched, keywords_missing=keywords.missing)
+    return last["summary"], result
+
+def render_score_job(jobs):
+    import base64
+    from api_client import decode_score
+    from job_queue import DONE, FAILED
+
+    job = jobs[0]
+    if job.status == DONE:
+        local, keywords, summary, analysis = decode_score(job.result)
+        if analysis is not None:
+            remember_analysis(base64.b64decode(job.payload["resume_pdf"]), job.payload["job_description"], local,
+                              summary, analysis)
+        render_match(local, keywords, expanded=False)
+        render_analysis(summary, analysis)
+    elif job.status == FAILED:
+        st.error(f"❌ Analysis failed: {job.error}")
+    else:
+        st.info(f"⏳ Grok-4 analysis {job.status}... (attempt {max(job.attempts, 1)} of {job.max_attempts})")
+
+def score_resume(uploaded_file, job_description, deep_analysis, reuse=True):
+    """The matcher run: local score and keywords at once, then (if asked) the Grok-4 analysis.
+
+    ``reuse=False`` always asks for a fresh analysis instead of keeping the last one for a lightly edited JD.
+    """
+    if API_URL:
+        from api_client import score
+
+        local, keywords, _, _ = remote(score, uploaded_file.getvalue(), job_description, False, session_id())
+    else:
+        from jd_sections import score_sections
+        from telemetry import span
+
+        with span("scorer", "extract"):
+            pages = load_resume(uploaded_file)
+        # Only the JD sections edited since the last run are embedded and matched again
+        with span("scorer", "local_score"):
+            match = score_sections("\n\n".join(pages), job_description)
+        local, keywords = match.local, match.keywords
+    reused = None
+    if deep_analysis and reuse:
+        reused = previous_analysis(uploaded_file.getvalue(), job_description, local, keywords)
+    job = None
+    if JOB_QUEUE:
+        st.query_params.pop("scorer_job", None)
+        if deep_analysis and reused is None:
+            from job_queue import resume_payload
+
+            payload = resume_payload(uploaded_file.getvalue(), job_description=job_description, deep=True)
+            job = get_jobs().submit("score", payload, user=session_id())
+            st.query_params["scorer_job"] = job.id
+    # A finished job (same resume and JD as before) already carries the quick match
+    if job is None or not job.finished:
+        render_match(local, keywords, expanded=not deep_analysis)
+        if not API_URL:
+            st.caption(f"🧩 {match.summary}")
+    if reused is not None:
+        from jd_sections import RESCORE_THRESHOLD
+
+        st.caption(f"♻️ The JD edit moved the local match by less than {RESCORE_THRESHOLD} points, "
+                   "so the previous Grok-4 analysis still stands")
+        render_analysis(*reused)
+    elif deep_analysis and not JOB_QUEUE:
+        with st.spinner("Analyzing match... (30-60s)"):
+            if API_URL:
+                _, _, summary, result = remote(score, uploaded_file.getvalue(), job_description, True, session_id())
+            else:
+                from compaction import compact_resume
+                from prompts import build_scorer_prompt
+                from llm_gateway import user_config
+                from structured_output import STRUCTURED, ScorerResult
+
+                with span("scorer", "prompt"):
+                    compacted = compact_resume(pages, "scorer", job_description)
+                    prompt = build_scorer_prompt(job_description, compacted.text, keywords, structured=STRUCTURED)
+                summary = compacted.summary
+                # Straight to Grok-4: a deep analysis was asked for (no local checks, no fast tier)
+                result = routed_invoke("scorer", prompt, ScorerResult if STRUCTURED else None, compacted.text,
+                                       user_config("scorer"), deep=True).result
+                if STRUCTURED:
+                    result.keywords_matched, result.keywords_missing = keywords.matched, keywords.missing
+            remember_analysis(uploaded_file.getvalue(), job_description, local, summary, result)
+            render_analysis(summary, result)
+
+@st.cache_resource
+def get_library():
+    # Built offline with `python jd_library.py ingest`; restart the app after creating a new library
+    from jd_library import JD_LIBRARY_DIR, JDLibrary
+
+    if not os.path.exists(os.path.join(JD_LIBRARY_DIR, "postings.sqlite3")):
+        return None
+    return JDLibrary()
+
+def library_search(uploaded_file):
+    """Reverse search: the JD-library postings that fit this resume best, each one click from the matcher."""
+    from disk_cache import sha256_hex
+
+    library = None if API_URL else get_library()
+    if library is None or not len(library):
+        return
+    with st.expander(f"📚 Best-fitting postings from the JD library ({len(library):,})"):
+        k = st.slider("Postings", 5, 50, 10, key="library_k")
+        resume_key = sha256_hex(uploaded_file.getvalue())
+        if st.button("🔎 Search the library", key="library_search"):
+            from telemetry import span
+
+            pages = load_resume(uploaded_file)
+            with span("library", "search", postings=len(library)):
+                st.session_state.library_hits = (resume_key, library.search("\n\n".join(pages), k=k))
+        hits_for, hits = st.session_state.get("library_hits", (None, []))
+        analyze = None
+        for rank, hit in enumerate(hits if hits_for == resume_key else [], 1):
+            c1, c2 = st.columns([4, 1])
+            company = f" — {hit.company}" if hit.company else ""
+            link = f" ([posting]({hit.url}))" if hit.url else ""
+            c1.markdown(f"{rank}. **{hit.title or hit.id}**{company} · similarity {hit.similarity:.2f}{link}")
+            if c2.button("🧠 Analyze", key=f"library_analyze_{hit.row}"):
+                analyze = hit
+    if analyze is not None:
+        # Same scorer prompt, jobs and caches as a pasted JD; library hits score alike by construction,
+        # so the previous hit's analysis must never stand in for this one
+        st.markdown(f"#### {analyze.title or analyze.id}")
+        score_resume(uploaded_file, library.posting(analyze.row).text, deep_analysis=True, reuse=False)
+
+@st.fragment
+def matcher_tool(job_desc, resume_file):
     col1, col2 = st.columns([1,1])
     
     with col1:
@@ -154,48 +476,257 @@ elif tool == "📊 Resume-JD Matcher":
     
     with col2:
         st.subheader("📄 Resume")
-        uploaded_file = st.file_uploader("Upload PDF", type="pdf", key="scorer_resume")
+        uploaded_file = st.file_uploader("Upload PDF", type="pdf", key="scorer_resume") or resume_file
         if uploaded_file:
             st.success("✅ Resume loaded")
+            deep_analysis = st.checkbox("🧠 Add detailed Grok-4 analysis (30-60s)", key="scorer_deep")
             if st.button("📈 Score Match", type="primary"):
-                with st.spinner("Analyzing match... (30-60s)"):
-                    context = extract_resume_text(uploaded_file)
-                    prompt = RESUME_SCORER_PROMPT.format(job_description=job_description, context=context)
-                    response = llm.invoke(prompt)
-                    st.markdown("### 📊 **Analysis Result**")
-                    st.markdown(response.content)
+                score_resume(uploaded_file, job_description, deep_analysis)
+            library_search(uploaded_file)
+        if JOB_QUEUE:
+            show_jobs("scorer_job", render_score_job)
 
 # ───────────────────────────────────────────────
 # TOOL 3: RESUME CHECKER
 # ───────────────────────────────────────────────
-elif tool == "🔍 Resume Checker":
-    st.header("🔍 Standalone Resume Evaluator")
-    uploaded_file = st.file_uploader("Upload resume PDF", type="pdf", key="checker_resume")
+def render_ranking(scores):
+    if len(scores) > 1:
+        st.markdown("### 🏆 **Ranking**")
+        st.markdown("\n".join(f"{rank}. **{score}/100** — {name}"
+                               for rank, (score, name) in enumerate(sorted(scores, reverse=True), 1)))
+
+def duplicate_caption(card, original, similarity):
+    card.caption(f"♊ Near-duplicate of **{original}** ({similarity:.0%} similar): shares its evaluation")
+
+def render_checker_jobs(jobs):
+    from api_client import decode_check
+    from job_queue import DONE, FAILED
+
+    st.markdown("### 📋 **Detailed Evaluation**")
+    scores = []
+    duplicates = st.session_state.get("checker_duplicates", {})
+    for job in jobs:
+        name = job.payload.get("name", "")
+        cards = [(name, None)] + duplicates.get(job.id, [])
+        for card_name, similarity in cards:
+            card = st.container(border=True)
+            card.markdown(f"**📄 {card_name}**")
+            if similarity is not None:
+                duplicate_caption(card, name, similarity)
+            if job.status == DONE:
+                item = decode_check(job.result)
+                card.caption(f"✂️ {item['compaction']}")
+                if "route" in item:
+                    card.caption(item["route"].label)
+                if isinstance(item["result"], str):
+                    card.markdown(item["result"])
+                else:
+                    card.markdown(item["result"].markdown())
+                    if similarity is None:
+                        scores.append((item["result"].score, item["name"]))
+            elif job.status == FAILED:
+                card.error(f"❌ {job.error}")
+            else:
+                card.info(f"⏳ Evaluation {job.status}...")
+    render_ranking(scores)
+
+def find_duplicate_uploads(uploaded_files):
+    """Extracted pages per upload and ``{position: Duplicate}`` for the near-duplicates of earlier uploads."""
+    from pdf_extract import extract_pdf_pages_many
+    from resume_dedup import find_duplicates
+    from telemetry import span
+
+    with st.spinner("Extracting..."), span("checker", "extract", files=len(uploaded_files)):
+        extracted = extract_pdf_pages_many([f.getvalue() for f in uploaded_files])
+    texts = [None if isinstance(pages, Exception) else "\n\n".join(pages) for pages in extracted]
+    return extracted, find_duplicates(texts)
+
+@st.fragment
+def checker_tool():
+    uploaded_files = st.file_uploader("Upload resume PDFs", type="pdf", key="checker_resume",
+                                      accept_multiple_files=True)
+    # Unticked, a faster model answers first and Grok-4 only re-checks the answers it is unsure of
+    deep = st.checkbox("🧠 Grok-4 for every resume (slower)", key="checker_deep")
     
-    if uploaded_file and st.button("Evaluate Resume", type="primary"):
-        with st.spinner("Evaluating..."):
-            context = extract_resume_text(uploaded_file)
-            chain = RESUME_CHECKER_PROMPT | llm
-            response = chain.invoke({"context": context})
+    if uploaded_files and st.button("Evaluate Resumes", type="primary"):
+        scores = []
+        if JOB_QUEUE:
+            from job_queue import PRIORITY_BATCH, PRIORITY_INTERACTIVE, resume_payload
+
+            # Near-duplicates are not submitted; their cards show their original's job
+            _, duplicates = find_duplicate_uploads(uploaded_files)
+            originals = {i: f for i, f in enumerate(uploaded_files) if i not in duplicates}
+            # A pile of resumes yields to single-document runs other users are waiting on
+            priority = PRIORITY_BATCH if len(originals) > 1 else PRIORITY_INTERACTIVE
+            jobs = {i: get_jobs().submit("check", resume_payload(f.getvalue(), name=f.name, deep=deep), priority,
+                                         session_id())
+                    for i, f in originals.items()}
+            copies = {}
+            for i, duplicate in duplicates.items():
+                original = jobs[duplicate.canonical]
+                copies.setdefault(original.id, []).append((uploaded_files[i].name, duplicate.similarity))
+            st.session_state.checker_duplicates = copies
+            st.query_params["checker_jobs"] = ",".join(job.id for job in jobs.values())
+        elif API_URL:
+            from api_client import check
+
+            with st.spinner("Evaluating..."):
+                results = remote(check, [(f.name, f.getvalue()) for f in uploaded_files], deep, session_id())
+            st.markdown("### 📋 **Detailed Evaluation**")
+            for item in results:
+                card = st.container(border=True)
+                card.markdown(f"**📄 {item['name']}**")
+                if "duplicate_of" in item:
+                    duplicate_caption(card, item["duplicate_of"], item["duplicate_similarity"])
+                if "compaction" in item:
+                    card.caption(f"✂️ {item['compaction']}")
+                if "route" in item:
+                    card.caption(item["route"].label)
+                if "error" in item:
+                    card.error(f"❌ {item['error']}")
+                elif isinstance(item["result"], str):
+                    card.markdown(item["result"])
+                else:
+                    card.markdown(item["result"].markdown())
+                    if "duplicate_of" not in item:
+                        scores.append((item["result"].score, item["name"]))
+        else:
+            from compaction import compact_resume
+            from prompts import RESUME_CHECKER_JSON_PROMPT, RESUME_CHECKER_PROMPT
+            from llm_gateway import user_config
+            from model_router import NotAResume
+            from structured_output import STRUCTURED, CheckerResult
+            from telemetry import span
+
+            extracted, duplicates = find_duplicate_uploads(uploaded_files)
             st.markdown("### 📋 **Detailed Evaluation**")
-            st.markdown(response.content)
+            # Cards render in upload order; each fills in as its evaluation finishes
+            inputs, slots, names, positions, copies = [], [], [], {}, {}
+            for n, (f, pages) in enumerate(zip(uploaded_files, extracted)):
+                card = st.container(border=True)
+                card.markdown(f"**📄 {f.name}**")
+                if isinstance(pages, Exception):
+                    card.error(f"❌ {pages}")
+                    continue
+                if n in duplicates:
+                    # No evaluation of its own: mirrors its original's card
+                    duplicate = duplicates[n]
+                    duplicate_caption(card, uploaded_files[duplicate.canonical].name, duplicate.similarity)
+                    copies.setdefault(positions[duplicate.canonical], []).append(card.empty())
+                    copies[positions[duplicate.canonical]][-1].info("⏳ Evaluating...")
+                    continue
+                positions[n] = len(inputs)
+                with span("checker", "prompt"):
+                    compacted = compact_resume(pages, "checker")
+                card.caption(f"✂️ {compacted.summary}")
+                slots.append(card.empty())
+                slots[-1].info("⏳ Evaluating...")
+                inputs.append({"context": compacted.text})
+                names.append(f.name)
+            if STRUCTURED:
+                chain = get_router().runnable("checker", RESUME_CHECKER_JSON_PROMPT, CheckerResult, deep)
+            else:
+                chain = get_router().runnable("checker", RESUME_CHECKER_PROMPT, deep=deep)
+            config = {**user_config("checker"), "max_concurrency": CHECKER_CONCURRENCY}
+            for i, response in chain.batch_as_completed(inputs, config, return_exceptions=True):
+                for slot in [slots[i], *copies.get(i, [])]:
+                    if isinstance(response, NotAResume):
+                        slot.warning(f"🚫 {response}")
+                    elif isinstance(response, Exception):
+                        slot.error(f"❌ Evaluation failed: {response}")
+                    else:
+                        box = slot.container()
+                        box.caption(response.label)
+                        box.markdown(response.result.markdown() if STRUCTURED else response.result)
+                if STRUCTURED and not isinstance(response, Exception):
+                    scores.append((response.result.score, names[i]))
+        render_ranking(scores)
+    if JOB_QUEUE:
+        show_jobs("checker_jobs", render_checker_jobs)
 
 # ───────────────────────────────────────────────
 # TOOL 4: CAREER COACH CHAT
 # ───────────────────────────────────────────────
-elif tool == "💬 Career Coach Chat":
-    st.header("💬 Career Coach Chatbot")
-    
+VISIBLE_MESSAGES = 12
+
+def archived_markdown(transcript, upto):
+    """Messages before ``upto`` as one markdown block, extended incrementally and kept in the session."""
+    from chat_memory import USER
+
+    count, parts = st.session_state.setdefault("chat_archive", (0, []))
+    for role, text in transcript[count:upto]:
+        parts.append(f"**{'You' if role == USER else 'Coach'}:** {text}")
+    st.session_state.chat_archive = (max(count, upto), parts)
+    return "\n\n---\n\n".join(parts[:upto])
+
+@st.fragment
+def coach_chat():
+    from stream_render import StreamRenderer
+
+    memory = st.session_state.chat_memory
+    index = st.session_state.coach_index  # None when the service does the retrieval
+    if index is not None:
+        st.caption(f"🔎 Each question sends the {index.k} most relevant of {len(index.resume)} resume passages")
+
+    # Only the latest messages are drawn as bubbles, so a rerun costs the same at turn 4 and turn 40
+    hidden = max(0, len(memory.transcript) - VISIBLE_MESSAGES)
+    if hidden and st.toggle(f"🗂️ Show {hidden} earlier messages", key="coach_show_earlier"):
+        st.markdown(archived_markdown(memory.transcript, hidden))
+    for role, text in memory.transcript[hidden:]:
+        with st.chat_message(role):
+            st.markdown(text)
+
+    # Chat input: the new turn is drawn in place, no extra rerun
+    if prompt := st.chat_input("Ask about career, resume, interviews..."):
+        with st.chat_message("user"):
+            st.markdown(prompt)
+        with st.chat_message("assistant"):
+            if API_URL:
+                # The conversation records the turn once the answer has streamed
+                remote(StreamRenderer().consume, memory.ask(prompt, session_id()))
+            else:
+                from chat_memory import COACH, USER
+                from llm_gateway import user_config
+                from telemetry import span
+
+                memory.add(USER, prompt)
+                with span("coach", "prompt"):
+                    messages = memory.messages(context=index.context(prompt))
+                chunks = get_router().chat_model("coach").stream(messages, user_config("coach"))
+                full_resp = StreamRenderer().consume(chunks)
+                memory.add(COACH, full_resp)
+
+def coach_tool():
     # Resume upload (session-persisted)
     if "resume_context" not in st.session_state:
         st.session_state.resume_context = None
-        st.session_state.chat_history = []
+        st.session_state.coach_index = None
+        st.session_state.chat_memory = None
     
     uploaded_file = st.file_uploader("Upload resume first", type="pdf", key="chat_resume")
     if uploaded_file and st.session_state.resume_context is None:
-        context = extract_resume_text(uploaded_file)
-        st.session_state.resume_context = context
-        st.rerun()
+        if API_URL:
+            from api_client import RemoteConversation, extract_text
+
+            st.session_state.resume_context = remote(extract_text, uploaded_file.getvalue(), session_id())
+            st.session_state.chat_memory = RemoteConversation(st.session_state.resume_context)
+        else:
+            from compaction import clean_resume
+            from chat_memory import ConversationMemory
+            from coach_index import CoachRetriever
+            from llm_gateway import user_config
+            from prompts import COACH_SYSTEM_PROMPT
+            from telemetry import span
+
+            with span("coach", "extract"):
+                pages = load_resume(uploaded_file)
+            st.session_state.resume_context = clean_resume(pages)
+            # Indexed once per upload; each question only sends the relevant resume sections
+            with span("coach", "index"):
+                st.session_state.coach_index = CoachRetriever(st.session_state.resume_context)
+            # Recent turns verbatim, older ones folded into a rolling summary
+            st.session_state.chat_memory = ConversationMemory(get_llm(), COACH_SYSTEM_PROMPT, config=user_config("coach"))
+        st.session_state.chat_archive = (0, [])
     
     if not st.session_state.resume_context:
         st.warning("👆 Upload your resume to start chatting!")
@@ -206,32 +737,29 @@ elif tool == "💬 Career Coach Chat":
     
     with left_col:
         st.subheader("📄 Your Resume")
-        with st.expander("View full text", expanded=True):
+        # Drawn on full page runs only; chatting reruns just the right column
+        with st.expander("View full text", expanded=False):
             st.text_area("", st.session_state.resume_context, height=500, disabled=True)
     
     with right_col:
         st.subheader("🤖 Career Coach")
-        system_msg = SystemMessage(content=f"""You are a career coach. Use this resume: {st.session_state.resume_context}""")
-        
-        # Chat history
-        for msg in st.session_state.chat_history:
-            role = "user" if isinstance(msg, HumanMessage) else "assistant"
-            with st.chat_message(role):
-                st.markdown(msg.content)
-        
-        # Chat input
-        if prompt := st.chat_input("Ask about career, resume, interviews..."):
-            st.session_state.chat_history.append(HumanMessage(content=prompt))
-            with st.chat_message("assistant"):
-                messages = [system_msg] + st.session_state.chat_history
-                resp_container = st.empty()
-                full_resp = ""
-                for chunk in llm.stream(messages):
-                    full_resp += chunk.content
-                    resp_container.markdown(full_resp + "▌")
-                resp_container.markdown(full_resp)
-            st.session_state.chat_history.append(AIMessage(content=full_resp))
-            st.rerun()
+        coach_chat()
+
+# ───────────────────────────────────────────────
+# SELECTED TOOL
+# ───────────────────────────────────────────────
+if tool == "✉️ Cover Letter Generator":
+    st.header("✉️ AI Cover Letter Generator")
+    cover_letter_tool(job_desc, resume_file)
+elif tool == "📊 Resume-JD Matcher":
+    st.header("📊 Resume vs Job Description Matcher")
+    matcher_tool(job_desc, resume_file)
+elif tool == "🔍 Resume Checker":
+    st.header("🔍 Standalone Resume Evaluator")
+    checker_tool()
+elif tool == "💬 Career Coach Chat":
+    st.header("💬 Career Coach Chatbot")
+    coach_tool()
 
 # ───────────────────────────────────────────────
 # FOOTER
@@ -246,4 +774,32 @@ with col3:
     st.caption("📅 **Built**: Jan 2026 • Satyajit")
 
 st.sidebar.markdown("---")
-st.sidebar.caption("**Pro Tips**: Use sidebar to switch tools instantly ⚡")
\ No newline at end of file
+st.sidebar.caption("**Pro Tips**: Use sidebar to switch tools instantly ⚡")
+# Only once a tool has loaded the LLM stack; showing stats shouldn't import it
+if "llm_gateway" in sys.modules and hasattr(get_llm(), "stats"):
+    stats = get_llm().stats
+    st.sidebar.caption(f"⚡ **Response cache**: {stats['hits']} hits • {stats['misses']} misses")
+
+# ─── ADMIN: live step latency across all sessions in this process ───
+@st.fragment(run_every=ADMIN_REFRESH)
+def latency_panel():
+    from telemetry import latency_table, route_table
+
+    rows = latency_table()
+    if not rows:
+        st.caption("No timed steps yet")
+        return
+    st.markdown("| Tool | Step | Runs | p50 | p95 |\n|---|---|--:|--:|--:|\n" + "\n".join(
+        f"| {tool} | {step} | {n} | {p50:.2f}s | {p95:.2f}s |" for tool, step, n, p50, p95 in rows))
+    routes = route_table()
+    if routes:
+        # Which model_router tier answered: local checks, the fast model or Grok-4
+        st.markdown("| Tool | Tier | Answers |\n|---|---|--:|\n" + "\n".join(
+            f"| {tool} | {tier} | {n} |" for tool, tier, n in routes))
+    port = start_metrics()
+    if port:
+        st.caption(f"Prometheus: `http://127.0.0.1:{port}/metrics`")
+
+if ADMIN_PANEL:
+    with st.sidebar.expander("📈 Latency (p50 / p95)"):
+        latency_panel()
\ No newline at end of file
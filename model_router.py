@@ -0,0 +1,259 @@
+# model_router.py - Model cascade: local resume checks, then a fast model, then Grok-4 only when needed
+import os
+import re
+import threading
+from dataclasses import dataclass, field
+
+from langchain_core.runnables import RunnableLambda
+
+from keyword_matcher import KeywordIndex
+from telemetry import record_route
+
+# ───────────────────────────────────────────────
+# CONFIG
+# ───────────────────────────────────────────────
+# "0" sends every call straight to Grok-4 (no local checks, no fast tier)
+CASCADE = os.getenv("RESUME_GENIE_CASCADE", "1") == "1"
+# Cheaper, faster model tried first by tools whose policy allows it; empty disables the fast tier
+FAST_MODEL = os.getenv("RESUME_GENIE_FAST_MODEL", "grok-3-mini")
+DEEP_MODEL = "grok-4"
+# Fast answers scoring below this are thrown away and asked of Grok-4
+MIN_CONFIDENCE = float(os.getenv("RESUME_GENIE_MIN_CONFIDENCE", "0.7"))
+# Fewer words than this is a cover page, a scan without a text layer or a stray document
+MIN_RESUME_WORDS = 80
+
+LOCAL, FAST, DEEP = "local", "fast", "deep"
+TIERS = (LOCAL, FAST, DEEP)
+
+_SECTIONS = {
+    "experience": re.compile(r"experience|employment|work history|career history|professional background"),
+    "education": re.compile(r"education|academic|degrees?|certifications?"),
+    "skills": re.compile(r"skills|technologies|tech stack|competencies|tools"),
+    "summary": re.compile(r"summary|profile|objective|about me"),
+    "projects": re.compile(r"projects|portfolio|publications|awards"),
+}
+_HEADING_MAX_WORDS = 4
+_CONTACT_RE = re.compile(r"[\w.+-]+@[\w-]+\.[\w.]+|\+?\d[\d ().-]{7,}\d|linkedin\.com/|github\.com/", re.IGNORECASE)
+_WORD_RE = re.compile(r"\w+")
+
+
+@dataclass(frozen=True)
+class Policy:
+    """How one tool walks the cascade."""
+    gate: bool = True               # local checks turn away non-resumes before any model call
+    fast: bool = False              # the fast model answers first; Grok-4 only when it is not confident
+    min_confidence: float = MIN_CONFIDENCE
+
+
+POLICIES = {
+    # Standalone evaluations are the bulk of the calls and the fast model's skills can be checked
+    "checker": Policy(fast=True),
+    # The scorer only calls a model for the deep analysis the user asked for
+    "scorer": Policy(),
+    # Streamed prose: there is no confidence signal to escalate on
+    "cover_letter": Policy(),
+    # Follow-up questions about a resume that was already checked
+    "coach": Policy(gate=False),
+}
+
+
+class NotAResume(ValueError):
+    pass
+
+
+# ───────────────────────────────────────────────
+# LOCAL TIER
+# ───────────────────────────────────────────────
+@dataclass
+class Triage:
+    words: int
+    sections: list = field(default_factory=list)
+    contact: bool = False
+
+    @property
+    def is_resume(self):
+        return self.words >= MIN_RESUME_WORDS and (len(self.sections) >= 2 or (self.sections and self.contact))
+
+    @property
+    def reason(self):
+        if self.words < MIN_RESUME_WORDS:
+            return f"only {self.words} words of text (scanned PDF or not a resume?)"
+        found = ", ".join(self.sections) or "none"
+        return f"no resume structure found (sections: {found}; contact details: {'yes' if self.contact else 'no'})"
+
+
+def triage_resume(text):
+    """Local checks: text length, resume section headings and contact details."""
+    sections = []
+    for line in text.splitlines():
+        title = line.strip(" \t#*_:-|").lower()
+        if not title or len(title.split()) > _HEADING_MAX_WORDS:
+            continue
+        for name, pattern in _SECTIONS.items():
+            if name not in sections and pattern.search(title):
+                sections.append(name)
+    return Triage(len(_WORD_RE.findall(text)), sections, bool(_CONTACT_RE.search(text)))
+
+
+def answer_confidence(result, resume_text):
+    """How far a fast-tier answer can be trusted: the share of the skills it lists that the resume
+    actually mentions. Answers without a checkable skill list get 0, so they always escalate."""
+    index = KeywordIndex(getattr(result, "skills", None) or [])
+    if not index.terms:
+        return 0.0
+    return len(index.find(resume_text)) / len(index.terms)
+
+
+# ───────────────────────────────────────────────
+# ROUTER
+# ───────────────────────────────────────────────
+@dataclass
+class Routed:
+    """A routed answer and the tier that produced it."""
+    result: object
+    tier: str
+    model: str = ""
+    confidence: float = None
+    escalated: str = ""  # why the fast tier's answer was not used
+
+    def as_dict(self):
+        """Everything but the answer, for job results and API responses (``Routed(None, **route)`` reads it back)."""
+        return {"tier": self.tier, "model": self.model, "confidence": self.confidence, "escalated": self.escalated}
+
+    @property
+    def label(self):
+        if self.tier == FAST:
+            return f"⚡ Answered by the fast model ({self.model}, confidence {self.confidence:.0%})"
+        if self.escalated:
+            return f"🧠 Answered by {self.model}: {self.escalated}"
+        return f"🧠 Answered by {self.model}"
+
+
+class ModelRouter:
+    """Runs tool calls down the cascade set by each tool's ``Policy``.
+
+    ``models`` maps a tier (``FAST``, ``DEEP``) to a callable returning its
+    (chat model, structured-output model); they are only built when a call
+    reaches that tier, and benchmarks pass fakes. Every answer is counted in
+    ``resume_genie_route_total`` under the tier that gave it.
+    """
+
+    def __init__(self, models, policies=None):
+        self.models = models
+        self.policies = POLICIES if policies is None else policies
+
+    def policy(self, tool):
+        return self.policies.get(tool, Policy())
+
+    def triage(self, tool, resume_text, deep=False):
+        """Local tier: raise ``NotAResume`` when the tool's policy gates and the text fails the checks.
+
+        ``deep=True`` skips the checks: the user asked for Grok-4, so it gets to judge the document.
+        """
+        if not CASCADE or deep or not self.policy(tool).gate:
+            return None
+        triage = triage_resume(resume_text)
+        if not triage.is_resume:
+            record_route(tool, LOCAL)
+            raise NotAResume(f"This doesn't look like a resume: {triage.reason}")
+        return triage
+
+    def _use_fast(self, tool, result_cls, deep):
+        if not (CASCADE and FAST_MODEL and FAST in self.models) or deep:
+            return False
+        # Only structured answers carry something (the skill list) to measure confidence on
+        return result_cls is not None and self.policy(tool).fast
+
+    def _model_name(self, llm, tier):
+        return getattr(llm, "model_name", None) or (FAST_MODEL if tier == FAST else DEEP_MODEL)
+
+    def _done(self, tool, tier, llm, result, confidence=None, escalated=""):
+        record_route(tool, tier)
+        return Routed(result, tier, self._model_name(llm, tier), confidence, escalated)
+
+    def _fast_verdict(self, tool, result, resume_text):
+        confidence = answer_confidence(result, resume_text)
+        if confidence >= self.policy(tool).min_confidence:
+            return confidence, ""
+        return confidence, f"the fast model's answer was not confident enough ({confidence:.0%})"
+
+    def invoke(self, tool, prompt, result_cls=None, resume_text="", config=None, deep=False):
+        """Answer ``prompt`` (parsed into ``result_cls`` when given) at the cheapest tier that is good enough.
+
+        ``deep=True`` (the user asked for a deep analysis) skips the local checks and the fast tier.
+        """
+        from structured_output import invoke_structured
+
+        self.triage(tool, resume_text, deep)
+        escalated = ""
+        if self._use_fast(tool, result_cls, deep):
+            try:
+                _, fast = self.models[FAST]()
+                result = invoke_structured(fast, prompt, result_cls, config)
+            except Exception as e:
+                escalated = f"the fast model failed ({e})"
+            else:
+                confidence, escalated = self._fast_verdict(tool, result, resume_text)
+                if not escalated:
+                    return self._done(tool, FAST, fast, result, confidence)
+        llm, structured_llm = self.models[DEEP]()
+        if result_cls is not None:
+            return self._done(tool, DEEP, structured_llm,
+                              invoke_structured(structured_llm, prompt, result_cls, config), escalated=escalated)
+        return self._done(tool, DEEP, llm, llm.invoke(prompt, config).content, escalated=escalated)
+
+    async def ainvoke(self, tool, prompt, result_cls=None, resume_text="", config=None, deep=False):
+        from structured_output import ainvoke_structured
+
+        self.triage(tool, resume_text, deep)
+        escalated = ""
+        if self._use_fast(tool, result_cls, deep):
+            try:
+                _, fast = self.models[FAST]()
+                result = await ainvoke_structured(fast, prompt, result_cls, config)
+            except Exception as e:
+                escalated = f"the fast model failed ({e})"
+            else:
+                confidence, escalated = self._fast_verdict(tool, result, resume_text)
+                if not escalated:
+                    return self._done(tool, FAST, fast, result, confidence)
+        llm, structured_llm = self.models[DEEP]()
+        if result_cls is not None:
+            result = await ainvoke_structured(structured_llm, prompt, result_cls, config)
+            return self._done(tool, DEEP, structured_llm, result, escalated=escalated)
+        return self._done(tool, DEEP, llm, (await llm.ainvoke(prompt, config)).content, escalated=escalated)
+
+    def runnable(self, tool, template, result_cls=None, deep=False):
+        """Stand-in for ``template | llm`` in batch / batch_as_completed chains; the resume text is
+        the input's ``context``, and each output is a ``Routed``."""
+
+        def run(inputs, config):
+            return self.invoke(tool, template.format(**inputs), result_cls, inputs["context"], config, deep)
+
+        async def arun(inputs, config):
+            return await self.ainvoke(tool, template.format(**inputs), result_cls, inputs["context"], config, deep)
+
+        return RunnableLambda(run, afunc=arun, name=f"route_{tool}")
+
+    def chat_model(self, tool, resume_text=None):
+        """Chat model for the streamed tools (cover letter, coach): the local checks, then Grok-4."""
+        if resume_text is not None:
+            self.triage(tool, resume_text)
+        llm, _ = self.models[DEEP]()
+        record_route(tool, DEEP)
+        return llm
+
+
+_default_router = None
+_router_lock = threading.Lock()
+
+
+def default_router():
+    """Router over the gateway models from XAI_API_KEY, for the API service and job workers."""
+    global _default_router
+    with _router_lock:
+        if _default_router is None:
+            from llm_gateway import default_models
+
+            _default_router = ModelRouter({FAST: lambda: default_models(FAST_MODEL), DEEP: default_models})
+        return _default_router
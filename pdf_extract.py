@@ -0,0 +1,271 @@
+# pdf_extract.py - Shared resume PDF text extraction used by every tool
+import io
+import itertools
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from disk_cache import DiskCache, sha256_hex
+
+# Bump when the extraction output changes so stale cache entries are ignored
+EXTRACTOR_VERSION = "2"
+
+# Pages are stored in the cache joined by a form feed so they can be split back
+PAGE_SEPARATOR = "\f"
+
+# ───────────────────────────────────────────────
+# LIMITS
+# ───────────────────────────────────────────────
+PDF_WORKERS = int(os.getenv("RESUME_GENIE_PDF_WORKERS", str(min(4, os.cpu_count() or 1))))
+MAX_PAGES = int(os.getenv("RESUME_GENIE_PDF_MAX_PAGES", "60"))
+EXTRACT_TIMEOUT = float(os.getenv("RESUME_GENIE_PDF_TIMEOUT", "20"))
+# Documents shorter than this are parsed in one pool task; longer ones are split across the workers
+PARALLEL_MIN_PAGES = int(os.getenv("RESUME_GENIE_PDF_PARALLEL_MIN_PAGES", "8"))
+PAGES_PER_TASK = 4
+# Past its timeout a task gets this long to fail by itself (pages are checked one at a time) before its
+# worker is killed; a page pypdf hangs on never gets there
+KILL_GRACE = 1.0
+_POLL = 0.1
+
+
+class PDFExtractionError(Exception):
+    pass
+
+
+_cache = None
+_pool = None
+_pool_lock = threading.Lock()
+_task_ids = itertools.count()
+_started = {}  # task id -> when a worker picked it up (futures count as running while still queued)
+_started_lock = threading.Lock()
+_worker_started = None  # in a worker: where it reports the tasks it starts
+
+
+def get_cache():
+    global _cache
+    if _cache is None:
+        _cache = DiskCache(
+            "pdf_text.sqlite3",
+            max_bytes=int(os.getenv("RESUME_GENIE_PDF_CACHE_MB", "256")) * 1024 * 1024,
+            ttl=int(os.getenv("RESUME_GENIE_PDF_CACHE_TTL", str(30 * 24 * 3600))),
+        )
+    return _cache
+
+
+def get_pool():
+    """Process pool shared by every session in this worker; processes stay warm between uploads."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            started = multiprocessing.Queue()
+            _pool = ProcessPoolExecutor(max_workers=PDF_WORKERS, initializer=_init_worker, initargs=(started,))
+            _pool.started = started
+        return _pool
+
+
+def _init_worker(started):
+    global _worker_started
+    _worker_started = started
+
+
+def _tracked(task_id, fn, *args):
+    _worker_started.put(task_id)
+    return fn(*args)
+
+
+def _collect_started(pool):
+    now = time.monotonic()
+    with _started_lock:
+        while True:
+            try:
+                _started.setdefault(pool.started.get_nowait(), now)
+            except (queue.Empty, OSError, ValueError):
+                return
+
+
+def _reset_pool(pool):
+    """Kill ``pool``'s workers (one is stuck, or one died) and let the next caller start a fresh pool."""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    kill_workers = getattr(pool, "kill_workers", None)  # Python 3.14+
+    if kill_workers is not None:
+        kill_workers()
+    else:
+        for process in list((pool._processes or {}).values()):
+            process.kill()
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _run(calls, timeout):
+    """Run ``(fn, *args)`` calls on the shared pool; each gets ``timeout`` seconds once a worker picks it up.
+
+    Returns one entry per call: its result or the exception it raised. A call
+    that overruns fails with ``PDFExtractionError`` and the pool is killed and
+    replaced, so a hung page never keeps a worker; calls cut off by that (or
+    by a crashed worker, even another caller's) are resubmitted once.
+    """
+    results = [None] * len(calls)
+    todo, retried = list(range(len(calls))), set()
+    while todo:
+        pool, task_ids = get_pool(), {}
+        try:
+            for i in todo:
+                task_id = next(_task_ids)
+                task_ids[pool.submit(_tracked, task_id, *calls[i])] = task_id
+        except BrokenProcessPool:
+            _reset_pool(pool)
+            continue
+        futures = {future: i for future, i in zip(task_ids, todo)}
+        todo, pending, overdue = [], set(futures), []
+        while pending and not overdue:
+            _, pending = wait(pending, timeout=_POLL, return_when=FIRST_COMPLETED)
+            _collect_started(pool)
+            now = time.monotonic()
+            with _started_lock:
+                started = {f: _started[task_ids[f]] for f in pending if task_ids[f] in _started}
+            overdue = [f for f, at in started.items() if now - at > timeout + KILL_GRACE]
+        _collect_started(pool)
+        with _started_lock:
+            for task_id in task_ids.values():
+                _started.pop(task_id, None)
+        broken = False
+        for future, i in futures.items():
+            if future in overdue:
+                results[i] = PDFExtractionError(f"PDF extraction exceeded {timeout:.0f}s")
+            elif future.done() and not future.cancelled() and not isinstance(future.exception(), BrokenProcessPool):
+                results[i] = future.exception() or future.result()
+            else:
+                # Cut off by a reset (this caller's or another's) or by a worker that died
+                broken = broken or (future.done() and not future.cancelled())
+                if i in retried:
+                    results[i] = PDFExtractionError("Could not read PDF: the extraction worker crashed")
+                else:
+                    retried.add(i)
+                    todo.append(i)
+        if overdue or broken:
+            _reset_pool(pool)
+    return results
+
+
+def _open(data):
+    from pypdf import PdfReader
+
+    try:
+        return PdfReader(io.BytesIO(data))
+    except Exception as e:
+        raise PDFExtractionError(f"Could not read PDF: {e}") from e
+
+
+def iter_pdf_pages(data, start=0, stop=None):
+    """Yield the text of each page straight from the PDF bytes, one page at a time.
+
+    Nothing touches the disk: pypdf reads from an in-memory buffer over ``data``.
+    """
+    pages = _open(data).pages
+    for i in range(start, len(pages) if stop is None else min(stop, len(pages))):
+        yield pages[i].extract_text() or ""
+
+
+def _extract_range(data, start, stop, timeout):
+    # Runs inside a pool worker; the deadline starts when the work does
+    deadline = time.monotonic() + timeout
+    pages = []
+    try:
+        for text in iter_pdf_pages(data, start, stop):
+            pages.append(text)
+            if time.monotonic() > deadline:
+                raise PDFExtractionError(f"PDF extraction exceeded {timeout:.0f}s")
+    except PDFExtractionError:
+        raise
+    except Exception as e:
+        raise PDFExtractionError(f"Could not read PDF: {e}") from e
+    return pages
+
+
+def _check_page_count(data):
+    page_count = len(_open(data).pages)
+    if page_count > MAX_PAGES:
+        raise PDFExtractionError(f"PDF has {page_count} pages; the limit is {MAX_PAGES}")
+    return page_count
+
+
+def _extract_document(data):
+    # Pool entry point for batch extraction: one whole document per task
+    return _extract_range(data, 0, _check_page_count(data), EXTRACT_TIMEOUT)
+
+
+def _parse_pdf(data):
+    # Even short documents go to the pool, where a page pypdf hangs on can be killed at the deadline
+    page_count = _check_page_count(data)
+    step = PAGES_PER_TASK if page_count >= PARALLEL_MIN_PAGES and PDF_WORKERS > 1 else max(page_count, 1)
+    calls = [(_extract_range, data, start, start + step, EXTRACT_TIMEOUT) for start in range(0, page_count, step)]
+    pages = []
+    for result in _run(calls, EXTRACT_TIMEOUT):
+        if isinstance(result, PDFExtractionError):
+            raise result
+        if isinstance(result, Exception):
+            raise PDFExtractionError(f"Could not read PDF: {result}") from result
+        pages.extend(result)
+    return pages
+
+
+def _cache_key(data):
+    return f"v{EXTRACTOR_VERSION}:{sha256_hex(data)}"
+
+
+def _cached_pages(key):
+    cached = get_cache().get(key)
+    return None if cached is None else cached.decode("utf-8").split(PAGE_SEPARATOR)
+
+
+def _store(key, pages):
+    pages = [text.replace(PAGE_SEPARATOR, " ") for text in pages]
+    get_cache().set(key, PAGE_SEPARATOR.join(pages).encode("utf-8"))
+    return pages
+
+
+def extract_pdf_pages(data):
+    """Return the list of page texts for a PDF, parsing each distinct file only once."""
+    key = _cache_key(data)
+    pages = _cached_pages(key)
+    if pages is None:
+        pages = _store(key, _parse_pdf(data))
+    return pages
+
+
+def extract_pdf_pages_many(datas):
+    """Extract a batch of PDFs, one document per pool task.
+
+    Returns one entry per input, in order: either the page list or the
+    ``PDFExtractionError`` raised for that file. Each document gets
+    ``EXTRACT_TIMEOUT`` from when a worker starts on it.
+    """
+    keys = [_cache_key(data) for data in datas]
+    results = [_cached_pages(key) for key in keys]
+    missing = [i for i, pages in enumerate(results) if pages is None]
+    for i, result in zip(missing, _run([(_extract_document, datas[i]) for i in missing], EXTRACT_TIMEOUT)):
+        if isinstance(result, PDFExtractionError):
+            results[i] = result
+        elif isinstance(result, Exception):
+            results[i] = PDFExtractionError(f"Could not read PDF: {result}")
+        else:
+            results[i] = _store(keys[i], result)
+    return results
+
+
+def extract_pdf_text(data):
+    return "\n\n".join(extract_pdf_pages(data))
+
+
+def extract_resume_pages(uploaded_file):
+    return extract_pdf_pages(uploaded_file.getvalue())
+
+
+def extract_resume_text(uploaded_file):
+    return extract_pdf_text(uploaded_file.getvalue())
@@ -0,0 +1,76 @@
+# prefetch.py - Speculative background runs of the matcher and cover letter for the sidebar resume + JD
+import os
+import time
+from dataclasses import dataclass, field
+
+from disk_cache import sha256_hex
+from job_queue import DONE, PRIORITY_BACKGROUND, job_key, resume_payload
+
+# ───────────────────────────────────────────────
+# CONFIG
+# ───────────────────────────────────────────────
+# Opt-in: prefetching spends Grok-4 tokens on results the user may never open
+PREFETCH = os.getenv("RESUME_GENIE_PREFETCH", "0") == "1"
+# Prefetched jobs per user per window; past it, tools run only when their button is clicked
+PREFETCH_BUDGET = int(os.getenv("RESUME_GENIE_PREFETCH_BUDGET", "6"))
+PREFETCH_WINDOW = 3600
+# A JD shorter than this is most likely still being pasted or typed
+MIN_JD_CHARS = 200
+
+# Kind of each prefetched job and the tool that picks it up
+PREFETCH_KINDS = ("score", "cover_letter")
+
+
+@dataclass
+class Prefetch:
+    """Prefetch state for one session: the inputs it was started for and the job ids per kind."""
+    inputs: str = ""
+    jobs: dict = field(default_factory=dict)
+    skipped: str = ""
+
+
+def prefetch_payloads(pdf_bytes, job_description):
+    """The exact payloads the matcher (deep analysis) and cover letter submit, so their jobs are these jobs."""
+    return {
+        "score": resume_payload(pdf_bytes, job_description=job_description, deep=True),
+        "cover_letter": resume_payload(pdf_bytes, job_description=job_description),
+    }
+
+
+def inputs_key(pdf_bytes, job_description):
+    if not pdf_bytes or len((job_description or "").strip()) < MIN_JD_CHARS:
+        return ""
+    return sha256_hex(sha256_hex(pdf_bytes) + job_description)
+
+
+def schedule(queue, user, pdf_bytes, job_description, state=None, budget=PREFETCH_BUDGET, window=PREFETCH_WINDOW):
+    """Bring the prefetch for ``user`` in line with the current inputs and return the new ``Prefetch``.
+
+    Unchanged inputs keep the running jobs. Changed or cleared inputs cancel
+    the previous ones, unless someone clicked through to them meanwhile
+    (``submit`` raised their priority). New jobs are queued at background
+    priority after the resume extracts cleanly and while the user's budget
+    lasts; interactive runs are always claimed first.
+    """
+    from pdf_extract import PDFExtractionError, extract_pdf_pages
+
+    state = state or Prefetch()
+    key = inputs_key(pdf_bytes, job_description)
+    if key == state.inputs:
+        return state
+    queue.cancel(list(state.jobs.values()), max_priority=PRIORITY_BACKGROUND)
+    if not key:
+        return Prefetch()
+    try:
+        # Both jobs read the pages from the extraction cache this fills
+        extract_pdf_pages(pdf_bytes)
+    except PDFExtractionError as e:
+        return Prefetch(inputs=key, skipped=str(e))
+    payloads = prefetch_payloads(pdf_bytes, job_description)
+    # Jobs that already exist (finished or in flight) cost nothing more
+    existing = queue.get_many([job_key(kind, payloads[kind]) for kind in PREFETCH_KINDS])
+    new = len(PREFETCH_KINDS) - sum(not job.finished or job.status == DONE for job in existing)
+    if new and queue.submitted(user, time.time() - window, PRIORITY_BACKGROUND) + new > budget:
+        return Prefetch(inputs=key, skipped="prefetch budget used up; run the tools with their buttons")
+    jobs = {kind: queue.submit(kind, payloads[kind], PRIORITY_BACKGROUND, user).id for kind in PREFETCH_KINDS}
+    return Prefetch(inputs=key, jobs=jobs)
@@ -0,0 +1,95 @@
+# prompts.py - Prompt templates shared by the dashboard and headless tools
+from langchain_core.prompts import PromptTemplate
+
+from keyword_matcher import format_keywords, match_keywords
+
+COVER_LETTER_PROMPT = PromptTemplate.from_template("""
+Write a professional cover letter (300–450 words) for this job. Match resume to JD exactly. Standard format.
+Job Description: {job_description}
+Resume: {resume_text}
+Do not invent facts.
+""")
+
+# Keyword lists are computed locally (keyword_matcher) and handed to the model as facts
+RESUME_SCORER_PROMPT = """You are an expert resume scorer. Analyze match to JD. EXACT structure:
+**Score**: X/100
+**Overall Match**: X%
+Readability Score: X/100
+ATS Compatibility Score: X/100
+2-liner summary: ...
+Skill gap analysis: • ...
+Overall improvement suggestions: • ...
+Industry specific feedback: • ...
+Job: {job_description}
+Resume: {context}
+JD keywords found in the resume (precomputed, do not repeat):
+{keywords_matched}
+JD keywords missing from the resume (precomputed, do not repeat):
+{missing_keywords}
+Be honest, use rubrics."""
+
+RESUME_CHECKER_PROMPT = PromptTemplate.from_template("""
+Score resume standalone (clarity, format, ATS, skills): EXACT structure:
+1. **Score**: X/100
+2. **Strengths**: • ...
+3. **Weaknesses**: • ...
+4. **Skills Mentioned**: • ...
+5. **Recommended Skills**: • ...
+6. **Next Career Steps**: • ...
+Resume: {context}
+""")
+
+
+# Structured mode (structured_output.py): compact JSON instead of long markdown.
+# Keyword lists are still computed locally and never echoed back by the model.
+RESUME_SCORER_JSON_PROMPT = """You are an expert resume scorer. Compare the resume with the job description.
+Reply with ONLY one JSON object, no markdown fences, exactly these keys:
+{{"score": 0-100, "match_percent": 0-100, "readability": 0-100, "ats": 0-100,
+"summary": "max 2 sentences", "gaps": ["..."], "suggestions": ["..."], "industry_feedback": ["..."]}}
+Lists: at most 5 items, each under 15 words. Be honest, use rubrics.
+Job: {job_description}
+Resume: {context}
+JD keywords found in the resume (precomputed): {keywords_matched}
+JD keywords missing from the resume (precomputed): {missing_keywords}"""
+
+RESUME_CHECKER_JSON_PROMPT = PromptTemplate.from_template("""
+Score this resume standalone (clarity, format, ATS, skills).
+Reply with ONLY one JSON object, no markdown fences, exactly these keys:
+{{"score": 0-100, "strengths": ["..."], "weaknesses": ["..."], "skills": ["..."],
+"recommended_skills": ["..."], "next_steps": ["..."]}}
+Lists: at most 5 items (skills: at most 15), each under 15 words.
+Resume: {context}
+""")
+
+STRUCTURED_REPAIR_PROMPT = """Your previous reply could not be used: {error}
+Reply again with ONLY the corrected JSON object, exactly these keys: {keys}."""
+
+# Career coach system prompt; the retrieved resume excerpts are appended per question
+COACH_SYSTEM_PROMPT = "You are a career coach. Ground your advice in these resume excerpts:"
+
+# Career coach memory: older turns are folded into this running summary
+CHAT_SUMMARY_PROMPT = PromptTemplate.from_template("""
+Update the running summary of a career-coaching chat. Keep the candidate's goals, target roles,
+decisions, facts they shared and advice already given. Drop small talk. At most {max_words} words.
+Current summary: {summary}
+New messages:
+{messages}
+Updated summary:
+""")
+
+
+def build_scorer_prompt(job_description, context, keywords=None, structured=False):
+    keywords = keywords or match_keywords(context, job_description)
+    if structured:
+        return RESUME_SCORER_JSON_PROMPT.format(
+            job_description=job_description,
+            context=context,
+            keywords_matched=", ".join(keywords.matched) or "None",
+            missing_keywords=", ".join(keywords.missing) or "None",
+        )
+    return RESUME_SCORER_PROMPT.format(
+        job_description=job_description,
+        context=context,
+        keywords_matched=format_keywords(keywords.matched),
+        missing_keywords=format_keywords(keywords.missing),
+    )
@@ -1,16 +1,27 @@
 # app.py
 import streamlit as st
-from langchain_xai import ChatXAI
-from langchain_community.document_loaders import PyPDFLoader
 from langchain_core.prompts import PromptTemplate
 import os
-import tempfile
+from pdf_extract import extract_pdf_pages_many
+from compaction import compact_resume
+from prompts import RESUME_CHECKER_JSON_PROMPT
+from structured_output import STRUCTURED, STRUCTURED_MAX_TOKENS, CheckerResult
+from llm_gateway import get_chat_model, user_config
+from model_router import DEEP, FAST, FAST_MODEL, ModelRouter, NotAResume
+from telemetry import span, start_metrics_server
 
 # ───────────────────────────────────────────────
 #  Config
 # ───────────────────────────────────────────────
 st.set_page_config(page_title="Resume Checker (Grok)", layout="wide")
 
+@st.cache_resource
+def start_metrics():
+    # One Prometheus /metrics endpoint per server process
+    return start_metrics_server()
+
+start_metrics()
+
 XAI_API_KEY = "APY KEY"
 os.environ["XAI_API_KEY"] = XAI_API_KEY
 
@@ -25,15 +36,18 @@ if not XAI_API_KEY:
 #  LLM
 # ───────────────────────────────────────────────
 @st.cache_resource(show_spinner="Initializing Grok model...")
-def get_llm():
-    return ChatXAI(
-        model="grok-4",           # or "grok-beta" etc. — check what's currently available
-        api_key=XAI_API_KEY,
-        temperature=0.1,
-        max_tokens=2000,
-    )
+def get_router():
+    llm = get_chat_model(XAI_API_KEY, model="grok-4", temperature=0.1, max_tokens=2000)
+    # Structured mode returns compact JSON instead of the long markdown report
+    structured_llm = get_chat_model(XAI_API_KEY, model="grok-4", temperature=0.1, max_tokens=STRUCTURED_MAX_TOKENS)
+    # The fast model answers first (structured mode only); Grok-4 when it is not confident
+    fast = None, get_chat_model(XAI_API_KEY, FAST_MODEL, temperature=0.1, max_tokens=STRUCTURED_MAX_TOKENS)
+    return ModelRouter({FAST: lambda: fast, DEEP: lambda: (llm, structured_llm)})
 
-llm = get_llm()
+router = get_router()
+
+# Evaluations in flight at once when several resumes are uploaded together
+MAX_CONCURRENCY = int(os.getenv("RESUME_GENIE_CHECKER_CONCURRENCY", "8"))
 
 # ───────────────────────────────────────────────
 #  Prompt (same as yours)
@@ -76,55 +90,75 @@ prompt_template = PromptTemplate(
     template=EVAL_PROMPT
 )
 
+# The prompt each resume is actually sent, and its name on the telemetry spans
+if STRUCTURED:
+    PROMPT, PROMPT_NAME = RESUME_CHECKER_JSON_PROMPT, "RESUME_CHECKER_JSON_PROMPT"
+else:
+    PROMPT, PROMPT_NAME = prompt_template, "EVAL_PROMPT"
+
 # ───────────────────────────────────────────────
 #  UI
 # ───────────────────────────────────────────────
 st.title("📄 Resume Checker powered by Grok-4 (xAI)")
-st.markdown("Upload your resume (PDF) → get a detailed score & improvement suggestions")
+st.markdown("Upload one or more resumes (PDF) → get a detailed score & improvement suggestions for each")
 
 col1, col2 = st.columns([3, 2])
 
 with col1:
-    uploaded_file = st.file_uploader(
-        "Upload your resume (PDF only)",
+    uploaded_files = st.file_uploader(
+        "Upload resumes (PDF only)",
         type=["pdf"],
-        accept_multiple_files=False,
-        help="Only PDF files are supported at the moment"
+        accept_multiple_files=True,
+        help="Only PDF files are supported at the moment. Upload several to check a whole candidate pool."
     )
 
-    evaluate_button = st.button("Evaluate Resume", type="primary", disabled=not uploaded_file)
-
-if evaluate_button and uploaded_file:
-    with st.spinner("Reading PDF... → Extracting text... → Asking Grok to evaluate..."):
-        try:
-            # Save uploaded file temporarily
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp_file:
-                tmp_file.write(uploaded_file.read())
-                tmp_path = tmp_file.name
-
-            # Load PDF
-            loader = PyPDFLoader(tmp_path)
-            documents = loader.load()
-            context = "\n\n".join(doc.page_content for doc in documents)
-
-            # Clean up
-            os.unlink(tmp_path)
-
-            if not context.strip():
-                st.error("No readable text was extracted from the PDF.")
-                st.stop()
-
-            # Prepare and invoke
-            chain = prompt_template | llm
-            response = chain.invoke({"context": context})
-
-            # ── Output ────────────────────────────────────────
-            st.subheader("Evaluation Result")
-            st.markdown(response.content)
-
-        except Exception as e:
-            st.error("An error occurred during processing.")
-            st.exception(e)
+    evaluate_button = st.button("Evaluate Resumes", type="primary", disabled=not uploaded_files)
+
+if evaluate_button and uploaded_files:
+    with st.spinner("Reading PDFs... → Extracting text..."), span("checker", "extract", files=len(uploaded_files)):
+        extracted = extract_pdf_pages_many([f.getvalue() for f in uploaded_files])
+
+    st.subheader("Evaluation Results")
+
+    # One card per file, filled in as soon as that file's evaluation finishes
+    inputs, slots, names = [], [], []
+    for uploaded_file, pages in zip(uploaded_files, extracted):
+        card = st.container(border=True)
+        card.markdown(f"#### 📄 {uploaded_file.name}")
+        if isinstance(pages, Exception):
+            card.error(f"Could not read the PDF: {pages}")
+        elif not "".join(pages).strip():
+            card.error("No readable text was extracted from the PDF.")
+        else:
+            with span("checker", "prompt", prompt=PROMPT_NAME):
+                compacted = compact_resume(pages, "checker")
+            card.caption(f"✂️ {compacted.summary}")
+            slot = card.empty()
+            slot.info("⏳ Asking Grok to evaluate...")
+            inputs.append({"context": compacted.text})
+            slots.append(slot)
+            names.append(uploaded_file.name)
+
+    # Local resume checks first, so PDFs that are not resumes never reach a model
+    chain = router.runnable("checker", PROMPT, CheckerResult if STRUCTURED else None)
+    config = {**user_config("checker"), "max_concurrency": MAX_CONCURRENCY}
+    scores = []
+    for i, response in chain.batch_as_completed(inputs, config, return_exceptions=True):
+        if isinstance(response, NotAResume):
+            slots[i].warning(f"🚫 {response}")
+        elif isinstance(response, Exception):
+            slots[i].error(f"An error occurred during processing: {response}")
+        else:
+            box = slots[i].container()
+            box.caption(response.label)
+            box.markdown(response.result.markdown() if STRUCTURED else response.result)
+            if STRUCTURED:
+                scores.append((response.result.score, names[i]))
+
+    if len(scores) > 1:
+        st.subheader("Ranking")
+        st.markdown("\n".join(f"{rank}. **{score}/100** — {name}"
+                               for rank, (score, name) in enumerate(sorted(scores, reverse=True), 1)))
 
 # Footer / credits
 st.markdown("---")
@@ -0,0 +1,151 @@
+# resume_dedup.py - Near-duplicate resume detection: MinHash signatures over word shingles + an LSH index
+import base64
+import os
+import re
+import zlib
+from dataclasses import dataclass
+
+import numpy as np
+
+# ───────────────────────────────────────────────
+# CONFIG
+# ───────────────────────────────────────────────
+# Estimated Jaccard similarity of the shingle sets above which two resumes count as the same one
+DEDUP_THRESHOLD = float(os.getenv("RESUME_GENIE_DEDUP_THRESHOLD", "0.85"))
+NUM_PERM = 128
+SHINGLE_WORDS = 4
+
+_WORD_RE = re.compile(r"[a-z0-9]+(?:[+#.'-][a-z0-9]+)*")
+# Mersenne prime modulus: a, b, x < 2**31 keep a * x + b inside uint64
+_PRIME = (1 << 31) - 1
+_MASK = (1 << 32) - 1
+
+
+def shingles(text, k=SHINGLE_WORDS):
+    """32-bit hashes of the text's overlapping ``k``-word shingles (case, punctuation and layout ignored)."""
+    words = _WORD_RE.findall(text.lower())
+    if not words:
+        return np.zeros(0, dtype=np.uint64)
+    tokens = np.fromiter((zlib.crc32(w.encode("utf-8")) for w in words), dtype=np.uint64, count=len(words))
+    if len(tokens) < k:
+        k = len(tokens)
+    # Polynomial combination of k consecutive token hashes, kept to 32 bits
+    h = np.zeros(len(tokens) - k + 1, dtype=np.uint64)
+    for i in range(k):
+        h = (h * np.uint64(1000003) + tokens[i:len(tokens) - k + 1 + i]) & np.uint64(_MASK)
+    return np.unique(h)
+
+
+class MinHasher:
+    """``num_perm`` universal hash functions (a * x + b) mod p; a signature is each one's minimum over the shingles."""
+
+    def __init__(self, num_perm=NUM_PERM, k=SHINGLE_WORDS, seed=1):
+        rng = np.random.default_rng(seed)
+        self.a = rng.integers(1, _PRIME, size=num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, _PRIME, size=num_perm, dtype=np.uint64)
+        self.num_perm = num_perm
+        self.k = k
+
+    def signature(self, text):
+        values = shingles(text, self.k)
+        if not len(values):
+            return np.full(self.num_perm, _MASK, dtype=np.uint32)
+        values = values % np.uint64(_PRIME)
+        hashed = (np.outer(self.a, values) + self.b[:, None]) % np.uint64(_PRIME)
+        return hashed.min(axis=1).astype(np.uint32)
+
+
+def similarity(a, b):
+    """Estimated Jaccard similarity of two signatures."""
+    return float(np.count_nonzero(a == b)) / len(a)
+
+
+def encode_signature(signature):
+    return base64.b64encode(np.asarray(signature, dtype="<u4").tobytes()).decode("ascii")
+
+
+def decode_signature(text):
+    return np.frombuffer(base64.b64decode(text), dtype="<u4").astype(np.uint32)
+
+
+def lsh_bands(threshold, num_perm=NUM_PERM):
+    """(bands, rows per band) whose collision curve (1/bands)**(1/rows) sits just below ``threshold``,
+    so pairs at the threshold almost always share a bucket."""
+    options = [(b, num_perm // b) for b in range(1, num_perm + 1) if num_perm % b == 0]
+    below = [(b, r) for b, r in options if (1 / b) ** (1 / r) <= threshold]
+    return max(below, key=lambda br: (1 / br[0]) ** (1 / br[1])) if below else options[-1]
+
+
+# ───────────────────────────────────────────────
+# LSH INDEX
+# ───────────────────────────────────────────────
+@dataclass
+class Duplicate:
+    key: str
+    canonical: str
+    similarity: float
+
+
+class LSHIndex:
+    """Banded LSH over MinHash signatures: an insert or query touches one bucket per band, so
+    deduplicating n resumes costs O(n) plus the (few) candidate comparisons."""
+
+    def __init__(self, threshold=DEDUP_THRESHOLD, num_perm=NUM_PERM):
+        self.threshold = threshold
+        self.bands, self.rows = lsh_bands(threshold, num_perm)
+        self._buckets = [{} for _ in range(self.bands)]
+        self._signatures = {}
+
+    def __len__(self):
+        return len(self._signatures)
+
+    def _band_keys(self, signature):
+        return [signature[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+    def add(self, key, signature):
+        self._signatures[key] = signature
+        for bucket, band in zip(self._buckets, self._band_keys(signature)):
+            bucket.setdefault(band, []).append(key)
+
+    def query(self, signature):
+        """Indexed keys at or above the threshold, most similar first, as (key, similarity)."""
+        candidates = set()
+        for bucket, band in zip(self._buckets, self._band_keys(signature)):
+            candidates.update(bucket.get(band, ()))
+        scored = ((key, similarity(signature, self._signatures[key])) for key in candidates)
+        return sorted(((k, s) for k, s in scored if s >= self.threshold), key=lambda ks: -ks[1])
+
+
+class Deduplicator:
+    """Streams resumes through MinHash + LSH; the first copy of each resume is its canonical one.
+
+    Only canonical copies are indexed, so every duplicate points straight at
+    a canonical resume (never at another duplicate).
+    """
+
+    def __init__(self, threshold=DEDUP_THRESHOLD, num_perm=NUM_PERM, hasher=None):
+        self.hasher = hasher or MinHasher(num_perm)
+        self.index = LSHIndex(threshold, self.hasher.num_perm)
+
+    def add(self, key, text=None, signature=None):
+        """Index ``key`` unless it near-duplicates an indexed resume; returns the ``Duplicate`` or None."""
+        if signature is None:
+            signature = self.hasher.signature(text)
+        matches = self.index.query(signature)
+        if matches:
+            return Duplicate(key, *matches[0])
+        self.index.add(key, signature)
+        return None
+
+
+def find_duplicates(texts, threshold=DEDUP_THRESHOLD):
+    """{position: Duplicate} for the texts that near-duplicate an earlier one; ``None`` texts are skipped."""
+    dedup = Deduplicator(threshold)
+    found = {}
+    for i, text in enumerate(texts):
+        if text is None:
+            continue
+        duplicate = dedup.add(i, text)
+        if duplicate is not None:
+            found[i] = duplicate
+    return found
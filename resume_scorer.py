@@ -1,10 +1,15 @@
 # app.py
 import streamlit as st
-from langchain_xai import ChatXAI
-from langchain_community.document_loaders import PyPDFLoader
 import os
-import io
-import tempfile
+from pdf_extract import extract_resume_pages
+from compaction import compact_resume
+from local_scorer import score_match
+from keyword_matcher import format_keywords, match_keywords
+from llm_gateway import get_chat_model, user_config
+from model_router import DEEP, ModelRouter
+from prompts import build_scorer_prompt
+from telemetry import span, start_metrics_server
+from structured_output import STRUCTURED, STRUCTURED_MAX_TOKENS, ScorerResult
 
 # ───────────────────────────────────────────────
 #   CONFIG
@@ -20,6 +25,14 @@ if not XAI_API_KEY:
     st.error("XAI_API_KEY not found. Please set it in secrets or environment.")
     st.stop()
 
+@st.cache_resource(show_spinner=False)
+def get_router():
+    # The scorer only calls a model for the deep analysis, which goes straight to Grok-4.
+    # Low temperature → more consistent scoring
+    chat = get_chat_model(XAI_API_KEY, model="grok-4", temperature=0.2, max_tokens=2200)
+    structured_chat = get_chat_model(XAI_API_KEY, model="grok-4", temperature=0.2, max_tokens=STRUCTURED_MAX_TOKENS)
+    return ModelRouter({DEEP: lambda: (chat, structured_chat)})
+
 # The template we refined earlier
 PROMPT_TEMPLATE = """You are an expert resume scorer and ATS optimization specialist with deep knowledge of recruitment practices across industries.
 
@@ -31,17 +44,17 @@ Job Description:
 Candidate's Resume:
 {context}
 
+JD keywords found in the resume (precomputed by exact matching — treat as fact, do not list them again):
+{keywords_matched}
+
+JD keywords missing from the resume (precomputed by exact matching — treat as fact, do not list them again):
+{missing_keywords}
+
 Produce the analysis using **exactly** the following structure and headings (do not add/remove sections, do not change headings):
 
 Score: [integer]/100  
 Overall Match: [integer]%  
 
-Keywords matched:  
-• [bullet list of important keywords/phrases from JD that DO appear in the resume]  
-
-Missing keywords:  
-• [bullet list of important/hard-required keywords/phrases from JD that are completely absent or extremely weakly represented in the resume]  
-
 Readability Score: [integer]/100  
 ATS Compatibility Score: [integer]/100  
 
@@ -75,6 +88,13 @@ Be honest, direct, and constructive. If the match is very poor, say so clearly.
 
 st.set_page_config(page_title="Resume Scorer", layout="wide")
 
+@st.cache_resource
+def start_metrics():
+    # One Prometheus /metrics endpoint per server process
+    return start_metrics_server()
+
+start_metrics()
+
 st.title("📄 Resume Matcher & Scorer")
 st.markdown("Upload your resume (PDF) and paste the job description to get a detailed match analysis powered by Grok-4.")
 
@@ -96,22 +116,20 @@ with col2:
     if uploaded_file is not None:
         st.success("Resume uploaded ✓")
 
+    deep_analysis = st.checkbox(
+        "Include the detailed Grok-4 analysis (20–60 seconds)",
+        help="The match score and requirement coverage are computed locally; Grok-4 adds the written feedback."
+    )
+
 # ── Analyze button ────────────────────────────────────────
 
 if st.button("Analyze Resume Match", type="primary", disabled=not (uploaded_file and job_description.strip())):
 
     with st.spinner("Extracting resume text..."):
         try:
-            # Save uploaded file temporarily
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp_file:
-                tmp_file.write(uploaded_file.getvalue())
-                tmp_path = tmp_file.name
-
-            loader = PyPDFLoader(tmp_path)
-            documents = loader.load()
-            context = "\n\n".join(doc.page_content for doc in documents)
-
-            os.unlink(tmp_path)  # clean up
+            with span("scorer", "extract"):
+                pages = extract_resume_pages(uploaded_file)
+            context = "\n\n".join(pages)
 
         except Exception as e:
             st.error(f"Could not read the PDF: {e}")
@@ -121,27 +139,62 @@ if st.button("Analyze Resume Match", type="primary", disabled=not (uploaded_file
         st.error("No readable text found in the resume PDF.")
         st.stop()
 
-    # Build final prompt
-    prompt = PROMPT_TEMPLATE.format(
-        job_description=job_description.strip(),
-        context=context.strip()
-    )
+    with span("scorer", "local_score"):
+        local = score_match(context, job_description)
+        keywords = match_keywords(context, job_description)
+    st.subheader("⚡ Quick Match")
+    m1, m2 = st.columns(2)
+    m1.metric("Score", f"{local.score}/100")
+    m2.metric("Overall Match", f"{local.match_percent}%")
+    with st.expander("Requirement coverage", expanded=not deep_analysis):
+        for c in local.coverage:
+            st.markdown(f"{'✅' if c.covered else '❌'} {c.requirement}")
+
+    k1, k2 = st.columns(2)
+    with k1:
+        st.markdown("**Keywords matched**")
+        st.markdown(format_keywords(keywords.matched, bullet="-"))
+    with k2:
+        st.markdown("**Missing keywords**")
+        st.markdown(format_keywords(keywords.missing, bullet="-"))
+
+    if not deep_analysis:
+        st.stop()
+
+    # Build final prompt from the token-budgeted resume
+    with span("scorer", "prompt", prompt="RESUME_SCORER_JSON_PROMPT" if STRUCTURED else "PROMPT_TEMPLATE"):
+        compacted = compact_resume(pages, "scorer", job_description)
+        if STRUCTURED:
+            # Compact JSON answer, parsed into a ScorerResult
+            prompt = build_scorer_prompt(job_description.strip(), compacted.text, keywords, structured=True)
+        else:
+            prompt = PROMPT_TEMPLATE.format(
+                job_description=job_description.strip(),
+                context=compacted.text,
+                keywords_matched=format_keywords(keywords.matched),
+                missing_keywords=format_keywords(keywords.missing)
+            )
+    st.caption(f"✂️ {compacted.summary}")
 
     with st.spinner("Analyzing with Grok-4 (this can take 20–60 seconds)..."):
 
         try:
-            chat = ChatXAI(
-                model="grok-4",
-                api_key=XAI_API_KEY,
-                temperature=0.2,          # low randomness → more consistent scoring
-                max_tokens=2200
-            )
-
-            response = chat.invoke(prompt)
-            analysis_text = response.content
+            routed = get_router().invoke("scorer", prompt, ScorerResult if STRUCTURED else None, compacted.text,
+                                         user_config("scorer"), deep=True)
 
             st.subheader("📊 Resume Analysis Result")
-            st.markdown(analysis_text)
+            st.caption(routed.label)
+            if STRUCTURED:
+                result = routed.result
+                result.keywords_matched, result.keywords_missing = keywords.matched, keywords.missing
+                g1, g2, g3, g4 = st.columns(4)
+                g1.metric("Grok-4 score", f"{result.score}/100")
+                g2.metric("Match", f"{result.match_percent}%")
+                g3.metric("Readability", f"{result.readability}/100")
+                g4.metric("ATS", f"{result.ats}/100")
+                st.markdown(result.markdown())
+            else:
+                st.markdown(routed.result)
 
         except Exception as e:
             st.error(f"API error: {str(e)}")
@@ -0,0 +1,100 @@
+# startup_profile.py - Measure Streamlit app cold start: per-module import time and no-op rerun cost
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+_MARKER = "--- app script starts ---"
+_IMPORTTIME_RE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+_RUN_APP = f"""
+import sys
+from streamlit.testing.v1 import AppTest
+print({_MARKER!r}, file=sys.stderr, flush=True)
+AppTest.from_file(sys.argv[1], default_timeout=120).run()
+"""
+
+
+def import_profile(script):
+    """Top-level modules first imported by ``script`` with their cumulative import time (ms).
+
+    Runs the app once under ``python -X importtime`` in a fresh interpreter;
+    Streamlit's own imports happen before the marker and are left out.
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _RUN_APP, script],
+        capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(script)) or ".",
+    )
+    _, _, after = proc.stderr.partition(_MARKER)
+    modules = []
+    for line in after.splitlines():
+        match = _IMPORTTIME_RE.match(line)
+        if match and len(match.group(3)) == 1:  # one space of indent: imported directly, not nested
+            modules.append((int(match.group(2)) / 1000, match.group(4)))
+    return sorted(modules, reverse=True)
+
+
+def _time_script_body():
+    """Record how long each run spends executing the script itself.
+
+    AppTest recompiles the script on every run (the real server caches the
+    bytecode), so timing ``app.run()`` would mostly measure the compiler.
+    """
+    from streamlit.runtime.scriptrunner import script_runner
+
+    durations = []
+    run_script = script_runner.exec_func_with_error_handling
+
+    def timed(func, ctx):
+        started = time.perf_counter()
+        try:
+            return run_script(func, ctx)
+        finally:
+            durations.append(time.perf_counter() - started)
+
+    script_runner.exec_func_with_error_handling = timed
+    return durations
+
+
+def rerun_profile(script, reruns=5):
+    """Script time for the cold first run, the median no-op rerun, and switching to each sidebar tool (seconds)."""
+    from streamlit.testing.v1 import AppTest
+
+    durations = _time_script_body()
+    app = AppTest.from_file(script, default_timeout=120)
+    app.run()
+    timings = {"cold run": durations[-1]}
+
+    for _ in range(reruns):
+        app.run()
+    timings["no-op rerun (median)"] = statistics.median(durations[-reruns:])
+
+    if app.sidebar.radio:
+        for option in app.sidebar.radio[0].options:
+            app.sidebar.radio[0].set_value(option).run()  # element handles go stale after each run
+            timings[f"switch to {option}"] = durations[-1]
+    return timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Profile a Streamlit app's cold start and rerun cost")
+    parser.add_argument("script", nargs="?", default="main_dashboard.py")
+    parser.add_argument("--top", type=int, default=15, help="modules to list")
+    parser.add_argument("--reruns", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    modules = import_profile(args.script)
+    print(f"Imports triggered by {args.script}: {sum(ms for ms, _ in modules):.0f} ms total")
+    for ms, name in modules[:args.top]:
+        print(f"  {ms:8.1f} ms  {name}")
+
+    print("Script runs:")
+    for label, seconds in rerun_profile(args.script, args.reruns).items():
+        print(f"  {seconds * 1000:8.1f} ms  {label}")
+
+
+if __name__ == "__main__":
+    main()
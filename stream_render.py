@@ -0,0 +1,76 @@
+# stream_render.py - Throttled Streamlit renderer for streamed LLM output
+import os
+import time
+
+import streamlit as st
+
+# Push at most one UI update per interval, or sooner once this many characters are waiting
+FLUSH_INTERVAL = float(os.getenv("RESUME_GENIE_STREAM_FLUSH_MS", "80")) / 1000
+FLUSH_CHARS = 800
+CURSOR = "▌"
+
+
+class StreamRenderer:
+    """Buffers streamed chunks and redraws ``container`` on a time/size cadence.
+
+    Chunks are appended to a list and joined only when the UI is updated, so a
+    long answer costs dozens of markdown pushes instead of one per token.
+    ``ttft`` (seconds to the first non-empty chunk), ``chars`` and ``updates``
+    are available once the stream has finished.
+    """
+
+    def __init__(self, container=None, interval=FLUSH_INTERVAL, flush_chars=FLUSH_CHARS):
+        self.container = container if container is not None else st.empty()
+        self.interval = interval
+        self.flush_chars = flush_chars
+        self.started = time.perf_counter()
+        self.ttft = None
+        self.duration = None
+        self.chars = 0
+        self.updates = 0
+        self._parts = []
+        self._pending = 0
+        self._last_flush = self.started
+
+    @property
+    def text(self):
+        if len(self._parts) > 1:
+            self._parts = ["".join(self._parts)]
+        return self._parts[0] if self._parts else ""
+
+    def write(self, chunk):
+        content = chunk.content if hasattr(chunk, "content") else str(chunk)
+        if not isinstance(content, str) or not content:
+            return
+        now = time.perf_counter()
+        if self.ttft is None:
+            self.ttft = now - self.started
+        self._parts.append(content)
+        self.chars += len(content)
+        self._pending += len(content)
+        if now - self._last_flush >= self.interval or self._pending >= self.flush_chars:
+            self._flush(CURSOR, now)
+
+    def _flush(self, suffix, now):
+        self.container.markdown(self.text + suffix)
+        self.updates += 1
+        self._pending = 0
+        self._last_flush = now
+
+    def close(self):
+        """Draw the final text without the cursor and return it."""
+        now = time.perf_counter()
+        self._flush("", now)
+        self.duration = now - self.started
+        return self.text
+
+    def consume(self, chunks):
+        """Render an entire chunk iterator and return the full text."""
+        for chunk in chunks:
+            self.write(chunk)
+        return self.close()
+
+    @property
+    def summary(self):
+        ttft = f"{self.ttft:.1f}s" if self.ttft is not None else "—"
+        return f"First token {ttft} • {self.chars:,} chars in {self.duration or 0:.1f}s ({self.updates} UI updates)"
@@ -0,0 +1,231 @@
+# structured_output.py - Compact JSON mode for the scorer and checker, validated into typed results
+import json
+import os
+import re
+from dataclasses import asdict, dataclass, field, fields
+from functools import lru_cache
+from typing import get_type_hints
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.runnables import RunnableLambda
+
+from llm_cache import to_messages
+from prompts import STRUCTURED_REPAIR_PROMPT
+from telemetry import span
+
+# "json" asks Grok for the compact schema below; "markdown" keeps the long free-form reports
+OUTPUT_MODE = os.getenv("RESUME_GENIE_OUTPUT_MODE", "json")
+STRUCTURED = OUTPUT_MODE == "json"
+STRUCTURED_MAX_TOKENS = int(os.getenv("RESUME_GENIE_STRUCTURED_MAX_TOKENS", "700"))
+MAX_REPAIRS = 1
+MAX_ITEMS = 15
+
+_FENCE_RE = re.compile(r"^\s*```(?:json)?\s*|\s*```\s*$", re.IGNORECASE)
+_NUMBER_RE = re.compile(r"-?\d+(?:\.\d+)?")
+
+
+class StructuredOutputError(ValueError):
+    def __init__(self, message, raw=""):
+        super().__init__(message)
+        self.raw = raw
+
+
+# ───────────────────────────────────────────────
+# VALIDATION
+# ───────────────────────────────────────────────
+def _score(value):
+    if isinstance(value, bool):
+        raise ValueError("expected a number")
+    if isinstance(value, str):
+        match = _NUMBER_RE.search(value)  # "85", "85%", "85/100"
+        if not match:
+            raise ValueError(f"expected a number, got {value!r}")
+        value = match.group()
+    return max(0, min(100, int(round(float(value)))))
+
+
+def _text(value):
+    if isinstance(value, list):
+        value = " ".join(map(str, value))
+    return str(value).strip()
+
+
+def _items(value):
+    if isinstance(value, str):
+        value = [v for v in re.split(r"\n|;|•", value)]
+    if not isinstance(value, list):
+        raise ValueError("expected a list")
+    items = [re.sub(r"^\s*[-*•]\s*", "", str(v)).strip() for v in value]
+    return [v for v in items if v][:MAX_ITEMS]
+
+
+_COERCE = {int: _score, str: _text, list: _items}
+
+
+def parse_json_object(text):
+    """The JSON object in a model reply, tolerating code fences and stray prose around it."""
+    text = _FENCE_RE.sub("", text or "")
+    start, end = text.find("{"), text.rfind("}")
+    if start < 0 or end <= start:
+        raise StructuredOutputError("no JSON object found", text)
+    try:
+        data = json.loads(text[start:end + 1])
+    except ValueError as e:
+        raise StructuredOutputError(f"invalid JSON ({e})", text) from None
+    if not isinstance(data, dict):
+        raise StructuredOutputError("expected a JSON object", text)
+    return data
+
+
+@lru_cache(maxsize=None)
+def _coercers(cls):
+    # Resolved hints, so string annotations (or ``from __future__ import annotations``) still find their coercer
+    hints = get_type_hints(cls)
+    return {f.name: _COERCE[hints[f.name]] for f in fields(cls)}
+
+
+def _from_dict(cls, data, raw=""):
+    values, problems = {}, []
+    coercers = _coercers(cls)
+    for f in fields(cls):
+        if f.metadata.get("local"):
+            continue  # filled in by the caller, not asked of the model
+        if f.name not in data:
+            problems.append(f"missing key {f.name!r}")
+            continue
+        try:
+            values[f.name] = coercers[f.name](data[f.name])
+        except (TypeError, ValueError) as e:
+            problems.append(f"{f.name}: {e}")
+    if problems:
+        raise StructuredOutputError("; ".join(problems), raw)
+    return cls(**values)
+
+
+def _bullets(items):
+    return "\n".join(f"- {item}" for item in items) if items else "- None"
+
+
+# ───────────────────────────────────────────────
+# RESULT TYPES
+# ───────────────────────────────────────────────
+@dataclass(slots=True)
+class ScorerResult:
+    score: int
+    match_percent: int
+    readability: int
+    ats: int
+    summary: str
+    gaps: list
+    suggestions: list
+    industry_feedback: list
+    keywords_matched: list = field(default_factory=list, metadata={"local": True})
+    keywords_missing: list = field(default_factory=list, metadata={"local": True})
+
+    @classmethod
+    def parse(cls, text):
+        return _from_dict(cls, parse_json_object(text), text)
+
+    def as_dict(self):
+        return asdict(self)
+
+    def markdown(self):
+        return (
+            f"**Summary**: {self.summary}\n\n"
+            f"**Skill gaps**\n{_bullets(self.gaps)}\n\n"
+            f"**Suggestions**\n{_bullets(self.suggestions)}\n\n"
+            f"**Industry feedback**\n{_bullets(self.industry_feedback)}"
+        )
+
+
+@dataclass(slots=True)
+class CheckerResult:
+    score: int
+    strengths: list
+    weaknesses: list
+    skills: list
+    recommended_skills: list
+    next_steps: list
+
+    @classmethod
+    def parse(cls, text):
+        return _from_dict(cls, parse_json_object(text), text)
+
+    def as_dict(self):
+        return asdict(self)
+
+    def markdown(self):
+        return (
+            f"**Score**: {self.score}/100\n\n"
+            f"**Strengths**\n{_bullets(self.strengths)}\n\n"
+            f"**Weaknesses**\n{_bullets(self.weaknesses)}\n\n"
+            f"**Skills mentioned**: {', '.join(self.skills) or 'None'}\n\n"
+            f"**Recommended skills**: {', '.join(self.recommended_skills) or 'None'}\n\n"
+            f"**Next career steps**\n{_bullets(self.next_steps)}"
+        )
+
+
+# ───────────────────────────────────────────────
+# CALLING THE MODEL
+# ───────────────────────────────────────────────
+def _repair_messages(messages, reply, error, result_cls):
+    keys = ", ".join(f.name for f in fields(result_cls) if not f.metadata.get("local"))
+    return messages + [
+        AIMessage(content=reply),
+        HumanMessage(content=STRUCTURED_REPAIR_PROMPT.format(error=error, keys=keys)),
+    ]
+
+
+def _forget(llm, messages):
+    # An unparseable reply must not be replayed from the response cache on the next run
+    forget = getattr(llm, "forget", None)
+    if forget is not None:
+        forget(messages)
+
+
+def _parse(result_cls, reply, config):
+    # The tool's "parse" step; a reply that fails validation is counted as a step error
+    tool = ((config or {}).get("metadata") or {}).get("tool") or "other"
+    with span(tool, "parse", result=result_cls.__name__):
+        return result_cls.parse(reply)
+
+
+def invoke_structured(llm, prompt, result_cls, config=None):
+    """Ask ``llm`` for ``result_cls`` JSON; on a malformed reply, show the model its error and retry."""
+    messages = to_messages(prompt)
+    reply = llm.invoke(messages, config).content
+    for attempt in range(MAX_REPAIRS + 1):
+        try:
+            return _parse(result_cls, reply, config)
+        except StructuredOutputError as e:
+            _forget(llm, messages)
+            if attempt == MAX_REPAIRS:
+                raise
+            messages = _repair_messages(messages, reply, e, result_cls)
+            reply = llm.invoke(messages, config).content
+
+
+async def ainvoke_structured(llm, prompt, result_cls, config=None):
+    messages = to_messages(prompt)
+    reply = (await llm.ainvoke(messages, config)).content
+    for attempt in range(MAX_REPAIRS + 1):
+        try:
+            return _parse(result_cls, reply, config)
+        except StructuredOutputError as e:
+            _forget(llm, messages)
+            if attempt == MAX_REPAIRS:
+                raise
+            messages = _repair_messages(messages, reply, e, result_cls)
+            reply = (await llm.ainvoke(messages, config)).content
+
+
+def structured(llm, result_cls):
+    """Runnable for ``PROMPT | structured(llm, CheckerResult)`` chains (invoke, batch, batch_as_completed)."""
+
+    def run(prompt, config):
+        return invoke_structured(llm, prompt, result_cls, config)
+
+    async def arun(prompt, config):
+        return await ainvoke_structured(llm, prompt, result_cls, config)
+
+    return RunnableLambda(run, afunc=arun, name=f"structured_{result_cls.__name__}")
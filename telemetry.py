@@ -0,0 +1,229 @@
+# telemetry.py - Step timing spans, LLM latency/token metrics and a Prometheus /metrics endpoint
+import bisect
+import os
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Port for the Prometheus scrape endpoint on 127.0.0.1; 0 turns it off
+METRICS_PORT = int(os.getenv("RESUME_GENIE_METRICS_PORT", "9464"))
+METRICS_HOST = os.getenv("RESUME_GENIE_METRICS_HOST", "127.0.0.1")
+# Recent durations kept per (tool, step) for the admin panel's p50/p95
+RECENT_SAMPLES = 500
+
+SECONDS_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+TOKEN_BUCKETS = (100, 250, 500, 1000, 2000, 3000, 4000, 6000, 8000, 16000)
+
+
+# ───────────────────────────────────────────────
+# METRICS
+# ───────────────────────────────────────────────
+class Histogram:
+    """Prometheus-style cumulative histogram keyed by label values, plus a window of recent samples."""
+
+    def __init__(self, name, help_text, labels, buckets):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self.buckets = buckets
+        self._series = {}
+        self._recent = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        with self._lock:
+            counts = self._series.setdefault(label_values, [[0] * (len(self.buckets) + 1), 0.0])
+            counts[0][bisect.bisect_left(self.buckets, value)] += 1
+            counts[1] += value
+            self._recent.setdefault(label_values, deque(maxlen=RECENT_SAMPLES)).append(value)
+
+    def quantiles(self, *qs):
+        """{label values: (count, q1, q2, ...)} over the recent window."""
+        with self._lock:
+            recent = {key: sorted(values) for key, values in self._recent.items()}
+        out = {}
+        for key, values in recent.items():
+            out[key] = (len(values), *(values[min(len(values) - 1, int(q * len(values)))] for q in qs))
+        return out
+
+    def expose(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {key: (list(counts), total) for key, (counts, total) in self._series.items()}
+        for key, (counts, total) in sorted(series.items()):
+            labels = ",".join(f'{name}="{value}"' for name, value in zip(self.labels, key))
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{labels}}} {total:.6f}")
+            lines.append(f"{self.name}_count{{{labels}}} {cumulative}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name, help_text, labels):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def expose(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = dict(self._values)
+        for key, value in sorted(values.items()):
+            labels = ",".join(f'{name}="{value}"' for name, value in zip(self.labels, key))
+            lines.append(f"{self.name}{{{labels}}} {value}")
+        return lines
+
+
+STEP_SECONDS = Histogram("resume_genie_step_seconds", "Duration of one step of a tool run",
+                         ("tool", "step"), SECONDS_BUCKETS)
+STEP_ERRORS = Counter("resume_genie_step_errors_total", "Steps that raised", ("tool", "step"))
+LLM_TTFT = Histogram("resume_genie_llm_ttft_seconds", "Time to the first streamed token",
+                     ("tool",), SECONDS_BUCKETS)
+LLM_INPUT_TOKENS = Histogram("resume_genie_llm_input_tokens", "Prompt size per LLM call",
+                             ("tool",), TOKEN_BUCKETS)
+LLM_OUTPUT_TOKENS = Histogram("resume_genie_llm_output_tokens", "Answer size per LLM call",
+                              ("tool",), TOKEN_BUCKETS)
+ROUTES = Counter("resume_genie_route_total", "Tool calls answered per model_router tier", ("tool", "tier"))
+METRICS = (STEP_SECONDS, STEP_ERRORS, LLM_TTFT, LLM_INPUT_TOKENS, LLM_OUTPUT_TOKENS, ROUTES)
+
+
+def render_metrics():
+    """All metrics in the Prometheus text exposition format (also read by OpenTelemetry collectors)."""
+    return "\n".join(line for metric in METRICS for line in metric.expose()) + "\n"
+
+
+# ───────────────────────────────────────────────
+# SPANS
+# ───────────────────────────────────────────────
+_tracer = None
+
+
+def _otel_tracer():
+    # Spans are mirrored to OpenTelemetry when its API is installed (a no-op without an SDK)
+    global _tracer
+    if _tracer is None:
+        try:
+            from opentelemetry import trace
+
+            _tracer = trace.get_tracer("resume_genie")
+        except ImportError:
+            _tracer = False
+    return _tracer or None
+
+
+class span:
+    """Time one step of a tool run: ``with span("scorer", "extract"): ...``.
+
+    ``attributes`` (and anything passed to ``set``) go to the OpenTelemetry
+    span when one is active; the duration always lands in ``STEP_SECONDS``.
+    """
+
+    def __init__(self, tool, step, **attributes):
+        self.tool = tool
+        self.step = step
+        self.attributes = attributes
+        self.duration = None
+        self._otel = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+        if self._otel is not None:
+            for key, value in attributes.items():
+                self._otel.set_attribute(key, value)
+
+    def __enter__(self):
+        tracer = _otel_tracer()
+        if tracer is not None:
+            self._otel_cm = tracer.start_as_current_span(f"{self.tool}.{self.step}", attributes={
+                "tool": self.tool, "step": self.step, **self.attributes})
+            self._otel = self._otel_cm.__enter__()
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.duration = time.perf_counter() - self.started
+        STEP_SECONDS.observe(self.duration, self.tool, self.step)
+        if exc_type is not None and not issubclass(exc_type, GeneratorExit):
+            STEP_ERRORS.inc(self.tool, self.step)
+        if self._otel is not None:
+            self._otel_cm.__exit__(exc_type, exc, tb)
+        return False
+
+
+def record_llm(tool, input_tokens, output_tokens=None, ttft=None):
+    LLM_INPUT_TOKENS.observe(input_tokens, tool)
+    if output_tokens is not None:
+        LLM_OUTPUT_TOKENS.observe(output_tokens, tool)
+    if ttft is not None:
+        LLM_TTFT.observe(ttft, tool)
+
+
+def record_route(tool, tier):
+    ROUTES.inc(tool, tier)
+
+
+def route_table():
+    """Rows of (tool, tier, answers) for the admin panel."""
+    with ROUTES._lock:
+        return sorted((tool, tier, n) for (tool, tier), n in ROUTES._values.items())
+
+
+def latency_table():
+    """Rows of (tool, step, runs, p50 seconds, p95 seconds) for the admin panel."""
+    quantiles = STEP_SECONDS.quantiles(0.5, 0.95)
+    rows = [(tool, step, n, p50, p95) for (tool, step), (n, p50, p95) in quantiles.items()]
+    for (tool,), (n, p50, p95) in LLM_TTFT.quantiles(0.5, 0.95).items():
+        rows.append((tool, "first token", n, p50, p95))
+    return sorted(rows)
+
+
+# ───────────────────────────────────────────────
+# /metrics ENDPOINT
+# ───────────────────────────────────────────────
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render_metrics().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def start_metrics_server(port=METRICS_PORT, host=METRICS_HOST):
+    """Serve ``/metrics`` from a daemon thread, once per process.
+
+    Returns the bound port, or None when disabled or the port is taken
+    (e.g. by another Streamlit process on the same machine).
+    """
+    global _server
+    with _server_lock:
+        if _server is None and port:
+            try:
+                _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+            except OSError:
+                _server = False
+            else:
+                _server.daemon_threads = True
+                threading.Thread(target=_server.serve_forever, name="metrics", daemon=True).start()
+        return _server.server_address[1] if _server else None